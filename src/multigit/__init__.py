@@ -1,6 +1,46 @@
 # -*- coding: utf-8 -*-
 
+# Import stuff
+import importlib
+
 from .__main__ import __version__
-from .gitrepo import Gitrepo
-from .subrepos import Subrepos
-from .subrepofile import Subrepofile, SubrepofileError
+
+# Classes are only imported once first used, so the command line starts without loading their dependencies
+_lazy_imports = {
+	'Bundlearchive': '.bundlearchive',
+	'Gitrepo': '.gitrepo',
+	'Gitstatus': '.gitstatus',
+	'Hostpool': '.hostpool',
+	'Mirrorcache': '.mirrorcache',
+	'Outputformat': '.outputformats',
+	'Profiler': '.profiler',
+	'Refreader': '.refreader',
+	'Remoteprobe': '.remoteprobe',
+	'Renderer': '.renderer',
+	'Repostatus': '.subrepoentry',
+	'Retrypolicy': '.retrypolicy',
+	'Runjournal': '.runjournal',
+	'Subrepos': '.subrepos',
+	'SubreposError': '.subrepos',
+	'Subrepograph': '.subrepograph',
+	'Statecache': '.statecache',
+	'Subrepoentry': '.subrepoentry',
+	'Subrepofile': '.subrepofile',
+	'SubrepofileError': '.subrepofile',
+	'Subreposvalidator': '.subreposvalidator',
+}
+
+__all__ = ['__version__'] + list(_lazy_imports)
+
+
+def __getattr__(name):
+	if name in _lazy_imports:
+		value = getattr(importlib.import_module(_lazy_imports[name], __name__), name)
+		# next time, it will be found right away
+		globals()[name] = value
+		return value
+	raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
+
+def __dir__():
+	return sorted(set(globals()) | set(_lazy_imports))
@@ -17,11 +17,13 @@ The *"fixed"* name of the YAML file with subrepo definitions.
 '''  # pylint: disable=W0105
 
 # Import stuff
+# NOTE: heavy dependencies (GitPython, PyYAML, colorama...) are only imported by the options needing them,
+# so --help and --version start fast
 import os, sys
 import argparse
 
 # "local" imports
-from .subrepos import Subrepos
+from .outputformats import FORMATS
 
 # MAIN entry point
 def main():
@@ -37,10 +39,48 @@ def main():
 	main_parser.add_argument('-V', '--version', action='store_true', help="Shows " + parser.prog + " version and quits.")
 	main_parser.add_argument('-r', '--run', action='store_true', help="Recursively processes '" + SUBREPOS_FILE + "' files found.")
 	main_parser.add_argument('-s', '--status', action='store_true', help="Shows repositories' current status.")
+	main_parser.add_argument('-g', '--graph', action='store_true', help="Shows repositories' dependency graph and its critical path.")
+	main_parser.add_argument('--export-bundle', metavar='FILE', help="Writes the repositories' remotes as an archive of git bundles to FILE, to bootstrap other workspaces from.")
+	
+# Processing options
+	parser.add_argument('-j', '--jobs', type=int, default=1, metavar='N', help="Processes up to N repositories concurrently (default: 1).")
+	fetch_parser = parser.add_mutually_exclusive_group()
+	fetch_parser.add_argument('--no-fetch', '--offline', dest='fetch', action='store_false', help="Doesn't fetch remotes: works against the existing remote-tracking refs.")
+	fetch_parser.add_argument('--max-fetch-age', type=int, metavar='SECONDS', help="Only fetches repositories not fetched within the last SECONDS.")
+	parser.add_argument('--cache', action='store_true', help="Keeps a state cache at the workspace's root (at '.multigit/'): parsed '" + SUBREPOS_FILE + "' files and when each remote was last checked are reused by the next runs.")
+	parser.add_argument('--no-probe', dest='probe', action='store_false', help="Always fetches remotes instead of first probing them with 'git ls-remote'.")
+	parser.add_argument('--depth', type=int, metavar='N', help="Clones and fetches only the last N commits of repositories not setting their own 'depth'.")
+	parser.add_argument('--filter', choices=['blob:none', 'tree:0'], help="Makes partial clones of repositories not setting their own 'filter'.")
+	parser.add_argument('--format', choices=list(FORMATS), default='text', help="Output format of repositories' status (default: text): 'compact' is one line per repository, 'quiet' only reports repositories with errors or wrong remotes.  JSON formats are streamed one record per repository.")
+	parser.add_argument('--profile', action='store_true', help="Times each repository's processing phases and shows the slowest ones at the end.")
+	parser.add_argument('--profile-trace', metavar='FILE', help="Also writes the timings to FILE, as Chrome trace-event JSON (implies --profile).")
+	parser.add_argument('--mirror', action='store_true', help="Clones through bare mirrors of the remotes (kept at '.multigit/mirrors/'), so each remote's objects are stored once.")
+	parser.add_argument('--from-bundle', metavar='FILE', help="With --run, bootstraps the workspace from an archive written by --export-bundle: repositories are cloned through mirrors seeded from its bundles (implies --mirror), so only what's newer is fetched from their remotes.")
+	parser.add_argument('--max-host-connections', type=int, default=4, metavar='N', help="Runs up to N probes, fetches and clones at once against the same host (default: 4).")
+	parser.add_argument('--no-ssh-multiplexing', dest='ssh_multiplexing', action='store_false', help="Doesn't share a single ssh connection among the remotes of the same host.")
+	parser.add_argument('--immutable-tags', action='store_true', help="Trusts every tag never to move, like commits: tags already in a repository are never fetched again.")
+	parser.add_argument('--retries', type=int, default=3, metavar='N', help="Retries probes, fetches and clones failing for transient reasons up to N times, with exponential backoff (default: 3).")
+	parser.add_argument('--resume', action='store_true', help="With --run, skips the repositories already processed by the last run, if it was stopped halfway.")
+	parser.add_argument('--fsmonitor', action='store_true', help="Enables git's filesystem monitor on the repositories where git ships its builtin daemon (macOS and Windows), so checking for local changes doesn't scan their whole working trees.  Elsewhere (i.e. Linux) it only enables git's untracked cache, which doesn't speed up multigit's own check.")
+	parser.add_argument('--trust-mtimes', action='store_true', help="With --cache, only checks repositories for local changes when their HEAD, index or directories' modification times changed since the last run.  Beware: editing an existing file in place doesn't change any directory's modification time, so --status misses such edits until something else changes (--run always asks git before updating a repository).")
 
 # Ready to parse args
 	args = parser.parse_args()
 	#print(args)
+	if args.jobs < 1:
+		parser.error("argument -j/--jobs: must be a positive integer.")
+	if args.max_fetch_age is not None and args.max_fetch_age < 0:
+		parser.error("argument --max-fetch-age: must not be negative.")
+	if args.depth is not None and args.depth < 1:
+		parser.error("argument --depth: must be a positive integer.")
+	if args.retries < 0:
+		parser.error("argument --retries: must not be negative.")
+	if args.max_host_connections < 1:
+		parser.error("argument --max-host-connections: must be a positive integer.")
+	if args.resume and not args.run:
+		parser.error("argument --resume: only applies to --run.")
+	if args.trust_mtimes and not args.cache:
+		parser.error("argument --trust-mtimes: requires --cache, where the modification times are recorded.")
 
 # Run on the options
 	if len(sys.argv) > 1:
@@ -49,13 +89,59 @@ def main():
 			parser.print_help()
 		elif args.version:
 			print("%s %s" % (parser.prog, __version__))
-		else:
+		elif args.run or args.status:
+			from .subrepos import Subrepos
+			profiler = None
+			if args.profile or args.profile_trace:
+				from .profiler import Profiler
+				profiler = Profiler()
 			my_subrepos = Subrepos()
 			my_subrepos.process(
 				base_path=os.getcwd(),
 				subrepos_filename=SUBREPOS_FILE,
 				report_only=args.status,
+				jobs=args.jobs,
+				fetch=args.fetch,
+				max_fetch_age=args.max_fetch_age,
+				probe=args.probe,
+				cache=args.cache,
+				mirror=args.mirror,
+				depth=args.depth,
+				clone_filter=args.filter,
+				max_host_connections=args.max_host_connections,
+				ssh_multiplexing=args.ssh_multiplexing,
+				fsmonitor=args.fsmonitor,
+				trust_mtimes=args.trust_mtimes,
+				retries=args.retries,
+				resume=args.resume,
+				immutable_tags=args.immutable_tags,
+				from_bundle=args.from_bundle,
+				profiler=profiler,
+				output_format=args.format,
+			)
+			if args.profile_trace:
+				profiler.write_trace(args.profile_trace)
+		elif args.graph:
+			from .subrepos import Subrepos
+			my_subrepos = Subrepos()
+			my_subrepos.dependency_graph(
+				base_path=os.getcwd(),
+				subrepos_filename=SUBREPOS_FILE,
+				report=True,
+				cache=args.cache,
 			)
+		elif args.export_bundle:
+			from .subrepos import Subrepos
+			my_subrepos = Subrepos()
+			my_subrepos.export_bundle(
+				base_path=os.getcwd(),
+				archive_file=args.export_bundle,
+				subrepos_filename=SUBREPOS_FILE,
+				cache=args.cache,
+			)
+		else:
+			print("%s (%s): one of --run or --status required.\n" % (parser.prog, __version__))
+			parser.print_help()
 	else:
 	# Program called with no arguments (shows help)
 		print("%s (%s): arguments required.\n" % (parser.prog, __version__))
@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+
+# Import stuff
+import hashlib, io, json, os, shutil, tarfile, tempfile, threading
+from git import Repo, exc as git_exception
+
+# "local" imports
+from .mirrorcache import normalize_url
+
+MANIFEST = 'manifest.json'
+ARCHIVE_VERSION = 1
+
+
+class Bundlearchive(object):
+	'''
+	An archive of git bundles, one per remote of a workspace, to bootstrap fresh workspaces from.
+
+	It's a tar file holding a `manifest.json`, which maps normalized remote URLs to their bundles, and the bundles themselves.
+	Each bundle holds the remote-tracking branches and tags of a subrepo cloned from that remote, so a :class:`Mirrorcache`
+	can seed its mirrors from them and then fetch only what's newer from the real remotes.
+
+	It is safe to share a bundle archive among threads.
+	'''
+
+	def __init__(self, archive_file):
+		'''
+		:param str archive_file: path to the archive.
+		'''
+
+		self.archive_file = archive_file
+		self.__lock = threading.Lock()
+		self.__tar = None
+		self.__bundles = None
+
+
+	def export(self, subrepos):
+		'''
+		Writes the archive (atomically) from a workspace's subrepos.
+
+		Each remote is bundled from the first of its subrepos that can be bundled: those not cloned yet, shallow and partial
+		clones (which lack objects) and clones with no remote-tracking refs are skipped.
+
+		:param subrepos: subrepo dictionaries, as returned by Subrepofile.load().
+		:return tuple: a dictionary with the bundled remotes (their normalized URL mapped to the path of the subrepo bundled),
+			and another one with the skipped subrepos (their path mapped to the reason why).
+		'''
+
+		bundled = {}
+		skipped = {}
+		archive_dir = os.path.dirname(os.path.abspath(self.archive_file))
+		work_path = tempfile.mkdtemp(prefix='multigit-bundles-')
+		try:
+			bundles = {}
+			for subrepo in subrepos:
+				normalized_url = normalize_url(subrepo['repo'])
+				if normalized_url in bundled:
+					continue
+				try:
+					repo = Repo(subrepo['path'])
+				except (git_exception.NoSuchPathError, git_exception.InvalidGitRepositoryError) as e:
+					skipped[subrepo['path']] = "not cloned"
+					continue
+				if os.path.isfile(os.path.join(repo.common_dir, 'shallow')):
+					skipped[subrepo['path']] = "shallow clone"
+					continue
+				if self.__partial_clone(repo):
+					# bundling would fetch every missing object from the remote (or fail)
+					skipped[subrepo['path']] = "partial clone"
+					continue
+
+				name = os.path.basename(normalized_url.rstrip(':')) or 'bundle'
+				name += '-' + hashlib.sha1(normalized_url.encode('utf-8')).hexdigest()[:12] + '.bundle'
+				try:
+					repo.git.bundle(
+						'create', os.path.join(work_path, name),
+						'--exclude=origin/HEAD', '--remotes=origin', '--tags'
+					)
+				except git_exception.GitCommandError as e:
+					# i.e. an empty remote
+					skipped[subrepo['path']] = e.stderr.replace('stderr: ', '').strip('\n').strip().strip("'").strip()
+					continue
+				bundles[normalized_url] = name
+				bundled[normalized_url] = subrepo['path']
+
+			manifest = json.dumps({'version': ARCHIVE_VERSION, 'bundles': bundles}, indent=1, sort_keys=True).encode('utf-8')
+			fd, tmp_file = tempfile.mkstemp(dir=archive_dir, prefix=os.path.basename(self.archive_file) + '.')
+			try:
+				with os.fdopen(fd, 'wb') as f_archive, tarfile.open(fileobj=f_archive, mode='w') as tar:
+					manifest_info = tarfile.TarInfo(MANIFEST)
+					manifest_info.size = len(manifest)
+					tar.addfile(manifest_info, io.BytesIO(manifest))
+					for name in bundles.values():
+						tar.add(os.path.join(work_path, name), arcname=name)
+				os.replace(tmp_file, self.archive_file)
+			except BaseException:
+				os.unlink(tmp_file)
+				raise
+		finally:
+			shutil.rmtree(work_path, ignore_errors=True)
+
+		return bundled, skipped
+
+
+	@staticmethod
+	def __partial_clone(repo):
+		'''
+		:param repo: a :class:`git.Repo` object.
+		:return bool: `True` if it's a partial clone (i.e. cloned with `--filter`).
+		'''
+
+		config = repo.config_reader()
+		return bool(
+			config.get_value('remote "origin"', 'promisor', False)
+			or config.get_value('extensions', 'partialclone', '')
+		)
+
+
+	def remotes(self):
+		'''
+		:return list: the normalized URLs of the remotes bundled in the archive.
+		:raises OSError: if the archive can't be read.
+		:raises ValueError: if it's not a bundle archive.
+		'''
+
+		with self.__lock:
+			if self.__tar is None:
+				self.__open()
+			return sorted(self.__bundles)
+
+
+	def extract(self, url, directory):
+		'''
+		Extracts the bundle of a remote.
+
+		:param str url: the remote's URL.
+		:param str directory: where to extract it.
+		:return str: absolute path to the extracted bundle, or *None* if the archive has none for this remote.
+		:raises OSError: if the archive can't be read.
+		:raises ValueError: if it's not a bundle archive.
+		'''
+
+		with self.__lock:
+			if self.__tar is None:
+				self.__open()
+			name = self.__bundles.get(normalize_url(url))
+			if name is None:
+				return None
+
+			bundle_file = os.path.join(os.path.abspath(directory), os.path.basename(name))
+			with self.__tar.extractfile(name) as f_bundle, open(bundle_file, 'wb') as f_extracted:
+				shutil.copyfileobj(f_bundle, f_extracted)
+
+		return bundle_file
+
+
+	def close(self):
+		'''Closes the archive.'''
+
+		with self.__lock:
+			if self.__tar is not None:
+				self.__tar.close()
+				self.__tar = None
+
+
+	def __open(self):
+		'''Opens the archive and loads its manifest.'''
+
+		try:
+			tar = tarfile.open(self.archive_file, mode='r')
+		except tarfile.TarError as e:
+			raise ValueError(f"'{self.archive_file}' is not a bundle archive") from e
+
+		try:
+			with tar.extractfile(MANIFEST) as f_manifest:
+				manifest = json.load(f_manifest)
+			if manifest.get('version') != ARCHIVE_VERSION:
+				raise ValueError(f"unsupported bundle archive version {manifest.get('version')}")
+			self.__bundles = manifest['bundles']
+		except (KeyError, AttributeError, TypeError, ValueError) as e:
+			tar.close()
+			raise ValueError(f"'{self.archive_file}' is not a bundle archive: {e}")
+
+		self.__tar = tar
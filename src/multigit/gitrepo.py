@@ -1,117 +1,231 @@
 # -*- coding: utf-8 -*-
 
 # Import stuff
-import sys
+import os, re, sys, time
+from contextlib import nullcontext
 from git import Repo, exc as git_exception
 
+# "local" imports
+from .gitstatus import Gitstatus
+from .refreader import Refreader, FULL_HEXSHA
+from .subrepoentry import Repostatus
+
+UNADVERTISED_OBJECT = re.compile(r'not our ref|unadvertised object')
+'''
+git error messages meaning a server won't send a commit by itself.
+'''  # pylint: disable=W0105
+
 
 class Gitrepo(object):
 	'''Processes a single git repo entity as defined by multigit.'''
 	
-	def __init__(self):
-		pass
+	def __init__(self, fetch=True, max_fetch_age=None, remote_probe=None, state=None, mirrors=None, depth=None, clone_filter=None, profiler=None, hosts=None, retry=None, fsmonitor=False, trust_mtimes=False, immutable_tags=False):
+		'''
+		Sets how remotes are refreshed before computing a repo's status.
+		
+		:param bool fetch: `True`, fetches remotes; `False`, works offline against the existing remote-tracking refs.
+		:param int max_fetch_age: *None*, always fetches; otherwise, only fetches repos whose last fetch is older than this many seconds.
+		:param Remoteprobe remote_probe: *None*, fetches right away; otherwise, the remote is first probed and only fetched if the requested gitref's commit differs from the local remote-tracking one.
+		:param Statecache state: *None*, keeps nothing across runs; otherwise, the workspace's state, which records when each remote was last checked (so `max_fetch_age` also honors probes that found nothing new) and, with `trust_mtimes`, each repo's last dirtiness verdict.
+		:param Mirrorcache mirrors: *None*, clones straight from the remote; otherwise, repos are cloned with `--reference` to their remote's mirror, which is also refreshed before fetching those clones.
+		:param int depth: *None*, clones full histories; otherwise, the default history depth of clones and fetches (a subrepo's 'depth' key overrides it).
+		:param str clone_filter: *None*, clones every object; otherwise, the default partial clone filter, *'blob:none'* or *'tree:0'* (a subrepo's 'filter' key overrides it).
+		:param Profiler profiler: *None*; otherwise, the phases of each repo's processing are timed there.
+		:param Hostpool hosts: *None*, connects to remotes at will; otherwise, fetches and clones hold one of their host's connection slots (and share its ssh master).
+		:param Retrypolicy retry: *None*, network failures are reported right away; otherwise, probes, fetches and clones failing for transient reasons are retried as per this policy.
+		:param bool fsmonitor: `False`, leaves repos' configuration alone; `True`, enables git's untracked cache and, where git ships its builtin filesystem monitor daemon, `core.fsmonitor` on every repo checked, so `git status` doesn't need to scan the whole working tree (the untracked cache alone doesn't help the dirtiness check, which ignores untracked files).
+		:param bool trust_mtimes: `False`, always asks git whether a repo is dirty; `True` (it requires a `state`), reuses the last dirtiness verdict while the repo's HEAD, index and the modification times of its working tree's directories don't change.  This is much cheaper on huge trees, but edits of existing files that don't touch their directory (i.e. not saved through a rename) go unnoticed until something else changes.  Either way, git is always asked before an update changes a working tree, so a dirty repo is never touched.
+		:param bool immutable_tags: `False`, only tags marked as 'immutable' by their subrepo entry are trusted never to move; `True`, every tag is.  Either way, immutable tags (and full commit SHAs) already in a repo are resolved with no network access.
+		'''
+		
+		self.fetch = fetch
+		self.max_fetch_age = max_fetch_age
+		self.remote_probe = remote_probe
+		self.state = state
+		self.mirrors = mirrors
+		self.depth = depth
+		self.clone_filter = clone_filter
+		self.profiler = profiler
+		self.hosts = hosts
+		self.retry = retry
+		self.fsmonitor = fsmonitor
+		self.trust_mtimes = trust_mtimes
+		self.immutable_tags = immutable_tags
+		self.__fsmonitor_daemon = None
 		
 		
 	def status(self, repoconf):
 		'''
 		Finds the status of the repo configuration that gets as param.
 		
+		:param repoconf: the configuration of the git repository to be processed: a :class:`Subrepoentry` (or a plain dictionary with the same keys).
+		:return: returns the same repoconf provided as parameter with a new 'status' key populated (a :class:`Repostatus`) and, optionally a 'extra_info' key.
+		'''
+		
+		repostatus, refs = self.__status(repoconf)
+		return repostatus
+		
+		
+	def expect(self, subrepos):
+		'''
+		Announces subrepos about to be processed, so each remote is probed once for the gitrefs of all of them.
+		
+		:param list subrepos: subrepo entries (as returned by :meth:`Subrepofile.load`), whose gitrefs are wanted from their remotes' probes (see :meth:`Remoteprobe.want`).
+		'''
+		
+		if self.remote_probe is None or not self.fetch:
+			return
+			
+		for repoconf in subrepos:
+			gitref_type = repoconf.get('gitref_type')
+			if gitref_type == 'branch':
+				self.remote_probe.want(repoconf['repo'], 'refs/heads/' + repoconf['branch'])
+			elif gitref_type == 'tag':
+				# immutable tags are (most likely) resolved locally
+				if not (self.immutable_tags or repoconf.get('immutable')):
+					self.remote_probe.want(repoconf['repo'], 'refs/tags/' + repoconf['tag'])
+			elif gitref_type != 'commit':
+				self.remote_probe.want(repoconf['repo'], 'HEAD')
+				
+				
+	def __status(self, repoconf):
+		'''
+		Finds the status of the repo configuration that gets as param, fetching its remote at most once.
+		
 		:param repoconf: the configuration dictionary of the git repository to be processed.
-		:return: returns the same repoconf dictionary provided as parameter with a new 'status' key populated and, optionally a 'extra_info' key.
+		:return: a tuple with the repoconf dictionary as returned by :meth:`status` and the :class:`Refreader` of the already fetched repo (*None* if it couldn't be opened).
 		'''
 		
 		#print(str(repoconf))
+		refs = None
 		repostatus = repoconf
-		repostatus['status'] = 'UNPROCESSED'
+		repostatus['status'] = Repostatus.UNPROCESSED
 		if not 'gitref_type' in repostatus:
 			repostatus['gitref_type'] = None
 		
 		# Let's check if it's at least cloned
 		try:
-			repo = Repo(repoconf['path'])
+			with self.__phase(repoconf, 'open'):
+				repo = Repo(repoconf['path'])
+				refs = Refreader(repo)
 		except git_exception.NoSuchPathError as e:
 			# repo not yet cloned
-			repostatus['status'] = 'NOT_CLONED'
+			repostatus['status'] = Repostatus.NOT_CLONED
 		except git_exception.InvalidGitRepositoryError as e:
 			# directory exists but, for whatever reason, is not a valid repo
-			repostatus['status'] = 'ERROR'
+			repostatus['status'] = Repostatus.ERROR
 			my_error_msg =  "directory '" + repostatus['path'] + "' exists, but it's not a valid git sandbox."
 			my_error_msg += "\n\tPlease, review its contents."
 			repostatus['extra_info'] = my_error_msg
 			
 		# if still unprocessed it's because the repo is there
 		# Check remotes
-		if repostatus['status'] == 'UNPROCESSED':
+		if repostatus['status'] == Repostatus.UNPROCESSED:
 			if repostatus['repo'] != repo.remotes.origin.url:
-				repostatus['status'] = 'WRONG_REMOTE'
+				repostatus['status'] = Repostatus.WRONG_REMOTE
 				my_error_msg = "Requested remote is '" + repostatus['repo'] + "' "
 				my_error_msg += "but current origin is '" + repo.remotes.origin.url + "'."
 				repostatus['extra_info'] = my_error_msg
 			
 		# if still unprocessed it's because the repo is there and the remote is right
-		# Let's try to update its status
-		if repostatus['status'] == 'UNPROCESSED':
+		# Let's try to update its status (immutable gitrefs already there can't change, though)
+		if (
+			repostatus['status'] == Repostatus.UNPROCESSED
+			and not self.__pinned_locally(refs, repostatus)
+			and self.__needs_fetch(refs, repostatus)
+		):
 			try:
-				repo.git.fetch(prune=True)
+				with self.__phase(repostatus, 'probe'):
+					remote_changed = self.__remote_changed(refs, repostatus)
+				if remote_changed:
+					if self.mirrors is not None and self.__borrows_objects(refs):
+						# the fetch will find the new objects already there
+						with self.__phase(repostatus, 'mirror'):
+							self.__mirror(repostatus['repo'])
+					with self.__phase(repostatus, 'fetch', git_dir=refs.common_dir):
+						self.__remote_operation(repostatus, lambda env: self.__fetch(refs, repostatus), refs.repo)
+				if self.state is not None:
+					self.state.update(repostatus['path'], fetch_time=time.time())
 			except git_exception.GitCommandError as e:
 				if e.status == 128:
-					repostatus['status'] = 'ERROR'
+					repostatus['status'] = Repostatus.ERROR
 					repostatus['extra_info'] = e.stderr.replace('stderr: ','').strip('\n').strip()
 				else:
 					raise
 			
-		if repostatus['status'] == 'UNPROCESSED':
-			try:
-				local_commit = repo.commit().hexsha
-			except ValueError as e:
-				if (
-					"Reference at 'refs/heads/master' does not exist" in str(e)
-					or "Reference at 'refs/heads/main' does not exist" in str(e)
-				):
-					# Remote repo exists, but it's still "un-initialized" (lacks its first commit)
-					repostatus['status'] = 'EMPTY'
-				else:
-					raise e
+		# Local status: HEAD and current branch
+		if repostatus['status'] == Repostatus.UNPROCESSED:
+			local_commit = refs.resolve('HEAD')
+			local_branch = refs.symref('HEAD')
+			if local_branch is not None:
+				local_branch = local_branch.replace('refs/heads/', '', 1)
+			if local_commit is None:
+				# Remote repo exists, but it's still "un-initialized" (lacks its first commit)
+				repostatus['status'] = Repostatus.EMPTY
 				
 		# if still unprocessed, it's a good repo.
 		# can it be updated?
-		if repostatus['status'] == 'UNPROCESSED':
-			if repo.is_dirty():
-				repostatus['status'] = 'DIRTY'
+		if repostatus['status'] == Repostatus.UNPROCESSED:
+			with self.__phase(repostatus, 'local_status'):
+				if self.fsmonitor:
+					self.__enable_fsmonitor(repo)
+				dirty = self.__dirty(refs, repostatus)
+			if dirty:
+				repostatus['status'] = Repostatus.DIRTY
 				
+		# is the proper gitref already checked out, at the remote's commit?
+		if repostatus['status'] == Repostatus.UNPROCESSED:
+			with self.__phase(repostatus, 'classify'):
+				self.__classify(refs, repostatus, local_commit, local_branch)
+				
+		return repostatus, refs
+	
+	
+	def __classify(self, refs, repostatus, local_commit, local_branch):
+		'''
+		Finds if a clean repo is up to date, or which updates are pending.
+		
+		:param Refreader refs: the ref reader of the repo.
+		:param repostatus: the configuration dictionary of the git repository being processed; its 'status' (and, optionally, 'from', 'to' and 'extra_info') keys get populated.
+		:param str local_commit: the commit HEAD points to.
+		:param str local_branch: the checked out branch (*None* if HEAD is detached).
+		'''
+		
 		# is the proper gitref already checked out?
-		if repostatus['status'] == 'UNPROCESSED':
-			# print(str(repo))
-			if (
-				'gitref_type' in repostatus
-				and repostatus['gitref_type'] is not None
-			):
-				if repostatus['gitref_type'] == 'branch':
-					if repo.head.is_detached:
-						repostatus['status'] = 'PENDING_UPDATE'
-						repostatus['from'] = repo.commit().hexsha
-						repostatus['to'] = repostatus['branch']
-					elif repo.head.ref.name != repostatus['branch']:
-						repostatus['status'] = 'PENDING_UPDATE'
-						repostatus['from'] = repo.head.ref.name
-						repostatus['to'] = repostatus['branch']
+		if (
+			'gitref_type' in repostatus
+			and repostatus['gitref_type'] is not None
+		):
+			if repostatus['gitref_type'] == 'branch':
+				if local_branch is None:
+					repostatus['status'] = Repostatus.PENDING_UPDATE
+					repostatus['from'] = local_commit
+					repostatus['to'] = repostatus['branch']
+				elif local_branch != repostatus['branch']:
+					repostatus['status'] = Repostatus.PENDING_UPDATE
+					repostatus['from'] = local_branch
+					repostatus['to'] = repostatus['branch']
+		else:
+			# default branch requested
+			# find its remote name (i.e. 'refs/remotes/origin/master')
+			remote_head = refs.symref('refs/remotes/origin/HEAD')
+			if remote_head is None:
+				repostatus['status'] = Repostatus.WRONG_REMOTE
+				repostatus['extra_info'] = "Can't find the remote's default branch ('refs/remotes/origin/HEAD' is not set)."
 			else:
-				# default branch requested
-				# find its remote name (i.e. 'origin/master')
-				remote_head = next(ref for ref in repo.remotes.origin.refs if '/HEAD' in ref.name).ref.name
 				# ...and convert to a proper local name (i.e. 'master')
-				default_branch = remote_head.split('/', 1)[-1]
-				if repo.head.is_detached:
-					repostatus['status'] = 'PENDING_UPDATE'
-					repostatus['from'] = repo.commit().hexsha
+				default_branch = remote_head.replace('refs/remotes/origin/', '', 1)
+				if local_branch is None:
+					repostatus['status'] = Repostatus.PENDING_UPDATE
+					repostatus['from'] = local_commit
 					repostatus['to'] = default_branch
-				elif default_branch != repo.head.ref.name:
-					repostatus['status'] = 'PENDING_UPDATE'
-					repostatus['from'] = repo.head.ref.name
+				elif default_branch != local_branch:
+					repostatus['status'] = Repostatus.PENDING_UPDATE
+					repostatus['from'] = local_branch
 					repostatus['to'] = default_branch
-					
+				
 		# Let's check its current commit vs the remote one
-		if repostatus['status'] == 'UNPROCESSED':
+		if repostatus['status'] == Repostatus.UNPROCESSED:
 			if (
 				'gitref_type' in repostatus
 				and repostatus['gitref_type'] is not None
@@ -120,91 +234,443 @@ class Gitrepo(object):
 				desired_gitref = repostatus[gitref_type]
 				if gitref_type == 'branch':
 					remote_ref = str('origin/' + repostatus[gitref_type])
+					desired_commit = refs.commit('refs/remotes/' + remote_ref)
+				elif gitref_type == 'tag':
+					remote_ref = str(repostatus[gitref_type])
+					desired_commit = refs.commit('refs/tags/' + remote_ref)
 				else:
 					remote_ref = str(repostatus[gitref_type])
-				try:
-					desired_commit = str(repo.commit(remote_ref))
-				except git_exception.BadName as e:
-					if ("Ref '" + remote_ref + "' did not resolve to an object" in str(e)):
-						# The requested gitref doesn't exist at the remote end (for whatever reason)
-						desired_commit = None  # ...so no desired commit possible
-						repostatus['status'] = 'WRONG_REMOTE'
-						repostatus['extra_info'] = "It seems you requested a gitref that can't be found on remote.\n"
-						repostatus['extra_info'] += str(e)
-					else:
-						raise e
+					desired_commit = refs.commit(remote_ref)
+				if desired_commit is None:
+					# The requested gitref doesn't exist at the remote end (for whatever reason)
+					repostatus['status'] = Repostatus.WRONG_REMOTE
+					repostatus['extra_info'] = "It seems you requested a gitref that can't be found on remote.\n"
+					repostatus['extra_info'] += "Ref '" + remote_ref + "' did not resolve to an object"
 			else:
-				desired_commit = repo.remotes.origin.refs.HEAD.commit.hexsha
-				desired_gitref = repo.git.symbolic_ref('refs/remotes/origin/HEAD').replace('refs/remotes/origin/','')
+				desired_commit = refs.commit(remote_head)
+				desired_gitref = default_branch
 				
 			if (desired_commit and local_commit != desired_commit):
-				repostatus['status'] = 'PENDING_UPDATE'
+				repostatus['status'] = Repostatus.PENDING_UPDATE
 				repostatus['from'] = local_commit
 				repostatus['to'] = desired_commit
 				
 		# if still unprocessed, it's up to date
-		if repostatus['status'] == 'UNPROCESSED':
-			repostatus['status'] = 'UP_TO_DATE'
+		if repostatus['status'] == Repostatus.UNPROCESSED:
+			repostatus['status'] = Repostatus.UP_TO_DATE
 			
-		return repostatus
-	
-	
+			
+	def __pinned_locally(self, refs, repoconf):
+		'''
+		Checks if a repo's requested gitref is immutable and already in the repo, so it can be resolved with no network access.
+		
+		Full commit SHAs are always immutable; tags are, if their subrepo entry marks them as 'immutable' or
+		if every tag is trusted to be (see `immutable_tags`).
+		
+		:param Refreader refs: the ref reader of the repo to check.
+		:param repoconf: the configuration dictionary of the git repository being processed.
+		:return bool: `True` if there's no need to reach the remote.
+		'''
+		
+		if repoconf['gitref_type'] == 'commit':
+			return bool(FULL_HEXSHA.match(repoconf['commit'])) and refs.commit(repoconf['commit']) is not None
+		if repoconf['gitref_type'] == 'tag' and (self.immutable_tags or repoconf.get('immutable')):
+			return refs.resolve('refs/tags/' + repoconf['tag']) is not None
+			
+		return False
+		
+		
+	def __needs_fetch(self, refs, repoconf):
+		'''
+		Checks if a repo's remote should be fetched, as per the fetch settings.
+		
+		:param Refreader refs: the ref reader of the repo to check.
+		:param repoconf: the configuration dictionary of the git repository being processed.
+		:return bool: `True` if the remote should be fetched.
+		'''
+		
+		if not self.fetch:
+			return False
+		if self.max_fetch_age is None:
+			return True
+			
+		# FETCH_HEAD is rewritten on every fetch (it doesn't exist on a fresh clone)...
+		fetch_time = self.__mtime(os.path.join(refs.git_dir, 'FETCH_HEAD'))
+		# ...but a probe finding nothing new doesn't touch it
+		if self.state is not None:
+			fetch_time = max(
+				fetch_time or 0,
+				self.state.get(repoconf['path']).get('fetch_time', 0),
+			)
+		if not fetch_time:
+			return True
+			
+		return time.time() - fetch_time > self.max_fetch_age
+		
+		
+	@staticmethod
+	def __mtime(path):
+		try:
+			return os.path.getmtime(path)
+		except FileNotFoundError as e:
+			return None
+		
+		
+	def __enable_fsmonitor(self, repo):
+		'''
+		Enables git's untracked cache and, if available, its builtin filesystem monitor on a repo (unless already configured).
+		
+		:param repo: the :class:`git.Repo` object to configure.
+		'''
+		
+		if self.__fsmonitor_daemon is None:
+			# the daemon isn't built on every platform (i.e. Linux, as of git 2.39)
+			build_options = repo.git.version('--build-options')
+			self.__fsmonitor_daemon = 'fsmonitor--daemon' in build_options
+			
+		config = repo.config_reader()
+		settings = {'untrackedCache': 'true'}
+		if self.__fsmonitor_daemon:
+			settings['fsmonitor'] = 'true'
+		for option, value in settings.items():
+			if str(config.get_value('core', option, '')).lower() != value:
+				repo.git.config('core.' + option, value)
+				
+				
+	def __dirty(self, refs, repoconf, trust_mtimes=True):
+		'''
+		Checks if a repo has changes in its index or working tree.
+		
+		:param Refreader refs: the ref reader of the repo.
+		:param repoconf: the configuration dictionary of the git repository being processed.
+		:param bool trust_mtimes: `True`, the last verdict can be reused as per `trust_mtimes` (see :meth:`__init__`); `False`, git is always asked (i.e. right before changing the working tree).
+		:return bool: `True` if it's dirty.
+		'''
+		
+		if not self.trust_mtimes or self.state is None:
+			return Gitstatus.read(refs.repo).dirty
+			
+		# taken before asking git, so changes made meanwhile invalidate it
+		stamp = self.__worktree_stamp(refs)
+		known_worktree = self.state.get(repoconf['path']).get('worktree')
+		if trust_mtimes and known_worktree is not None and known_worktree['stamp'] == stamp:
+			return known_worktree['dirty']
+			
+		dirty = Gitstatus.read(refs.repo).dirty
+		# git rewrites the index while refreshing it (over and over, while its entries are racily clean)
+		stamp[1] = self.__index_stamp(refs)
+		self.state.update(repoconf['path'], worktree={'stamp': stamp, 'dirty': dirty})
+		return dirty
+		
+		
+	def __index_stamp(self, refs):
+		'''
+		:param Refreader refs: the ref reader of the repo.
+		:return list: the size and modification time (ns) of the repo's index, or *None* if it has none.
+		'''
+		
+		try:
+			index_stat = os.stat(os.path.join(refs.git_dir, 'index'))
+		except FileNotFoundError as e:
+			return None
+		return [index_stat.st_size, index_stat.st_mtime_ns]
+		
+		
+	def __worktree_stamp(self, refs):
+		'''
+		Collects the modification times git's dirtiness depends on, as far as they can be found without a full scan.
+		
+		Files created, removed or renamed change their directory's modification time; nested git sandboxes are skipped.
+		
+		:param Refreader refs: the ref reader of the repo.
+		:return list: the repo's HEAD commit, its index' size and modification time (ns), and the number and latest
+			modification time (ns) of its working tree's directories.
+		'''
+		
+		directories = 0
+		latest_mtime = 0
+		pending_dirs = [refs.repo.working_tree_dir]
+		while pending_dirs:
+			current_dir = pending_dirs.pop()
+			try:
+				with os.scandir(current_dir) as entries:
+					subdirs = []
+					for entry in entries:
+						if entry.name == '.git':
+							if current_dir != refs.repo.working_tree_dir:
+								# a nested sandbox
+								break
+						elif entry.is_dir(follow_symlinks=False):
+							subdirs.append(entry.path)
+					else:
+						directories += 1
+						latest_mtime = max(latest_mtime, os.stat(current_dir).st_mtime_ns)
+						pending_dirs.extend(subdirs)
+			except OSError as e:
+				pass
+				
+		return [refs.resolve('HEAD'), self.__index_stamp(refs), directories, latest_mtime]
+		
+		
+	def __phase(self, repoconf, name, git_dir=None):
+		'''
+		Times a phase of a repo's processing, if there's a profiler.
+		
+		:param repoconf: the configuration dictionary of the git repository being processed.
+		:param str name: the phase's name.
+		:param str git_dir: *None*; otherwise, the git directory whose growth is counted as fetched.
+		:return: a context manager.
+		'''
+		
+		if self.profiler is None:
+			return nullcontext()
+		return self.profiler.phase(repoconf['path'], name, git_dir=git_dir)
+		
+		
+	def __remote_operation(self, repoconf, operation, repo=None):
+		'''
+		Runs a network operation holding a connection to the remote's host (if there's a host pool), and retrying it
+		if it fails for transient reasons (if there's a retry policy).
+		
+		:param repoconf: the configuration dictionary of the git repository being processed.
+		:param operation: a callable running the operation, given the environment its git commands must be run with.
+		:param repo: *None*; otherwise, the :class:`git.Repo` object whose git commands use the connection.
+		:return: whatever the operation returns.
+		'''
+		
+		def attempt():
+			with self.hosts.connection(repoconf['repo'], repo) if self.hosts is not None else nullcontext({}) as env:
+				return operation(env)
+				
+		if self.retry is None:
+			return attempt()
+		return self.retry.run(attempt)
+		
+		
+	def __clone_options(self, repoconf):
+		'''
+		Finds the shallow and partial clone options of a repo.
+		
+		:param repoconf: the configuration dictionary of the git repository being processed.
+		:return dict: the 'depth' and 'filter' options to clone it with (only those set).
+		'''
+		
+		clone_options = {}
+		depth = repoconf.get('depth', self.depth)
+		if depth:
+			clone_options['depth'] = depth
+		clone_filter = repoconf.get('filter', self.clone_filter)
+		if clone_filter:
+			clone_options['filter'] = clone_filter
+			
+		return clone_options
+		
+		
+	def __fetch(self, refs, repoconf):
+		'''
+		Fetches a repo's remote.
+		
+		Shallow clones only fetch the requested gitref: up to their depth if it's new to them, or just its new commits otherwise
+		(so it stays connected to the history already there).  Partial clones filter their fetches by themselves.
+		
+		:param Refreader refs: the ref reader of the repo to fetch.
+		:param repoconf: the configuration dictionary of the git repository being processed.
+		'''
+		
+		repo = refs.repo
+		depth = self.__clone_options(repoconf).get('depth')
+		if (
+			depth is None
+			or repoconf['gitref_type'] is None
+			or not os.path.isfile(os.path.join(refs.common_dir, 'shallow'))
+		):
+			# a full clone must not be made shallow
+			repo.git.fetch(prune=True)
+		elif repoconf['gitref_type'] == 'commit':
+			if refs.commit(repoconf['commit']) is None:
+				self.__fetch_commit(repo, repoconf['commit'], depth)
+		else:
+			if repoconf['gitref_type'] == 'branch':
+				local_ref = 'refs/remotes/origin/' + repoconf['branch']
+				refspec = f"+refs/heads/{repoconf['branch']}:{local_ref}"
+			else:
+				local_ref = 'refs/tags/' + repoconf['tag']
+				refspec = f"+{local_ref}:{local_ref}"
+			if refs.resolve(local_ref) is None:
+				repo.git.fetch('origin', refspec, depth=depth)
+			else:
+				repo.git.fetch('origin', refspec)
+			
+			
+	def __fetch_commit(self, repo, commit, depth):
+		'''
+		Fetches a single commit into a shallow clone.
+		
+		Abbreviated commits can't be fetched by themselves, nor can unadvertised ones from servers not allowing it:
+		the full history is fetched instead.  Any other error (i.e. a network or authentication one) is raised.
+		
+		:param repo: the :class:`git.Repo` object to fetch into.
+		:param str commit: the requested commit.
+		:param int depth: history depth to fetch.
+		:raises git.exc.GitCommandError: if the fetch failed.
+		'''
+		
+		if FULL_HEXSHA.match(commit):
+			try:
+				repo.git.fetch('origin', commit, depth=depth)
+				return
+			except git_exception.GitCommandError as e:
+				if not UNADVERTISED_OBJECT.search(str(e.stderr or '')):
+					raise
+		repo.git.fetch('--unshallow', 'origin')
+			
+			
+	def __borrows_objects(self, refs):
+		'''
+		Checks if a repo borrows objects from others (i.e. it was cloned with `--reference` to a mirror).
+		
+		:param Refreader refs: the ref reader of the repo to check.
+		:return bool: `True` if it has alternate object stores.
+		'''
+		
+		return os.path.isfile(os.path.join(refs.common_dir, 'objects', 'info', 'alternates'))
+		
+		
+	def __mirror(self, url):
+		'''
+		Gets the up to date mirror of a remote.
+		
+		:param str url: the remote's URL.
+		:return str: the mirror's path, or *None* if it couldn't be mirrored (the remote itself will be used then).
+		'''
+		
+		try:
+			return self.mirrors.mirror(url)
+		except git_exception.GitCommandError as e:
+			return None
+			
+			
+	def __remote_changed(self, refs, repoconf):
+		'''
+		Checks if the remote commit of the requested gitref differs from the local remote-tracking one.
+		
+		:param Refreader refs: the ref reader of the repo to check.
+		:param repoconf: the configuration dictionary of the git repository being processed.
+		:return bool: `True` if the remote should be fetched (always, if there's no remote probe or the gitref is a commit).
+		'''
+		
+		if self.remote_probe is None or repoconf['gitref_type'] == 'commit':
+			return True
+			
+		if repoconf['gitref_type'] == 'branch':
+			remote_ref = 'refs/heads/' + repoconf['branch']
+			local_ref = 'refs/remotes/origin/' + repoconf['branch']
+			probed_ref = remote_ref
+		elif repoconf['gitref_type'] == 'tag':
+			remote_ref = 'refs/tags/' + repoconf['tag']
+			local_ref = remote_ref
+			probed_ref = remote_ref
+		else:
+			# default branch requested: compare the one origin/HEAD points to (the remote HEAD must still point to it)
+			local_ref = refs.symref('refs/remotes/origin/HEAD')
+			if local_ref is None:
+				return True
+			remote_ref = local_ref.replace('refs/remotes/origin/', 'refs/heads/', 1)
+			probed_ref = 'HEAD'
+			
+		remote_refs = self.remote_probe.refs(refs.repo, repoconf['repo'], probed_ref)
+		return remote_refs.get(remote_ref) != refs.commit(local_ref)
+		
+		
 	def update(self, repoconf):
 		'''
 		Updates a repo entry as per its current state.
 		
-		:param repoconf: the configuration dictionary of the git repository to be processed.
-		:return: returns the same repoconf dictionary provided as parameter with a new 'status' key populated after update process and, optionally, a 'extra_info' key.
+		:param repoconf: the configuration of the git repository to be processed: a :class:`Subrepoentry` (or a plain dictionary with the same keys).
+		:return: returns the same repoconf provided as parameter with a new 'status' key populated after update process (a :class:`Repostatus`) and, optionally, a 'extra_info' key.
 		'''
 		
 		# First, let's check the repository's current status
-		repostatus = self.status(repoconf)
+		# (its remote is fetched there, so there's no need to fetch it again below)
+		repostatus, refs = self.__status(repoconf)
 		# print(repostatus)
 		
 		# Then, let's operate on the repository depending on its status
 		if (
 			# all these are statuses we can't deal with here
-			repostatus['status'] == 'ERROR'
-			or repostatus['status'] == 'UP_TO_DATE'
-			or repostatus['status'] == 'EMPTY'
-			or repostatus['status'] == 'DIRTY'
-			or repostatus['status'] == 'WRONG_REMOTE'
+			repostatus['status'] == Repostatus.ERROR
+			or repostatus['status'] == Repostatus.UP_TO_DATE
+			or repostatus['status'] == Repostatus.EMPTY
+			or repostatus['status'] == Repostatus.DIRTY
+			or repostatus['status'] == Repostatus.WRONG_REMOTE
 		):
 			pass
-		elif repostatus['status'] == 'NOT_CLONED':
+		elif repostatus['status'] == Repostatus.NOT_CLONED:
 			# Let's try to clone it:
 			# you can `git clone` or `git clone --branch` (which can take either branch or tag but **not** a commit)
 			# in case a specific commit is requested, first "bare" clone, then move to the requested commit.
+			# shallow (depth) and partial (filter) clones are honored all the way.
+			clone_options = self.__clone_options(repostatus)
+			if self.mirrors is not None:
+				with self.__phase(repostatus, 'mirror'):
+					reference = self.__mirror(repostatus['repo'])
+				if reference is not None:
+					clone_options['reference'] = reference
+			git_dir = os.path.join(repostatus['path'], '.git')
 			try:
 				if (
 					repostatus['gitref_type'] == 'branch'
 					or repostatus['gitref_type'] == 'tag'
 				):
 					gitref_type = repostatus['gitref_type']
-					repo = Repo.clone_from(
-						url     = repostatus['repo'],
-						to_path = repostatus['path'],
-						branch  = repostatus[gitref_type],
-					)
+					with self.__phase(repostatus, 'clone', git_dir=git_dir):
+						repo = self.__remote_operation(repostatus, lambda env: Repo.clone_from(
+							url     = repostatus['repo'],
+							to_path = repostatus['path'],
+							env     = env,
+							branch  = repostatus[gitref_type],
+							**clone_options
+						))
 				else:
-					repo = Repo.clone_from(
-						url     = repostatus['repo'],
-						to_path = repostatus['path'],
-					)
+					if repostatus['gitref_type'] == 'commit' and 'depth' in clone_options:
+						# no need to check out the default branch: the requested commit alone will be fetched below
+						clone_options['no_checkout'] = True
+					with self.__phase(repostatus, 'clone', git_dir=git_dir):
+						repo = self.__remote_operation(repostatus, lambda env: Repo.clone_from(
+							url     = repostatus['repo'],
+							to_path = repostatus['path'],
+							env     = env,
+							**clone_options
+						))
 					if repostatus['gitref_type'] == 'commit':
-						repo.git.checkout(repostatus['commit'])
+						if 'depth' in clone_options:
+							with self.__phase(repostatus, 'fetch', git_dir=git_dir):
+								self.__remote_operation(
+									repostatus,
+									lambda env: self.__fetch_commit(repo, repostatus['commit'], clone_options['depth']),
+									repo
+								)
+						with self.__phase(repostatus, 'checkout'):
+							repo.git.checkout(repostatus['commit'])
 						
-				repostatus['status'] = 'CLONED'
+				repostatus['status'] = Repostatus.CLONED
 			except git_exception.GitCommandError as e:
 				if e.status == 128:
-					repostatus['status'] = 'ERROR'
+					repostatus['status'] = Repostatus.ERROR
 					repostatus['extra_info'] = e.stderr.replace('stderr: ','').strip('\n').strip()
 				else:
 					raise
-		elif repostatus['status'] == 'PENDING_UPDATE':
-			repo = Repo(repostatus['path'])
-			repo.git.fetch(prune=True)
-			
+		elif (
+			repostatus['status'] == Repostatus.PENDING_UPDATE
+			and self.trust_mtimes
+			and self.__dirty(refs, repostatus, trust_mtimes=False)
+		):
+			# edits in place go unnoticed by modification times: dirty repos must never be touched, so git is asked for sure
+			repostatus['status'] = Repostatus.DIRTY
+			repostatus.pop('from', None)
+			repostatus.pop('to', None)
+		elif repostatus['status'] == Repostatus.PENDING_UPDATE:
+			repo = refs.repo
 			if (
 				'gitref_type' in repostatus
 				and repostatus['gitref_type'] is not None
@@ -217,23 +683,26 @@ class Gitrepo(object):
 				else:
 					remote_ref = str(repostatus[gitref_type])
 			else:
-				desired_gitref = repo.git.symbolic_ref('refs/remotes/origin/HEAD').replace('refs/remotes/origin/','')
+				desired_gitref = refs.symref('refs/remotes/origin/HEAD').replace('refs/remotes/origin/','')
 				
 			try:
-				repo.git.checkout(desired_gitref)
+				with self.__phase(repostatus, 'checkout'):
+					repo.git.checkout(desired_gitref)
 			except git_exception.GitCommandError as e:
-				repostatus['status'] = 'ERROR'
+				repostatus['status'] = Repostatus.ERROR
 				repostatus['extra_info'] = str(e)
 				
-			if not repo.head.is_detached:
+			if refs.symref('HEAD') is not None:
+				# remote-tracking refs are already fetched: fast-forward locally instead of pulling
 				try:
-					repo.git.pull()
+					with self.__phase(repostatus, 'merge'):
+						repo.git.merge('--ff-only', '@{upstream}')
 				except git_exception.GitCommandError as e:
-					repostatus['status'] = 'ERROR'
+					repostatus['status'] = Repostatus.ERROR
 					repostatus['extra_info'] = e.stderr.replace('stderr: ','').strip('\n').strip()
 				
-			if repostatus['status'] != 'ERROR':
-				repostatus['status'] = 'UPDATED'
+			if repostatus['status'] != Repostatus.ERROR:
+				repostatus['status'] = Repostatus.UPDATED
 			
 		return repostatus
 	
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+
+class Gitstatus(object):
+	'''
+	A git sandbox's local status, as reported by a single `git status --porcelain=v2` invocation.
+
+	HEAD and the current branch are read by :class:`Refreader` instead, with no subprocess.
+
+	:ivar bool dirty: `True` if there are changes either in the index or the working tree (untracked files are ignored).
+	'''
+
+	def __init__(self, porcelain_output):
+		'''
+		Parses the output of `git status --porcelain=v2`.
+
+		:param str porcelain_output: the command's output.
+		'''
+
+		self.dirty = False
+
+		for line in porcelain_output.splitlines():
+			if line[:2] in ('1 ', '2 ', 'u '):
+				# ordinary, renamed/copied or unmerged entries
+				self.dirty = True
+				break
+
+
+	@classmethod
+	def read(cls, repo):
+		'''
+		Runs `git status` on a repo and parses its output.
+
+		:param repo: the :class:`git.Repo` object to check.
+		:return Gitstatus: the repo's local status.
+		'''
+
+		return cls(
+			repo.git.status('--porcelain=v2', '--untracked-files=no')
+		)
@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+
+# Import stuff
+import os, re, shlex, shutil, subprocess, tempfile, threading
+from contextlib import contextmanager, nullcontext
+from git import exc as git_exception
+
+
+def remote_host(url):
+	'''
+	Finds the host a remote URL connects to.
+
+	:param str url: the remote's URL.
+	:return str: the (lowercased) host name, or *None* for local remotes (plain paths and *file://* URLs).
+	'''
+
+	url = url.strip()
+	if '://' in url:
+		scheme, location = url.split('://', 1)
+		if scheme.lower() == 'file':
+			return None
+		netloc = location.split('/', 1)[0]
+		host = netloc.rsplit('@', 1)[-1]
+		if host.startswith('['):
+			# IPv6 address, maybe with a port
+			host = host[1:].split(']', 1)[0]
+		else:
+			host = host.split(':', 1)[0]
+		return host.lower() or None
+	elif re.match(r'^[^/]+:', url):
+		# scp-like syntax: [user@]host:path
+		return url.split(':', 1)[0].rsplit('@', 1)[-1].strip('[]').lower()
+
+	return None
+
+
+def is_ssh_url(url):
+	'''
+	:param str url: a remote's URL.
+	:return bool: `True` if git reaches the remote through ssh.
+	'''
+
+	url = url.strip()
+	if '://' in url:
+		return url.split('://', 1)[0].lower() in ('ssh', 'git+ssh', 'ssh+git')
+	return remote_host(url) is not None
+
+
+class Hostpool(object):
+	'''
+	Connections to remote hosts: caps how many git network operations (probes, fetches and clones) run at once against the same
+	host, and makes every ssh remote of a host share a single multiplexed connection.
+
+	ssh connections go through ssh masters (see *ControlMaster* at `ssh_config(5)`) whose sockets multigit keeps at a private
+	temporary directory; masters exit after a minute idle, and :meth:`close` (or leaving the `with` block) stops them all
+	and removes the directory.  Multiplexing builds on `$GIT_SSH_COMMAND`, if set, and it's disabled when `$GIT_SSH` is, or
+	when `core.sshCommand` is configured (globally or by the repo) and `$GIT_SSH_COMMAND` isn't, as it would override it.
+	HTTP(S) remotes are only capped: git already keeps their connections alive within each command.
+
+	It is safe to share a host pool among threads.
+	'''
+
+	def __init__(self, max_connections=4, ssh_multiplexing=True):
+		'''
+		:param int max_connections: 4. Maximum number of concurrent network operations per host (*None* for no limit).
+		:param bool ssh_multiplexing: `True`, ssh remotes share a master connection per host; `False`, each git command connects on its own.
+		'''
+
+		self.max_connections = max_connections
+		self.ssh_multiplexing = ssh_multiplexing and 'GIT_SSH' not in os.environ
+		self.__lock = threading.Lock()
+		self.__semaphores = {}
+		self.__control_dir = None
+		self.__configured_ssh = None
+
+
+	def __enter__(self):
+		return self
+
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
+
+
+	@contextmanager
+	def connection(self, url, repo=None):
+		'''
+		Holds one of a host's connection slots while a network operation runs.
+
+		:param str url: the remote's URL.
+		:param repo: *None*; otherwise, a :class:`git.Repo` object whose git commands get the connection's environment meanwhile.
+		:return: a context manager yielding the environment variables git commands must be run with (i.e. as `Repo.clone_from(env=...)`).
+		'''
+
+		host = remote_host(url)
+		env = {}
+		if (
+			host is not None
+			and self.ssh_multiplexing
+			and is_ssh_url(url)
+			and not self.__ssh_configured(repo)
+		):
+			env['GIT_SSH_COMMAND'] = self.__ssh_command()
+
+		with self.__semaphore(host) or nullcontext():
+			if repo is None or not env:
+				yield env
+			else:
+				with repo.git.custom_environment(**env):
+					yield env
+
+
+	def close(self):
+		'''Stops the ssh masters started so far and removes their sockets.'''
+
+		with self.__lock:
+			control_dir = self.__control_dir
+			self.__control_dir = None
+		if control_dir is None:
+			return
+
+		ssh = shlex.split(os.environ.get('GIT_SSH_COMMAND', 'ssh'))
+		for socket in os.listdir(control_dir):
+			# with a literal control path, the host name is just a placeholder
+			try:
+				subprocess.run(
+					ssh + ['-o', 'ControlPath=' + os.path.join(control_dir, socket), '-O', 'exit', 'multigit'],
+					stdin=subprocess.DEVNULL,
+					stdout=subprocess.DEVNULL,
+					stderr=subprocess.DEVNULL,
+					timeout=10,
+				)
+			except (OSError, subprocess.TimeoutExpired) as e:
+				pass
+		shutil.rmtree(control_dir, ignore_errors=True)
+
+
+	def __semaphore(self, host):
+		'''
+		:param str host: a host name (*None* for local remotes).
+		:return threading.BoundedSemaphore: the host's connection slots, or *None* if there's no limit.
+		'''
+
+		if host is None or self.max_connections is None:
+			return None
+
+		with self.__lock:
+			return self.__semaphores.setdefault(host, threading.BoundedSemaphore(self.max_connections))
+
+
+	def __ssh_configured(self, repo=None):
+		'''
+		Finds if git is configured to connect through its own ssh command (`core.sshCommand`), which exporting
+		`$GIT_SSH_COMMAND` would override.
+
+		:param repo: *None*, only global configuration is looked at; otherwise, the :class:`git.Repo` object whose configuration is.
+		:return bool: `True` if multiplexing must be left out.
+		'''
+
+		if 'GIT_SSH_COMMAND' in os.environ:
+			# it already overrides core.sshCommand: multiplexing builds on it
+			return False
+
+		if repo is not None:
+			try:
+				return bool(repo.git.config('--get', 'core.sshCommand'))
+			except git_exception.GitCommandError as e:
+				# not set
+				return False
+
+		with self.__lock:
+			if self.__configured_ssh is None:
+				try:
+					self.__configured_ssh = bool(subprocess.run(
+						['git', 'config', '--get', 'core.sshCommand'],
+						stdin=subprocess.DEVNULL,
+						capture_output=True,
+						text=True,
+					).stdout.strip())
+				except OSError as e:
+					self.__configured_ssh = False
+			return self.__configured_ssh
+
+
+	def __ssh_command(self):
+		'''
+		:return str: the ssh command multiplexing connections through this pool's masters.
+		'''
+
+		with self.__lock:
+			if self.__control_dir is None:
+				# unix sockets' paths are short-lived and short-limited: keep them at the system's temporary directory
+				self.__control_dir = tempfile.mkdtemp(prefix='multigit-ssh-')
+			control_dir = self.__control_dir
+
+		# options set by $GIT_SSH_COMMAND itself come first, so they take precedence
+		return ' '.join([
+			os.environ.get('GIT_SSH_COMMAND', 'ssh'),
+			'-o ControlMaster=auto',
+			'-o ' + shlex.quote('ControlPath=' + os.path.join(control_dir, '%C')),
+			'-o ControlPersist=60',
+		])
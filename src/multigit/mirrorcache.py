@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+
+# Import stuff
+import hashlib, os, re, shutil, tempfile, threading
+from contextlib import nullcontext
+from git import Repo, exc as git_exception
+
+# "local" imports
+from .statecache import create_state_dir
+
+MIRROR_REFSPECS = ('+refs/heads/*:refs/heads/*', '+refs/tags/*:refs/tags/*')
+'''
+The refs mirrors fetch: branches and tags only, as a regular clone does (never i.e. GitHub's `refs/pull/*`).
+'''  # pylint: disable=W0105
+
+
+def normalize_url(url):
+	'''
+	Normalizes a remote URL, so different spellings of the same remote share a mirror.
+
+	Trailing slashes and a *.git* suffix are dropped, scheme and host are lowercased and local paths are made absolute.
+
+	:param str url: the remote's URL.
+	:return str: the normalized URL.
+	'''
+
+	url = url.strip().rstrip('/')
+	if url.endswith('.git'):
+		url = url[:-len('.git')]
+
+	if '://' in url:
+		scheme, location = url.split('://', 1)
+		host, separator, path = location.partition('/')
+		url = f"{scheme.lower()}://{host.lower()}{separator}{path}"
+	elif re.match(r'^[^/]+:', url):
+		# scp-like syntax: [user@]host:path
+		host, path = url.split(':', 1)
+		url = f"{host.lower()}:{path}"
+	else:
+		url = os.path.realpath(url)
+
+	return url
+
+
+class Mirrorcache(object):
+	'''
+	Bare mirrors of remotes, kept at `.multigit/mirrors/` under the workspace's root and keyed by normalized remote URL.
+
+	Repos are cloned with `--reference` to the mirror of their remote, so each remote's objects are downloaded and stored
+	once, no matter how many subrepos point to it.  As those clones borrow objects from the mirrors, mirrors are never
+	garbage-collected automatically; `git repack -a -d` and removing `.git/objects/info/alternates` makes a clone standalone again.
+
+	Each mirror is created or refreshed at most once per run.  New mirrors can be seeded from a :class:`Bundlearchive`,
+	so only what's newer than the bundle is fetched from the remote.  It is safe to share a mirror cache among threads.
+	'''
+
+	def __init__(self, workspace_path, hosts=None, retry=None, bundles=None):
+		'''
+		:param str workspace_path: absolute path to the workspace's root.
+		:param Hostpool hosts: *None*; otherwise, mirrors hold one of their host's connection slots while they are fetched or cloned.
+		:param Retrypolicy retry: *None*; otherwise, mirror fetches and clones failing for transient reasons are retried as per this policy.
+		:param Bundlearchive bundles: *None*; otherwise, the archive new mirrors are seeded from (when it has a bundle of their remote).
+		'''
+
+		self.workspace_path = workspace_path
+		self.hosts = hosts
+		self.retry = retry
+		self.bundles = bundles
+		self.__lock = threading.Lock()
+		self.__url_locks = {}
+		self.__mirrors = {}
+
+
+	def mirror(self, url):
+		'''
+		Gets the up to date mirror of a remote, creating it if needed.
+
+		:param str url: the remote's URL.
+		:return str: absolute path to the (bare) mirror.
+		:raises git.exc.GitCommandError: if the remote can't be mirrored (every repo using the same remote gets the same error).
+		'''
+
+		normalized_url = normalize_url(url)
+		with self.__lock:
+			url_lock = self.__url_locks.setdefault(normalized_url, threading.Lock())
+
+		with url_lock:
+			if normalized_url not in self.__mirrors:
+				try:
+					self.__mirrors[normalized_url] = self.__refresh(url, normalized_url)
+				except Exception as e:
+					self.__mirrors[normalized_url] = e
+
+		if isinstance(self.__mirrors[normalized_url], Exception):
+			raise self.__mirrors[normalized_url]
+		return self.__mirrors[normalized_url]
+
+
+	def __refresh(self, url, normalized_url):
+		'''
+		Fetches a remote's mirror, or creates it if it doesn't exist yet.
+
+		:param str url: the remote's URL.
+		:param str normalized_url: the remote's normalized URL.
+		:return str: absolute path to the mirror.
+		'''
+
+		mirrors_dir = os.path.join(create_state_dir(self.workspace_path), 'mirrors')
+		# a readable name, made unique by the URL's hash
+		name = os.path.basename(normalized_url.rstrip(':')) or 'mirror'
+		name += '-' + hashlib.sha1(normalized_url.encode('utf-8')).hexdigest()[:12]
+		mirror_path = os.path.join(mirrors_dir, name)
+
+		if os.path.isdir(mirror_path):
+			mirror = Repo(mirror_path)
+			self.__set_refspecs(mirror)
+			self.__remote_operation(url, lambda env: mirror.git.fetch('--prune', 'origin'), mirror)
+			return mirror_path
+
+		# cloned aside, so an interrupted run can't leave a half-made mirror behind
+		os.makedirs(mirrors_dir, exist_ok=True)
+		tmp_path = tempfile.mkdtemp(dir=mirrors_dir, prefix=name + '.')
+		try:
+			bundle_file = self.bundles.extract(url, tmp_path) if self.bundles is not None else None
+			if bundle_file is None:
+				mirror = self.__remote_operation(
+					url,
+					lambda env: Repo.clone_from(url, os.path.join(tmp_path, 'mirror'), env=env, bare=True)
+				)
+				self.__set_refspecs(mirror)
+			else:
+				# seeded from the bundle (whose branches are remote-tracking ones): only what's newer is fetched from the remote
+				mirror = Repo.init(os.path.join(tmp_path, 'mirror'), bare=True)
+				mirror.git.fetch(bundle_file, '+refs/remotes/origin/*:refs/heads/*', '+refs/tags/*:refs/tags/*')
+				mirror.create_remote('origin', url)
+				self.__set_refspecs(mirror)
+				self.__remote_operation(url, lambda env: mirror.git.fetch('--prune', 'origin'), mirror)
+			# objects borrowed by clones must never be pruned
+			mirror.git.config('gc.auto', '0')
+			os.rename(os.path.join(tmp_path, 'mirror'), mirror_path)
+		finally:
+			shutil.rmtree(tmp_path, ignore_errors=True)
+
+		return mirror_path
+
+
+	@staticmethod
+	def __set_refspecs(mirror):
+		'''
+		Makes a mirror fetch just its remote's branches and tags, straight into its own refs (see :data:`MIRROR_REFSPECS`).
+
+		:param mirror: the mirror's :class:`git.Repo` object.
+		'''
+
+		mirror.git.config('--replace-all', 'remote.origin.fetch', MIRROR_REFSPECS[0])
+		for refspec in MIRROR_REFSPECS[1:]:
+			mirror.git.config('--add', 'remote.origin.fetch', refspec)
+		try:
+			# (left by mirrors made with `git clone --mirror`)
+			mirror.git.config('--unset', 'remote.origin.mirror')
+		except git_exception.GitCommandError as e:
+			pass
+
+
+	def __remote_operation(self, url, operation, repo=None):
+		'''
+		Runs a network operation holding a connection to the remote's host, and retrying it if it fails for transient reasons.
+
+		:param str url: the remote's URL.
+		:param operation: a callable running the operation, given the environment its git commands must be run with.
+		:param repo: *None*; otherwise, the mirror's :class:`git.Repo` object.
+		:return: whatever the operation returns.
+		'''
+
+		def attempt():
+			with self.hosts.connection(url, repo) if self.hosts is not None else nullcontext({}) as env:
+				return operation(env)
+
+		if self.retry is None:
+			return attempt()
+		return self.retry.run(attempt)
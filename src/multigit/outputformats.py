@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+
+# Import stuff
+# NOTE: colorama is only imported by the colored formats, once instantiated, so the command line can list FORMATS at startup
+import json
+
+# "local" imports
+from .subrepoentry import Repostatus
+
+RECORD_KEYS = ('path', 'repo', 'gitref_type', 'branch', 'tag', 'commit', 'status', 'from', 'to', 'extra_info')
+'''
+The repostatus keys reported by machine-readable output formats.
+'''  # pylint: disable=W0105
+
+STATUS_STYLES = {
+	Repostatus.ERROR: ('RED', "ERROR"),
+	Repostatus.WRONG_REMOTE: ('YELLOW', "REPO POINTS TO A WRONG REMOTE"),
+	Repostatus.NOT_CLONED: ('YELLOW', "NOT YET CLONED"),
+	Repostatus.CLONED: ('GREEN', "CLONED"),
+	Repostatus.EMPTY: ('YELLOW', "REMOTE REPO NOT YET INITIALIZED"),
+	Repostatus.UP_TO_DATE: ('GREEN', "UP TO DATE"),
+	Repostatus.PENDING_UPDATE: ('YELLOW', "PENDING UPDATES"),
+	Repostatus.UPDATED: ('GREEN', "UPDATED"),
+	Repostatus.DIRTY: ('YELLOW', "DIRTY"),
+}
+'''
+Color (a `colorama.Fore` name) and description of each status, as reported by human-readable output formats.
+'''  # pylint: disable=W0105
+
+# the statuses 'quiet' output reports
+PROBLEMS = (Repostatus.ERROR, Repostatus.WRONG_REMOTE)
+
+
+class Outputformat(object):
+	'''
+	An output format, as used by :class:`Renderer`: the text written before, for and after the subrepos' reports.
+
+	Formats are instantiated once per renderer, and only ever called from its writer thread, so they can keep state.
+	'''
+
+	def header(self):
+		'''
+		:return str: what's written before any report.
+		'''
+
+		return ''
+
+
+	def format(self, subrepo):
+		'''
+		:param dict subrepo: the subrepo to report on.
+		:return str: its report (empty if it's not reported).
+		'''
+
+		raise NotImplementedError()
+
+
+	def footer(self):
+		'''
+		:return str: what's written after every report.
+		'''
+
+		return ''
+
+
+class Coloredformat(Outputformat):
+	'''
+	Base of human-readable output formats, colored with colorama.
+
+	:ivar dict styles: the ANSI color code and description of each status (see :data:`STATUS_STYLES`).
+	'''
+
+	def __init__(self):
+		from colorama import Fore, Style
+
+		self.bright = Style.BRIGHT
+		self.reset = Style.RESET_ALL
+		self.styles = {
+			status: (getattr(Fore, color), description)
+			for status, (color, description) in STATUS_STYLES.items()
+		}
+
+
+class Textformat(Coloredformat):
+	'''*'text'*: colored and human-readable, several lines per subrepo.'''
+
+	def format(self, subrepo):
+		bright, reset = self.bright, self.reset
+
+		# Header
+		lines = [bright + "'" + subrepo['path'] + "':" + reset]
+		lines.append("\trepository: " + bright + "'" + subrepo['repo'] + "'" + reset)
+		if subrepo.get('gitref_type'):
+			gitref_type = subrepo['gitref_type']
+			lines.append("\trequested " + gitref_type + ": " + bright + "'" + subrepo[gitref_type] + "'" + reset)
+		else:
+			lines.append("\tno gitref requested (working on default repo branch)")
+
+		# Details depending on refered status
+		status = subrepo['status']
+		if status == Repostatus.UPDATED:
+			lines.append(
+				"\tupdated from " + bright + "'" + subrepo['from'] + "'" + reset
+				+ " -> " + bright + "'" + subrepo['to'] + "'" + reset
+			)
+		elif status in self.styles:
+			color, description = self.styles[status]
+			lines.append("\tstatus: " + bright + color + description + reset)
+		else:
+			lines.append("\tstatus: " + bright + str(status) + reset)
+
+		if status == Repostatus.DIRTY:
+			lines[-1] += " (won't try to update)"
+		elif status == Repostatus.PENDING_UPDATE:
+			lines.append(
+				"\tpending updates: " + bright + "'" + subrepo['from'] + "'" + reset
+				+ " -> " + bright + "'" + subrepo['to'] + "'" + reset
+			)
+		elif status in PROBLEMS and 'extra_info' in subrepo:
+			lines.append("\textra info: " + bright + subrepo['extra_info'].replace('\n', '\n\t\t') + reset)
+
+		return '\n'.join(lines) + '\n'
+
+
+class Compactformat(Coloredformat):
+	'''*'compact'*: colored, one line per subrepo.'''
+
+	def format(self, subrepo):
+		status = subrepo['status']
+		color = self.styles[status][0] if status in self.styles else ''
+		line = self.bright + color + f"{str(status):<14}" + self.reset + " " + subrepo['path']
+		if status in (Repostatus.PENDING_UPDATE, Repostatus.UPDATED):
+			line += ": '" + subrepo['from'] + "' -> '" + subrepo['to'] + "'"
+		elif 'extra_info' in subrepo:
+			line += ": " + " ".join(subrepo['extra_info'].split())
+
+		return line + '\n'
+
+
+class Quietformat(Compactformat):
+	'''*'quiet'*: one line per subrepo with problems (an error or a wrong remote), nothing else.'''
+
+	def format(self, subrepo):
+		if subrepo['status'] in PROBLEMS:
+			return super().format(subrepo)
+		return ''
+
+
+class Ndjsonformat(Outputformat):
+	'''*'ndjson'*: one JSON object per line.'''
+
+	def format(self, subrepo):
+		return self.record(subrepo) + '\n'
+
+
+	@staticmethod
+	def record(subrepo):
+		'''
+		:param dict subrepo: the subrepo to report on.
+		:return str: its JSON record, with its :data:`RECORD_KEYS`.
+		'''
+
+		return json.dumps({
+			key: subrepo[key]
+			for key in RECORD_KEYS
+			if key in subrepo
+		})
+
+
+class Jsonformat(Ndjsonformat):
+	'''*'json'*: a JSON array, one item per subrepo.'''
+
+	def __init__(self):
+		self.__records = 0
+
+
+	def header(self):
+		return '['
+
+
+	def format(self, subrepo):
+		self.__records += 1
+		return ('\n' if self.__records == 1 else ',\n') + self.record(subrepo)
+
+
+	def footer(self):
+		return '\n]\n'
+
+
+FORMATS = {
+	'text': Textformat,
+	'compact': Compactformat,
+	'json': Jsonformat,
+	'ndjson': Ndjsonformat,
+	'quiet': Quietformat,
+}
+'''
+The output formats a :class:`Renderer` supports: their names, mapped to their :class:`Outputformat` classes.
+'''  # pylint: disable=W0105
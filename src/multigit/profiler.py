@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+
+# Import stuff
+import json, os, threading, time
+from contextlib import contextmanager
+
+
+class Profiler(object):
+	'''
+	Records where a run spends its time: wall time per phase (i.e. *'fetch'*, *'clone'*) per subrepo, the git subprocesses
+	each subrepo runs and the bytes its fetches and clones add to its object store.
+
+	git subprocesses are only counted while the profiler is active (within a `with` block), and they are attributed to
+	the phase running in the same thread.  It is safe to share a profiler among threads.
+	'''
+
+	def __init__(self):
+		self.__lock = threading.Lock()
+		self.__local = threading.local()
+		self.__origin = time.perf_counter()
+		self.__execute = None
+		self.phases = []
+		'''Recorded phases, as (path, phase, start, duration, thread id) tuples (in seconds since the profiler was created).'''  # pylint: disable=W0105
+		self.commands = []
+		'''Recorded git subprocesses, as (path, command, start, duration, thread id) tuples.'''  # pylint: disable=W0105
+		self.counters = {}
+		'''Counters ('subprocesses', 'bytes_fetched') by path.'''  # pylint: disable=W0105
+
+
+	def __enter__(self):
+		'''Starts counting git subprocesses.'''
+
+		from git.cmd import Git
+
+		profiler = self
+		execute = Git.execute
+
+		def profiled_execute(git, command, *args, **kwargs):
+			start = time.perf_counter()
+			try:
+				return execute(git, command, *args, **kwargs)
+			finally:
+				profiler.__record_command(command, start)
+
+		self.__execute = execute
+		Git.execute = profiled_execute
+		return self
+
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		'''Stops counting git subprocesses.'''
+
+		from git.cmd import Git
+
+		Git.execute = self.__execute
+		self.__execute = None
+
+
+	@contextmanager
+	def phase(self, path, name, git_dir=None):
+		'''
+		Times a phase of a subrepo's processing.
+
+		:param str path: absolute path of the subrepo (or subrepos file) the phase works on.
+		:param str name: the phase's name.
+		:param str git_dir: *None*; otherwise, the git directory whose object store growth is counted as bytes fetched.
+		'''
+
+		previous_path = getattr(self.__local, 'path', None)
+		self.__local.path = path
+		size = self.__objects_size(git_dir) if git_dir else 0
+		start = time.perf_counter()
+		try:
+			yield
+		finally:
+			duration = time.perf_counter() - start
+			self.__local.path = previous_path
+			with self.__lock:
+				self.phases.append((path, name, start - self.__origin, duration, threading.get_ident()))
+			if git_dir:
+				self.count(path, 'bytes_fetched', max(0, self.__objects_size(git_dir) - size))
+
+
+	def count(self, path, name, amount=1):
+		'''
+		Adds to a subrepo's counter.
+
+		:param str path: absolute path of the subrepo.
+		:param str name: the counter's name.
+		:param int amount: 1. What to add.
+		'''
+
+		with self.__lock:
+			counters = self.counters.setdefault(path, {'subprocesses': 0, 'bytes_fetched': 0})
+			counters[name] = counters.get(name, 0) + amount
+
+
+	def summary(self, top=10):
+		'''
+		Summarizes the recorded phases.
+
+		:param int top: 10. Maximum number of subrepos to report.
+		:return dict: *'subrepos'*, the slowest subrepos as dictionaries with their *'path'*, total *'seconds'*, *'phases'*
+			(seconds by phase name) and counters; and *'phases'*, every phase as dictionaries with its *'name'*, total *'seconds'*
+			and *'count'*; both sorted slowest first.
+		'''
+
+		subrepos = {}
+		phases = {}
+		with self.__lock:
+			for path, name, start, duration, thread in self.phases:
+				subrepo = subrepos.setdefault(path, {'path': path, 'seconds': 0.0, 'phases': {}})
+				subrepo['seconds'] += duration
+				subrepo['phases'][name] = subrepo['phases'].get(name, 0.0) + duration
+				phase = phases.setdefault(name, {'name': name, 'seconds': 0.0, 'count': 0})
+				phase['seconds'] += duration
+				phase['count'] += 1
+			for path, counters in self.counters.items():
+				if path in subrepos:
+					subrepos[path].update(counters)
+
+		for subrepo in subrepos.values():
+			subrepo.setdefault('subprocesses', 0)
+			subrepo.setdefault('bytes_fetched', 0)
+
+		return {
+			'subrepos': sorted(subrepos.values(), key=lambda subrepo: subrepo['seconds'], reverse=True)[:top],
+			'phases': sorted(phases.values(), key=lambda phase: phase['seconds'], reverse=True),
+		}
+
+
+	def write_trace(self, trace_file):
+		'''
+		Writes the recorded phases and git subprocesses as a Chrome trace-event file (see `chrome://tracing` or https://ui.perfetto.dev).
+
+		:param str trace_file: path to the file to write.
+		'''
+
+		events = []
+		pid = os.getpid()
+		with self.__lock:
+			for category, records in (('phase', self.phases), ('git', self.commands)):
+				for path, name, start, duration, thread in records:
+					events.append({
+						'name': name,
+						'cat': category,
+						'ph': 'X',
+						'ts': round(start * 1e6),
+						'dur': round(duration * 1e6),
+						'pid': pid,
+						'tid': thread,
+						'args': {'path': path},
+					})
+
+		with open(trace_file, 'w') as f_trace:
+			json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f_trace)
+
+
+	def __record_command(self, command, start):
+		duration = time.perf_counter() - start
+		path = getattr(self.__local, 'path', None)
+		if isinstance(command, (list, tuple)):
+			name = ' '.join(str(arg) for arg in command[:2])
+		else:
+			name = str(command)
+		with self.__lock:
+			self.commands.append((path, name, start - self.__origin, duration, threading.get_ident()))
+		if path is not None:
+			self.count(path, 'subprocesses')
+
+
+	@staticmethod
+	def __objects_size(git_dir):
+		'''
+		:param str git_dir: a git directory.
+		:return int: the size in bytes of its object store (0 if there's none).
+		'''
+
+		size = 0
+		for root, dirs, files in os.walk(os.path.join(git_dir, 'objects')):
+			for filename in files:
+				try:
+					size += os.path.getsize(os.path.join(root, filename))
+				except OSError as e:
+					pass
+
+		return size
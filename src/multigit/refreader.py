@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+# Import stuff
+import mmap, os, re, threading
+from git import exc as git_exception
+
+# A full (SHA-1 or SHA-256) object name
+FULL_HEXSHA = re.compile(r'^[0-9a-f]{40}([0-9a-f]{24})?$')
+
+
+class Refreader(object):
+	'''
+	Resolves a repo's refs straight from its files: HEAD, loose refs and (memory-mapped) packed-refs.
+
+	The packed-refs index is built once and only rebuilt if the file changes.  git itself is only run for ambiguous cases,
+	such as abbreviated commits, loose annotated tags or repos using a refs backend other than files.
+	'''
+
+	def __init__(self, repo):
+		'''
+		:param repo: the :class:`git.Repo` object whose refs will be read (it's also used to fall back to git).
+		'''
+
+		self.repo = repo
+		self.git_dir = repo.git_dir
+		try:
+			with open(os.path.join(self.git_dir, 'commondir'), 'r') as f_commondir:
+				self.common_dir = os.path.normpath(
+					os.path.join(self.git_dir, f_commondir.read().strip())
+				)
+		except FileNotFoundError as e:
+			self.common_dir = self.git_dir
+		# reftable and the like: let git do the job
+		self.files_backend = not os.path.exists(os.path.join(self.common_dir, 'reftable'))
+
+		self.__lock = threading.Lock()
+		self.__packed_stat = None
+		self.__packed_refs = {}
+		self.__packed_peeled = {}
+		self.__fully_peeled = False
+
+
+	def symref(self, refname):
+		'''
+		Finds the ref a symbolic ref points to.
+
+		:param str refname: the full name of the symbolic ref (i.e. *'HEAD'* or *'refs/remotes/origin/HEAD'*).
+		:return str: the full name of the ref it points to (i.e. *'refs/heads/main'*), or *None* if it's not a symbolic ref.
+		'''
+
+		if not self.files_backend:
+			try:
+				return self.repo.git.symbolic_ref('-q', refname)
+			except git_exception.GitCommandError as e:
+				return None
+
+		value = self.__read(refname)
+		if value is not None and value.startswith('ref: '):
+			return value[len('ref: '):]
+		return None
+
+
+	def resolve(self, refname):
+		'''
+		Finds the object a ref points to, following symbolic refs.
+
+		:param str refname: the full name of the ref.
+		:return str: the object's hexsha, or *None* if the ref doesn't exist (i.e. a branch yet to be born).
+		'''
+
+		if not self.files_backend:
+			return self.__rev_parse(refname)
+
+		for depth in range(5):
+			value = self.__read(refname)
+			if value is None or not value.startswith('ref: '):
+				return value
+			refname = value[len('ref: '):]
+
+		return None
+
+
+	def commit(self, gitref):
+		'''
+		Finds the commit a full ref name or a commit name points to.
+
+		:param str gitref: either a full ref name (i.e. *'refs/tags/v1.0'*) or a commit (full or abbreviated).
+		:return str: the commit's hexsha (annotated tags are peeled), or *None* if it can't be found.
+		'''
+
+		if not gitref.startswith('refs/'):
+			# A commit: only full ones found as loose objects can be trusted without asking git
+			if FULL_HEXSHA.match(gitref) and self.__loose_object_exists(gitref):
+				return gitref
+			return self.__rev_parse(gitref + '^{commit}')
+
+		hexsha = self.resolve(gitref)
+		if hexsha is None or not gitref.startswith('refs/tags/'):
+			return hexsha
+
+		# Tags may be annotated: only packed-refs knows if they are peeled
+		with self.__lock:
+			self.__load_packed_refs()
+			if gitref in self.__packed_peeled:
+				return self.__packed_peeled[gitref]
+			if self.__fully_peeled and self.__packed_refs.get(gitref) == hexsha:
+				return hexsha
+		return self.__rev_parse(gitref + '^{commit}')
+
+
+	def __read(self, refname):
+		'''
+		Reads a ref's raw value, either from its loose file or from packed-refs.
+
+		:param str refname: the full name of the ref.
+		:return str: the ref's value (a hexsha or 'ref: <refname>'), or *None* if it doesn't exist.
+		'''
+
+		# pseudo-refs like HEAD are per worktree; refs/ are shared
+		base_dir = self.common_dir if refname.startswith('refs/') else self.git_dir
+		try:
+			with open(os.path.join(base_dir, refname), 'r') as f_ref:
+				return f_ref.read().strip()
+		except (FileNotFoundError, IsADirectoryError, NotADirectoryError) as e:
+			pass
+
+		with self.__lock:
+			self.__load_packed_refs()
+			return self.__packed_refs.get(refname)
+
+
+	def __load_packed_refs(self):
+		'''Builds (or rebuilds, if it changed) the packed-refs index.  Must be called with the lock held.'''
+
+		packed_refs_file = os.path.join(self.common_dir, 'packed-refs')
+		try:
+			stat = os.stat(packed_refs_file)
+			packed_stat = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+		except FileNotFoundError as e:
+			packed_stat = None
+		if packed_stat == self.__packed_stat:
+			return
+
+		self.__packed_stat = packed_stat
+		self.__packed_refs = {}
+		self.__packed_peeled = {}
+		self.__fully_peeled = False
+		if not packed_stat or not packed_stat[1]:
+			return
+
+		with open(packed_refs_file, 'rb') as f_packed_refs:
+			with mmap.mmap(f_packed_refs.fileno(), 0, access=mmap.ACCESS_READ) as packed_refs:
+				refname = None
+				for line in iter(packed_refs.readline, b''):
+					line = line.decode('utf-8').rstrip('\n')
+					if line.startswith('#'):
+						self.__fully_peeled = 'fully-peeled' in line.split()
+					elif line.startswith('^'):
+						self.__packed_peeled[refname] = line[1:]
+					elif line:
+						hexsha, refname = line.split(' ', 1)
+						self.__packed_refs[refname] = hexsha
+
+
+	def __loose_object_exists(self, hexsha):
+		return os.path.isfile(
+			os.path.join(self.common_dir, 'objects', hexsha[:2], hexsha[2:])
+		)
+
+
+	def __rev_parse(self, rev):
+		try:
+			return self.repo.git.rev_parse('--verify', '-q', rev)
+		except git_exception.GitCommandError as e:
+			return None
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+# Import stuff
+import threading
+from contextlib import nullcontext
+
+
+class Remoteprobe(object):
+	'''
+	Probes remotes with `git ls-remote` to find their refs' commits without fetching any object.
+
+	Only the refs repos ask for are requested (the remote's HEAD, for repos on its default branch), so probing remotes with
+	many branches and tags stays cheap.  Refs announced with :meth:`want` are batched: the first probe of a remote URL asks
+	for every ref wanted from it so far in a single `git ls-remote`, and the answer is shared by every repo asking for any
+	of them.  It is safe to share a probe among threads.
+	'''
+
+	def __init__(self, hosts=None, retry=None):
+		'''
+		:param Hostpool hosts: *None*; otherwise, probes hold one of their host's connection slots.
+		:param Retrypolicy retry: *None*; otherwise, probes failing for transient reasons are retried as per this policy.
+		'''
+
+		self.hosts = hosts
+		self.retry = retry
+		self.__lock = threading.Lock()
+		self.__url_locks = {}
+		self.__wanted = {}
+		self.__remotes = {}
+
+
+	def want(self, url, refname):
+		'''
+		Announces a ref that will be probed, so it's asked for along the next probe of its remote.
+
+		:param str url: the remote's URL.
+		:param str refname: the ref to probe, as for :meth:`refs`.
+		'''
+
+		with self.__lock:
+			remote = self.__remotes.get(url)
+			if remote is None or refname not in remote['probed']:
+				# (a dictionary keeps them in the order they were wanted)
+				self.__wanted.setdefault(url, {})[refname] = None
+
+
+	def refs(self, repo, url, refname):
+		'''
+		Finds a ref advertised by a remote.
+
+		:param repo: a :class:`git.Repo` object whose 'origin' remote points to `url`.
+		:param str url: the remote's URL.
+		:param str refname: the ref to probe: a branch (i.e. *'refs/heads/main'*), a tag (i.e. *'refs/tags/v1.0'*) or *'HEAD'*.
+		:return dict: the refnames found mapped to their commits (annotated tags are peeled); when probing *'HEAD'*, a *'HEAD'* key
+			with the name of the branch it points to, mapped itself to HEAD's commit.  It may also hold the other refs probed
+			along this one.
+		:raises git.exc.GitCommandError: if the remote can't be probed (every repo probing the same refs gets the same error).
+		'''
+
+		with self.__lock:
+			url_lock = self.__url_locks.setdefault(url, threading.Lock())
+			remote = self.__remotes.setdefault(url, {'refs': {}, 'probed': {}})
+
+		with url_lock:
+			if refname not in remote['probed']:
+				with self.__lock:
+					wanted = self.__wanted.pop(url, {})
+				wanted[refname] = None
+				refnames = [wanted_ref for wanted_ref in wanted if wanted_ref not in remote['probed']]
+				error = None
+				try:
+					if self.retry is None:
+						ls_remote_output = self.__ls_remote(repo, url, refnames)
+					else:
+						ls_remote_output = self.retry.run(lambda: self.__ls_remote(repo, url, refnames))
+					found = self.__parse(ls_remote_output)
+				except Exception as e:
+					error = e
+				with self.__lock:
+					if error is None:
+						remote['refs'].update(found)
+					for probed_ref in refnames:
+						remote['probed'][probed_ref] = error
+
+		with self.__lock:
+			if remote['probed'][refname] is not None:
+				raise remote['probed'][refname]
+			return dict(remote['refs'])
+
+
+	def __ls_remote(self, repo, url, refnames):
+		'''
+		:param repo: a :class:`git.Repo` object whose 'origin' remote points to `url`.
+		:param str url: the remote's URL.
+		:param list refnames: the refs to probe.
+		:return str: the output of `git ls-remote --symref` for those refs (and the peeled commits of tags).
+		'''
+
+		patterns = []
+		for refname in refnames:
+			patterns.append(refname)
+			if refname.startswith('refs/tags/'):
+				# annotated tags are only peeled when asked for
+				patterns.append(refname + '^{}')
+		with self.hosts.connection(url, repo) if self.hosts is not None else nullcontext():
+			return repo.git.ls_remote('--symref', 'origin', *patterns)
+
+
+	@staticmethod
+	def __parse(ls_remote_output):
+		'''
+		Parses the output of `git ls-remote --symref`.
+
+		:param str ls_remote_output: the command's output.
+		:return dict: as returned by :meth:`refs`.
+		'''
+
+		refs = {}
+		peeled = {}
+		for line in ls_remote_output.splitlines():
+			value, refname = line.split('\t', 1)
+			if value.startswith('ref: '):
+				if refname == 'HEAD':
+					refs['HEAD'] = value[len('ref: '):]
+			elif refname.endswith('^{}'):
+				peeled[refname[:-len('^{}')]] = value
+			elif refname == 'HEAD':
+				# (its symref comes first)
+				if 'HEAD' in refs:
+					refs[refs['HEAD']] = value
+			else:
+				refs[refname] = value
+
+		refs.update(peeled)
+		return refs
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+
+# Import stuff
+import queue, sys, threading
+
+# "local" imports
+from .outputformats import FORMATS
+
+# tells the writer thread to finish
+_CLOSE = object()
+
+
+class Renderer(object):
+	'''
+	Reports the status of subrepos from its own writer thread, so a slow terminal or log collector never stalls processing.
+
+	:meth:`render` just queues a subrepo; the writer thread formats whatever is queued by then and writes it all at once, so
+	under load many subrepos go out in a single write.  Each subrepo's report is written whole, in completion order, so
+	parallel workers never get their reports mixed.  Reports are formatted by an :class:`Outputformat`, as registered at
+	:data:`FORMATS`:
+
+	* *'text'*: colored and human-readable, several lines per subrepo.
+	* *'compact'*: colored, one line per subrepo.
+	* *'json'*: a JSON array, one item per subrepo.
+	* *'ndjson'*: one JSON object per line.
+	* *'quiet'*: one line per subrepo with problems (an error or a wrong remote), nothing else.
+
+	It is safe to render subrepos from many threads.  Renderers are context managers, closing themselves on exit.
+
+	If writing fails (i.e. a closed pipe), the writer thread stops: its error is kept at :attr:`error`, and raised by the
+	next call to :meth:`render` or :meth:`close`.
+	'''
+
+	def __init__(self, output_format='text', stream=None):
+		'''
+		Starts the writer thread.
+
+		:param str output_format: 'text'. One of :data:`FORMATS`.
+		:param stream: *None*, writes to `sys.stdout` (as of now); otherwise, the text stream to write to.
+		:raises ValueError: if the output format is unknown.
+		'''
+
+		if output_format not in FORMATS:
+			raise ValueError(f"unknown output format '{output_format}'")
+
+		self.output_format = output_format
+		self.stream = sys.stdout if stream is None else stream
+		self.__format = FORMATS[output_format]()
+		self.__queue = queue.SimpleQueue()
+		self.__error = None
+		self.__writer = threading.Thread(target=self.__write_loop, name='multigit-renderer', daemon=True)
+		self.__writer.start()
+
+
+	def __enter__(self):
+		return self
+
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		# the error already being raised, if any, is the one to report
+		self.close(raise_error=exc_type is None)
+
+
+	@property
+	def error(self):
+		'''The error that stopped the writer thread (an `OSError`, most likely), or *None*.'''
+		return self.__error
+
+
+	def render(self, subrepo):
+		'''
+		Queues a subrepo's report (this never blocks).
+
+		:param Subrepoentry subrepo: a subrepo, in the enhanced form returned by :class:`Gitrepo`.
+		:raises OSError: the error that stopped the writer thread, if any (nothing more can be reported).
+		'''
+
+		if self.__error is not None:
+			raise self.__error
+		self.__queue.put(dict(subrepo))
+
+
+	def close(self, raise_error=True):
+		'''
+		Writes whatever is still queued (and the format's footer, i.e. closing a JSON array), waiting for the writer thread to finish.
+
+		:param bool raise_error: `True`, raises the writer thread's error; `False`, leaves it at :attr:`error` (i.e. so it doesn't
+			replace an exception already being raised).
+		:raises OSError: the error that stopped the writer thread, if any (and `raise_error`).
+		'''
+
+		if self.__writer.is_alive():
+			self.__queue.put(_CLOSE)
+			self.__writer.join()
+		if raise_error and self.__error is not None:
+			raise self.__error
+
+
+	def __write_loop(self):
+		'''The writer thread: writes queued reports, in batches, until the renderer is closed.'''
+
+		try:
+			header = self.__format.header()
+			if header:
+				self.__write(header)
+			closed = False
+			while not closed:
+				# waits for a report, then takes every other one already queued
+				batch = [self.__queue.get()]
+				try:
+					while True:
+						batch.append(self.__queue.get_nowait())
+				except queue.Empty:
+					pass
+				if batch[-1] is _CLOSE:
+					batch.pop()
+					closed = True
+				output = ''.join(self.__format.format(subrepo) for subrepo in batch)
+				if closed:
+					output += self.__format.footer()
+				if output:
+					self.__write(output)
+		except Exception as e:
+			# reported by render() and close()
+			self.__error = e
+
+
+	def __write(self, output):
+		'''Writes (and flushes) some output.'''
+
+		self.stream.write(output)
+		self.stream.flush()
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+# Import stuff
+import random, re, time
+from git import exc as git_exception
+
+TRANSIENT_ERRORS = re.compile(
+	'|'.join([
+		r'could not resolve host',
+		r'temporary failure in name resolution',
+		r'timed out',
+		r'connection reset',
+		r'connection refused',
+		r'connection closed',
+		r'network is unreachable',
+		r'failed to connect',
+		r"couldn't connect to server",
+		r'the remote end hung up unexpectedly',
+		r'unexpected disconnect',
+		r'early eof',
+		r'rpc failed',
+		r'returned error: 5\d\d',
+	]),
+	re.IGNORECASE
+)
+'''
+git error messages meaning a network operation may succeed if tried again.
+'''  # pylint: disable=W0105
+
+
+class Retrypolicy(object):
+	'''
+	Retries network operations (probes, fetches and clones) failing for transient reasons, like a network blip or an
+	overloaded server, with a bounded exponential backoff.
+
+	Attempt *n* (counting from 0) waits a random time between half and the whole of `delay * 2**n` seconds,
+	up to `max_delay`, so workers retrying at once don't hit the server again all together.  Other errors
+	(i.e. a nonexistent branch or denied access) are raised right away.  It is safe to share a retry policy among threads.
+	'''
+
+	def __init__(self, retries=3, delay=1.0, max_delay=30.0):
+		'''
+		:param int retries: 3. How many times a failed operation is tried again.
+		:param float delay: 1.0. Base delay, in seconds, before the first retry.
+		:param float max_delay: 30.0. Maximum delay, in seconds, before any retry.
+		'''
+
+		self.retries = retries
+		self.delay = delay
+		self.max_delay = max_delay
+
+
+	def run(self, operation):
+		'''
+		Runs an operation, retrying it while it fails for transient reasons.
+
+		:param operation: a callable, with no arguments, running the network operation.
+		:return: whatever the operation returns.
+		:raises git.exc.GitCommandError: the operation's last error, once retries are exhausted or if it's not transient.
+		'''
+
+		attempt = 0
+		while True:
+			try:
+				return operation()
+			except git_exception.GitCommandError as e:
+				if attempt >= self.retries or not self.is_transient(e):
+					raise
+			time.sleep(self.backoff(attempt))
+			attempt += 1
+
+
+	def backoff(self, attempt):
+		'''
+		:param int attempt: the failed attempt's number (0 for the first one).
+		:return float: seconds to wait before the next attempt.
+		'''
+
+		delay = min(self.max_delay, self.delay * 2 ** attempt)
+		return random.uniform(delay / 2, delay)
+
+
+	@staticmethod
+	def is_transient(error):
+		'''
+		:param git.exc.GitCommandError error: a failed git command's error.
+		:return bool: `True` if the command may succeed if tried again.
+		'''
+
+		return bool(TRANSIENT_ERRORS.search(str(error.stderr or '')))
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+# Import stuff
+import json, os, threading
+
+# "local" imports
+from .statecache import STATE_DIR, create_state_dir
+from .subrepoentry import Repostatus
+
+RESULT_KEYS = ('status', 'from', 'to', 'extra_info')
+'''
+The repostatus keys a journal keeps as each subrepo's result.
+'''  # pylint: disable=W0105
+
+
+class Runjournal(object):
+	'''
+	Journal of a `--run`: the subrepos it already processed, so a run stopped halfway (i.e. by a network outage or Ctrl-C)
+	can be resumed where it stopped.
+
+	It's kept at `.multigit/journal` under the workspace's root, one JSON line appended (and flushed) per processed subrepo,
+	so it survives the run being killed at any point; a line cut short by it is just ignored.  It's only created once the first
+	subrepo is recorded, and removed (along with the state directory, if nothing else lives there) once the run finishes, so
+	finished runs leave nothing behind.  It is safe to share a run journal among threads.
+	'''
+
+	def __init__(self, workspace_path, resume=False):
+		'''
+		Opens the journal of a workspace.
+
+		:param str workspace_path: absolute path to the workspace's root.
+		:param bool resume: `False`, starts a new journal; `True`, keeps the subrepos recorded by the last (unfinished) run.
+		'''
+
+		self.workspace_path = workspace_path
+		self.journal_file = os.path.join(workspace_path, STATE_DIR, 'journal')
+		self.__lock = threading.Lock()
+		self.__entries = {}
+		# opened on the first record
+		self.__f_journal = None
+		self.__resume = resume
+
+		if resume:
+			try:
+				with open(self.journal_file, 'r') as f_journal:
+					for line in f_journal:
+						try:
+							entry = json.loads(line)
+							self.__entries[entry['path']] = entry
+						except (ValueError, KeyError, TypeError) as e:
+							pass
+			except OSError as e:
+				pass
+
+
+	def completed(self, subrepo):
+		'''
+		Finds if a subrepo was already processed by the run being resumed, as it's configured now.
+
+		:param Subrepoentry subrepo: the subrepo configuration as returned by Subrepofile.load().
+		:return dict: its recorded result ('status' and, optionally, 'from', 'to' and 'extra_info' keys),
+			or *None* if it must be processed (it wasn't, its configuration changed or it ended in error).
+		'''
+
+		with self.__lock:
+			entry = self.__entries.get(subrepo['path'])
+		if (
+			entry is None
+			or entry['gitref'] != self.__gitref(subrepo)
+			or entry['result'].get('status') == Repostatus.ERROR
+		):
+			return None
+
+		return dict(entry['result'])
+
+
+	def record(self, subrepo):
+		'''
+		Records a processed subrepo.
+
+		:param Subrepoentry subrepo: the subrepo, as enhanced by :class:`Gitrepo`.
+		'''
+
+		entry = {
+			'path': subrepo['path'],
+			'gitref': self.__gitref(subrepo),
+			'result': {key: subrepo[key] for key in RESULT_KEYS if key in subrepo},
+		}
+		with self.__lock:
+			if self.__entries.get(subrepo['path']) == entry:
+				return
+			self.__entries[subrepo['path']] = entry
+			if self.__f_journal is None:
+				create_state_dir(self.workspace_path)
+				self.__f_journal = open(self.journal_file, 'a' if self.__resume else 'w')
+			self.__f_journal.write(json.dumps(entry, sort_keys=True) + '\n')
+			self.__f_journal.flush()
+
+
+	def close(self, finished=False):
+		'''
+		Closes the journal.
+
+		:param bool finished: `False`, keeps it, so the run can be resumed; `True`, the run is over and the journal is removed
+			(and so is the state directory, if nothing else lives there).
+		'''
+
+		with self.__lock:
+			if self.__f_journal is not None:
+				self.__f_journal.close()
+				self.__f_journal = None
+			if finished:
+				try:
+					os.unlink(self.journal_file)
+				except FileNotFoundError as e:
+					pass
+				state_dir = os.path.dirname(self.journal_file)
+				try:
+					if os.listdir(state_dir) == ['.gitignore']:
+						os.unlink(os.path.join(state_dir, '.gitignore'))
+						os.rmdir(state_dir)
+				except OSError as e:
+					# (i.e. it doesn't exist, or something else was just created there)
+					pass
+
+
+	@staticmethod
+	def __gitref(subrepo):
+		'''
+		:param dict subrepo: a subrepo configuration.
+		:return list: what it requests: its remote, gitref type and gitref.
+		'''
+
+		gitref_type = subrepo.get('gitref_type')
+		return [subrepo['repo'], gitref_type, subrepo[gitref_type] if gitref_type else None]
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+# Import stuff
+import json, os, tempfile, threading
+
+STATE_DIR = '.multigit'
+'''
+Name of the directory, at the workspace's root, where multigit keeps its state.
+'''  # pylint: disable=W0105
+STATE_VERSION = 1
+
+
+def create_state_dir(workspace_path):
+	'''
+	Creates (if needed) the state directory of a workspace.
+
+	:param str workspace_path: absolute path to the workspace's root.
+	:return str: absolute path to the state directory.
+	'''
+
+	state_dir = os.path.join(workspace_path, STATE_DIR)
+	os.makedirs(state_dir, exist_ok=True)
+	gitignore = os.path.join(state_dir, '.gitignore')
+	if not os.path.exists(gitignore):
+		# keeps the state out of the workspace's own git sandbox
+		with open(gitignore, 'w') as f_gitignore:
+			f_gitignore.write('*\n')
+
+	return state_dir
+
+
+class Statecache(object):
+	'''
+	Persistent workspace state: what multigit last learnt about each subrepo (or subrepos file), keyed by its absolute path.
+
+	It's stored as JSON at `.multigit/<name>` under the workspace's root (the directory holding the top subrepos file).
+	A missing, unreadable or outdated state file just means starting cold.  It is safe to share a state cache among threads.
+	'''
+
+	def __init__(self, workspace_path, name='state'):
+		'''
+		Loads the state of a workspace.
+
+		:param str workspace_path: absolute path to the workspace's root.
+		:param str name: 'state'. Name of the state file within the state directory.
+		'''
+
+		self.workspace_path = workspace_path
+		self.state_dir = os.path.join(workspace_path, STATE_DIR)
+		self.state_file = os.path.join(self.state_dir, name)
+		self.__lock = threading.Lock()
+
+		try:
+			with open(self.state_file, 'r') as f_state:
+				state = json.load(f_state)
+			if state.get('version') != STATE_VERSION:
+				raise ValueError(f"unsupported state version {state.get('version')}")
+			self.__subrepos = state['subrepos']
+		except (OSError, ValueError, KeyError, AttributeError) as e:
+			self.__subrepos = {}
+
+
+	def get(self, path):
+		'''
+		Gets the last known state of a subrepo.
+
+		:param str path: absolute path of the subrepo.
+		:return dict: a copy of its recorded state (empty if there's none).
+		'''
+
+		with self.__lock:
+			return dict(self.__subrepos.get(path, {}))
+
+
+	def update(self, path, **state):
+		'''
+		Records (part of) the state of a subrepo.
+
+		:param str path: absolute path of the subrepo.
+		:param state: the values to record (they must be JSON-serializable).
+		'''
+
+		with self.__lock:
+			self.__subrepos.setdefault(path, {}).update(state)
+
+
+	def save(self):
+		'''Writes the state file (atomically, so an interrupted run can't leave it half-written).'''
+
+		with self.__lock:
+			state = json.dumps(
+				{
+					'version': STATE_VERSION,
+					'subrepos': self.__subrepos,
+				},
+				indent=1,
+				sort_keys=True,
+			)
+
+		create_state_dir(self.workspace_path)
+		fd, tmp_file = tempfile.mkstemp(dir=self.state_dir, prefix=os.path.basename(self.state_file) + '.')
+		try:
+			with os.fdopen(fd, 'w') as f_state:
+				f_state.write(state)
+			os.replace(tmp_file, self.state_file)
+		except BaseException:
+			os.unlink(tmp_file)
+			raise
@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+
+# Import stuff
+from collections.abc import MutableMapping
+from enum import Enum
+
+FIELDS = (
+	'path', 'repo', 'gitref_type', 'branch', 'tag', 'commit', 'depth', 'filter', 'immutable',
+	'status', 'from', 'to', 'extra_info',
+)
+'''
+The keys a subrepo entry can hold: those of its subrepos file's entry, plus the ones :class:`Gitrepo` fills in.
+'''  # pylint: disable=W0105
+
+
+class Repostatus(str, Enum):
+	'''
+	The status of a subrepo, as found by :class:`Gitrepo`.
+
+	Statuses are strings too, so they compare equal to (and serialize as) their names: `Repostatus.CLONED == 'CLONED'`.
+	'''
+
+	UNPROCESSED = 'UNPROCESSED'
+	NOT_CLONED = 'NOT_CLONED'
+	WRONG_REMOTE = 'WRONG_REMOTE'
+	EMPTY = 'EMPTY'
+	DIRTY = 'DIRTY'
+	PENDING_UPDATE = 'PENDING_UPDATE'
+	UP_TO_DATE = 'UP_TO_DATE'
+	CLONED = 'CLONED'
+	UPDATED = 'UPDATED'
+	ERROR = 'ERROR'
+
+	def __str__(self):
+		return self.value
+
+
+class Subrepoentry(MutableMapping):
+	'''
+	A subrepo, as loaded from its subrepos file and then enhanced by :class:`Gitrepo` with its status.
+
+	Entries keep their values in slots, rather than in a dictionary per subrepo, which makes large trees much lighter.
+	Values can be read and written as attributes (`entry.path`; `entry.from_` for the 'from' key) or, as entries are
+	mutable mappings too, just like the dictionaries they replace (`entry['path']`, `entry.get('tag')`, `dict(entry)`...).
+	Keys not yet set are missing, just as in a dictionary.  Keys other than those in :data:`FIELDS` (i.e. a caller's own
+	annotations) are accepted too, but kept in an overflow dictionary, only created for the entries holding any, and listed
+	after the known ones.  Statuses are stored as :class:`Repostatus` members.
+	'''
+
+	__slots__ = (
+		'path', 'repo', 'gitref_type', 'branch', 'tag', 'commit', 'depth', 'filter', 'immutable',
+		'_status', 'from_', 'to', 'extra_info', '_extra',
+	)
+
+	def __init__(self, *args, **kwargs):
+		'''
+		Accepts the same arguments than `dict()`, i.e. `Subrepoentry({'path': path, 'repo': url})`.
+		'''
+
+		self.update(*args, **kwargs)
+
+
+	@property
+	def status(self):
+		''':class:`Repostatus` of the subrepo.'''
+		return self._status
+
+
+	@status.setter
+	def status(self, value):
+		self._status = Repostatus(value)
+
+
+	@status.deleter
+	def status(self):
+		del self._status
+
+
+	def __getitem__(self, key):
+		if key not in FIELDS:
+			return self.__extra()[key]
+		try:
+			return getattr(self, self.__attribute(key))
+		except AttributeError:
+			raise KeyError(key) from None
+
+
+	def __setitem__(self, key, value):
+		if key not in FIELDS:
+			if not hasattr(self, '_extra'):
+				self._extra = {}
+			self._extra[key] = value
+		else:
+			setattr(self, self.__attribute(key), value)
+
+
+	def __delitem__(self, key):
+		if key not in FIELDS:
+			del self.__extra()[key]
+			return
+		try:
+			delattr(self, self.__attribute(key))
+		except AttributeError:
+			raise KeyError(key) from None
+
+
+	def __iter__(self):
+		for key in FIELDS:
+			if hasattr(self, self.__attribute(key)):
+				yield key
+		yield from self.__extra()
+
+
+	def __len__(self):
+		return sum(1 for key in self)
+
+
+	def __repr__(self):
+		return f"Subrepoentry({dict(self)!r})"
+
+
+	def copy(self):
+		'''
+		:return Subrepoentry: a (shallow) copy of the entry.
+		'''
+
+		return Subrepoentry(self)
+
+
+	def __extra(self):
+		'''
+		:return dict: the keys not in :data:`FIELDS` (empty if there are none).
+		'''
+
+		return getattr(self, '_extra', {})
+
+
+	@staticmethod
+	def __attribute(key):
+		'''
+		:param str key: one of :data:`FIELDS`.
+		:return str: the name of the attribute holding it.
+		'''
+
+		return 'from_' if key == 'from' else key
@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
 
 # Import stuff
-import errno, os, sys
+import errno, hashlib, os, sys
 import importlib.resources as pkg_resources
 import yaml
-from cerberus import Validator, schema
+
+from .subrepoentry import Subrepoentry
+from .subreposvalidator import Subreposvalidator
 
 from colorama import init, Fore, Back, Style
 #Fore: BLACK, RED, GREEN, YELLOW, BLUE, MAGENTA, CYAN, WHITE, RESET.
@@ -13,15 +15,30 @@ from colorama import init, Fore, Back, Style
 
 
 class Subrepofile(object):
-	'''Process a subrepo file into a "valid" dictionary'''
+	'''
+	Process a subrepo file into a list of "valid" subrepo entries
 	
-	def __init__(self):
-		'''Loads the YAML schema validator'''
+	Loaded files are memoized by path, size, mtime and content hash: an unchanged file is neither parsed nor validated again.
+	'''
+	
+	def __init__(self, cache=None):
+		'''
+		Sets up the subrepos file loader (the YAML schema validator will only be loaded once it's first needed).
+		
+		:param Statecache cache: *None*. If set, loaded files are also memoized there, so they can be reused by later runs.
+		'''
 		
 		# Activates colored output
 		init(autoreset=True)
 		
-		# Loads the YAML schema validator
+		self.yaml_validator = None
+		self.cache = cache
+		self.__loaded = {}
+	
+	
+	def __load_validator(self):
+		'''Loads the YAML schema validator'''
+		
 		try:
 			with pkg_resources.path(__package__, 'subrepos_schema.yaml') as validator_resource:
 				with open(validator_resource, 'r') as f_yaml_rules:
@@ -39,8 +56,8 @@ class Subrepofile(object):
 			)
 			
 		try:
-			self.yaml_validator = Validator(yaml_rules)
-		except (schema.SchemaError, TypeError) as e:
+			self.yaml_validator = Subreposvalidator(yaml_rules)
+		except ValueError as e:
 			raise SubrepofileError(
 				f"in YAML schema validator at '{validator_resource}'.\n\t{e}",
 				errno = errno.EINVAL
@@ -52,7 +69,7 @@ class Subrepofile(object):
 		Loads a subrepos file at path.
 		
 		:param str subrepos_file: absolute path to subrepos file
-		:return list of dicts: list of dictionaries similar to the SUBREPOS_FILE one, or *None* if couldn't find it.
+		:return list of Subrepoentry: list of :class:`Subrepoentry` mappings similar to the SUBREPOS_FILE entries, or *None* if couldn't find it.
 		
 			* subrepo:
 				* **subrepo['path']:** will be translated to an absolute path.
@@ -62,28 +79,75 @@ class Subrepofile(object):
 		'''
 		
 		try:
-			with open(subrepos_file, 'r') as f_config:
-				try:
-					configMap = yaml.safe_load(f_config)
-				except (
-					yaml.scanner.ScannerError,
-					yaml.parser.ParserError,
-				) as e:
-					raise SubrepofileError(
-						f"malformed YAML in subrepos file '{subrepos_file}':\n{e}",
-						errno = errno.EINVAL,
-					)
+			with open(subrepos_file, 'rb') as f_config:
+				contents = f_config.read()
+				stat = os.fstat(f_config.fileno())
 		except PermissionError as e:
 			raise SubrepofileError(
 				f"trying to load '{subrepos_file}'\n\t{e}",
 				errno = errno.EPERM
 			)
-				
+		
+		# Let's see if this very same file was already loaded, either by this run or a previous one
+		key = [stat.st_size, stat.st_mtime_ns, hashlib.sha1(contents).hexdigest()]
+		known_file = self.__loaded.get(subrepos_file)
+		if known_file is None and self.cache is not None:
+			known_file = self.cache.get(subrepos_file)
+		if known_file and known_file.get('key') == key:
+			self.__loaded[subrepos_file] = known_file
+		else:
+			known_file = {
+				'key': key,
+				'subrepos': self.__parse(subrepos_file, contents),
+			}
+			self.__loaded[subrepos_file] = known_file
+			if self.cache is not None:
+				self.cache.update(
+					subrepos_file,
+					key=key,
+					subrepos=None if known_file['subrepos'] is None else [dict(subrepo) for subrepo in known_file['subrepos']],
+				)
+		
+		# Callers are free to modify what they get
+		if known_file['subrepos'] is None:
+			return None
+		return [Subrepoentry(subrepo) for subrepo in known_file['subrepos']]
+	
+	
+	def __parse(self, subrepos_file, contents):
+		'''
+		Parses, validates and "normalizes" the contents of a subrepos file.
+		
+		:param str subrepos_file: absolute path to subrepos file
+		:param bytes contents: the file's contents
+		:return list of Subrepoentry: as returned by :meth:`load`.
+		'''
+		
+		try:
+			configMap = yaml.safe_load(contents)
+		except (
+			yaml.scanner.ScannerError,
+			yaml.parser.ParserError,
+		) as e:
+			raise SubrepofileError(
+				f"malformed YAML in subrepos file '{subrepos_file}':\n{e}",
+				errno = errno.EINVAL,
+			)
+		
 		# Operates on the subrepos found
 		if configMap:
+			if self.yaml_validator is None:
+				self.__load_validator()
 			# Validate the subrepos file's contents
-			if self.yaml_validator.validate(configMap):
-				subrepo_list = configMap['subrepos']
+			try:
+				valid = self.yaml_validator.validate(configMap)
+			except ValueError as e:
+				raise SubrepofileError(
+					f"malformed YAML in subrepos file '{subrepos_file}':\n\t{e}",
+					errno = errno.EINVAL,
+				)
+			if valid:
+				subrepo_list = [Subrepoentry(subrepo) for subrepo in configMap['subrepos']]
 				# "Normalize" the validated contents
 				for subrepo in subrepo_list:
 					# Let's set the repo's local path to its absolute location for easy tracking
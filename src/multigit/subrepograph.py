@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+
+# Import stuff
+import heapq, os
+
+
+class Subrepograph(object):
+	'''
+	Dependency graph of subrepos, computed from their (absolute) paths.
+
+	A subrepo depends on any other subrepo whose path is a prefix of its own, i.e. the repositories its path is nested within.
+	Subrepos are handed out by :meth:`take_ready` once all their dependencies are finished, in the order they were added.
+	'''
+
+	def __init__(self):
+		self.subrepos = {}
+		'''The subrepos in the graph, keyed by their absolute path.'''  # pylint: disable=W0105
+		self.__sequence = {}
+		self.__blockers = {}
+		self.__dependents = {}
+		self.__finished = set()
+		self.__ready = []
+
+
+	def __len__(self):
+		return len(self.subrepos)
+
+
+	def __contains__(self, path):
+		return path in self.subrepos
+
+
+	def extend(self, subrepos):
+		'''
+		Adds a list of subrepos to the graph.
+
+		Subrepos whose path is already in the graph are ignored (already defined subrepos take precedence).
+		Dependencies are computed once the full list is added, so a subrepo may be listed before the one holding it.
+
+		:param list subrepos: subrepo dictionaries, as returned by Subrepofile.load().
+		:return list: the subrepos actually added.
+		'''
+
+		added = []
+		for subrepo in subrepos:
+			if subrepo['path'] not in self.subrepos:
+				self.subrepos[subrepo['path']] = subrepo
+				self.__sequence[subrepo['path']] = len(self.__sequence)
+				added.append(subrepo)
+
+		for subrepo in added:
+			blockers = set(
+				path for path in self.dependencies(subrepo['path'])
+				if path not in self.__finished
+			)
+			self.__blockers[subrepo['path']] = blockers
+			for path in blockers:
+				self.__dependents.setdefault(path, set()).add(subrepo['path'])
+			if not blockers:
+				self.__push_ready(subrepo['path'])
+
+		return added
+
+
+	def dependencies(self, path):
+		'''
+		Finds the subrepos a path depends on.
+
+		:param str path: absolute path of a subrepo.
+		:return list: paths in the graph that hold `path`, nearest first.
+		'''
+
+		dependencies = []
+		parent_path = os.path.dirname(path)
+		while parent_path != path:
+			if parent_path in self.subrepos:
+				dependencies.append(parent_path)
+			path = parent_path
+			parent_path = os.path.dirname(path)
+
+		return dependencies
+
+
+	def take_ready(self, count=None):
+		'''
+		Hands out subrepos with no pending dependencies.
+
+		:param int count: maximum number of subrepos to return (all of them if *None*).
+		:return list: ready subrepos, in the order they were added to the graph.
+		'''
+
+		taken = []
+		while self.__ready and (count is None or len(taken) < count):
+			sequence, path = heapq.heappop(self.__ready)
+			taken.append(self.subrepos[path])
+
+		return taken
+
+
+	def finish(self, path):
+		'''
+		Marks a subrepo as finished, so the ones depending on it may become ready.
+
+		:param str path: absolute path of the finished subrepo.
+		'''
+
+		self.__finished.add(path)
+		for dependent_path in self.__dependents.pop(path, ()):
+			blockers = self.__blockers[dependent_path]
+			blockers.discard(path)
+			if not blockers:
+				self.__push_ready(dependent_path)
+
+
+	def dump(self):
+		'''
+		Dumps the graph.
+
+		:return dict: every subrepo path in the graph mapped to the list of paths it depends on, nearest first.
+		'''
+
+		return {
+			path: self.dependencies(path)
+			for path in self.subrepos
+		}
+
+
+	def critical_path(self):
+		'''
+		Finds the longest chain of subrepos that must be processed one after another.
+
+		Its length is the minimum number of sequential steps needed to process the whole graph, no matter how many workers are used.
+
+		:return list: subrepo paths on the critical path, outermost first.
+		'''
+
+		critical_path = []
+		for path in self.subrepos:
+			chain = [path] + self.dependencies(path)
+			if len(chain) > len(critical_path):
+				critical_path = chain
+
+		critical_path.reverse()
+		return critical_path
+
+
+	def __push_ready(self, path):
+		heapq.heappush(self.__ready, (self.__sequence[path], path))
+
@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 
 # Import stuff
-import errno, os, sys
+import asyncio, errno, functools, os, sys
+from collections import deque
+from contextlib import nullcontext, redirect_stdout
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from git import Repo, exc as git_exception
 
 from colorama import init, Fore, Back, Style
@@ -10,9 +13,20 @@ from colorama import init, Fore, Back, Style
 #Style: DIM, NORMAL, BRIGHT, RESET_ALL
 
 # "local" imports
+from .bundlearchive import Bundlearchive
 from .gitrepo import Gitrepo
+from .hostpool import Hostpool
+from .mirrorcache import Mirrorcache
+from .remoteprobe import Remoteprobe
+from .renderer import Renderer
+from .retrypolicy import Retrypolicy
+from .runjournal import Runjournal
+from .statecache import Statecache
+from .subrepograph import Subrepograph
 from .subrepofile import Subrepofile, SubrepofileError
 
+
+
 class Subrepos(object):
 	'''Recursively reads subrepos files and runs git commands as per its findings'''
 	
@@ -25,7 +39,25 @@ class Subrepos(object):
 		self,
 		base_path,
 		subrepos_filename='subrepos',
-		report_only=True
+		report_only=True,
+		jobs=1,
+		fetch=True,
+		max_fetch_age=None,
+		probe=True,
+		cache=False,
+		mirror=False,
+		depth=None,
+		clone_filter=None,
+		max_host_connections=4,
+		ssh_multiplexing=True,
+		fsmonitor=False,
+		trust_mtimes=False,
+		retries=3,
+		resume=False,
+		immutable_tags=False,
+		from_bundle=None,
+		profiler=None,
+		output_format='text',
 	):
 		'''
 		Recursively finds and processes subrepos files.
@@ -37,6 +69,429 @@ class Subrepos(object):
 		:param str base_path: the absolute path to the directory where subrepos file will be searched for and processed.
 		:param str subrepos_filename: 'subrepos'. Name of file holding subrepos' definitions.
 		:param bool report_only: `True`, just shows dirtree status; `False`, updates dirtree.
+		:param int jobs: 1. Maximum number of subrepos processed concurrently.
+		:param bool fetch: `True`, fetches remotes; `False`, works offline against the existing remote-tracking refs.
+		:param int max_fetch_age: *None*, always fetches; otherwise, only fetches repos whose last fetch is older than this many seconds.
+		:param bool probe: `True`, remotes are probed with `git ls-remote` for the requested gitref (once per remote URL and gitref) and only fetched if the requested gitref changed; `False`, they are always fetched.
+		:param bool cache: `False`, starts cold; `True`, keeps a :class:`Statecache` at the workspace's root so every subrepos file already parsed and when
+			each remote was last checked (see `max_fetch_age`) can be reused.
+		:param bool mirror: `False`, clones straight from remotes; `True`, clones through a :class:`Mirrorcache` at the workspace's root, so each remote's objects are stored once.
+		:param int depth: *None*, full histories; otherwise, the history depth of clones and fetches for subrepos not setting their own 'depth'.
+		:param str clone_filter: *None*, every object is cloned; otherwise, the partial clone filter for subrepos not setting their own 'filter'.
+		:param int max_host_connections: 4. Maximum number of concurrent probes, fetches and clones per remote host (*None* for no limit).
+		:param bool ssh_multiplexing: `True`, ssh remotes on the same host share a single connection (an ssh master managed by a :class:`Hostpool`); `False`, every git command connects on its own.
+		:param bool fsmonitor: `False`, leaves subrepos' configuration alone; `True`, enables git's untracked cache and filesystem monitor (where available) on every subrepo checked (see :class:`Gitrepo`).
+		:param bool trust_mtimes: `False`, always asks git whether subrepos are dirty; `True` (only with `cache`), reuses the last verdict while the subrepo's HEAD, index and working tree directories' modification times don't change (see :class:`Gitrepo`).
+		:param int retries: 3. How many times probes, fetches and clones failing for transient reasons (i.e. a network blip) are retried, with an exponential backoff (see :class:`Retrypolicy`).
+		:param bool resume: `False`, processes every subrepo; `True`, when updating, skips the subrepos already processed by the last run, if it was stopped halfway (see :class:`Runjournal`).
+		:param bool immutable_tags: `False`, only tags marked as 'immutable' are trusted never to move; `True`, every tag is.  Immutable tags and full commit SHAs already in a subrepo need no network access.
+		:param str from_bundle: *None*; otherwise, the path to a :class:`Bundlearchive` (as written by :meth:`export_bundle`) to bootstrap the workspace from:
+			remotes are cloned through mirrors (as with `mirror`) seeded from its bundles, so only what's newer is fetched from them.
+		:param Profiler profiler: *None*; otherwise, the run is profiled there and a summary of its slowest subrepos and phases is printed at the end.
+		:param str output_format: 'text'. How each subrepo's status is reported: *'text'*, colored and human-readable;
+			*'compact'*, one colored line per subrepo; *'quiet'*, only a line per subrepo with problems; *'json'*, a JSON array;
+			*'ndjson'*, one JSON object per line.  Either JSON format is streamed one record per subrepo as soon as it's processed,
+			while any other message goes to stderr.  Reports are written by a :class:`Renderer`, on its own thread.
+		
+		Subrepos are fanned out to a pool of up to `jobs` workers following their :class:`Subrepograph`:
+		every subtree root starts at once, and a subrepo nested within another one starts as soon as its parent is finished.
+		'''
+		
+		# keeps machine-readable output clean
+		messages = sys.stderr if output_format in ('json', 'ndjson') else sys.stdout
+		with redirect_stdout(messages):
+			try:
+				run = self.__prepare(
+					base_path, subrepos_filename, cache, from_bundle,
+					fetch=fetch,
+					max_fetch_age=max_fetch_age,
+					probe=probe,
+					mirror=mirror,
+					depth=depth,
+					clone_filter=clone_filter,
+					max_host_connections=max_host_connections,
+					ssh_multiplexing=ssh_multiplexing,
+					fsmonitor=fsmonitor,
+					trust_mtimes=trust_mtimes,
+					retries=retries,
+					immutable_tags=immutable_tags,
+					profiler=profiler,
+				)
+			except SubreposError as e:
+				sys.exit(e.errno)
+		renderer = Renderer(output_format)
+		# only updates are worth resuming
+		journal = None if report_only else Runjournal(os.path.dirname(run['subrepos_file']), resume)
+		finished = False
+		
+		# Recursively work on subrepos' contents
+		try:
+			with profiler if profiler is not None else nullcontext():
+				self.__run(run['graph'], run['git_subrepo'], run['subrepo'], subrepos_filename, report_only, jobs, renderer, journal)
+			finished = True
+		finally:
+			try:
+				# an error writing reports (see Renderer.error) mustn't replace the one that stopped the run, if any
+				renderer.close(raise_error=finished)
+			finally:
+				if journal is not None:
+					journal.close(finished)
+				self.__release(run)
+			
+		if profiler is not None:
+			with redirect_stdout(messages):
+				self.__print_profile(profiler)
+				
+				
+	def __run(self, graph, git_subrepo, subrepo, subrepos_filename, report_only, jobs, renderer, journal=None):
+		'''Processes a subrepos' graph with a pool of workers, adding nested subrepos as they are found.
+		
+		:param Subrepograph graph: the subrepos to process.
+		:param Gitrepo git_subrepo: the (shared) git processor.
+		:param Subrepofile subrepo: the subrepos file loader.
+		:param str subrepos_filename: name of file holding subrepos' definitions.
+		:param bool report_only: `True`, just shows dirtree status; `False`, updates dirtree.
+		:param int jobs: maximum number of subrepos processed concurrently.
+		:param Renderer renderer: where each subrepo's status is reported.
+		:param Runjournal journal: *None*; otherwise, the journal where processed subrepos are recorded (and those already there are skipped).
+		'''
+		
+		with ThreadPoolExecutor(max_workers=jobs) as executor:
+			running = {}
+			while True:
+				# Starts every subrepo with no pending dependencies, up to the pool's size
+				for current_subrepo in graph.take_ready(jobs - len(running)):
+					future = executor.submit(self.__process_subrepo, git_subrepo, current_subrepo, report_only, journal)
+					running[future] = current_subrepo
+				if not running:
+					break
+					
+				done, not_done = wait(running, return_when=FIRST_COMPLETED)
+				for future in done:
+					current_subrepo = future.result()
+					# done with this subrepo entry
+					del running[future]
+					graph.finish(current_subrepo['path'])
+					if journal is not None:
+						journal.record(current_subrepo)
+					
+					# Reports subrepo status (from the renderer's thread)
+					renderer.render(current_subrepo)
+					
+					# Let's see if new subrepos appeared and (eventually) add them to the graph
+					# (already defined subrepos take precedence)
+					git_subrepo.expect(graph.extend(
+						self.__load_nested(subrepo, current_subrepo['path'], subrepos_filename, git_subrepo.profiler)
+					))
+					
+					
+	async def process_async(
+		self,
+		base_path,
+		subrepos_filename='subrepos',
+		report_only=True,
+		jobs=1,
+		fetch=True,
+		max_fetch_age=None,
+		probe=True,
+		cache=False,
+		mirror=False,
+		depth=None,
+		clone_filter=None,
+		max_host_connections=4,
+		ssh_multiplexing=True,
+		fsmonitor=False,
+		trust_mtimes=False,
+		retries=3,
+		immutable_tags=False,
+		from_bundle=None,
+	):
+		'''
+		Recursively finds and processes subrepos files, without blocking the running event loop.
+		
+		Works just like :meth:`process`, but nothing is printed: the status of each subrepo is yielded as soon as it's processed.
+		git operations run on a pool of `jobs` worker threads, so many workspaces can be processed concurrently on the same event loop::
+		
+			async for subrepo in Subrepos().process_async('/path/to/workspace', jobs=4):
+				print(subrepo['path'], subrepo['status'])
+		
+		:param str base_path: the absolute path to the directory where subrepos file will be searched for and processed.
+		:param str subrepos_filename: 'subrepos'. Name of file holding subrepos' definitions.
+		:param bool report_only: `True`, just finds dirtree status; `False`, updates dirtree.
+		:param int jobs: 1. Maximum number of subrepos processed concurrently.
+		:param bool fetch: see :meth:`process`.
+		:param int max_fetch_age: see :meth:`process`.
+		:param bool probe: see :meth:`process`.
+		:param bool cache: see :meth:`process`.
+		:param bool mirror: see :meth:`process`.
+		:param int depth: see :meth:`process`.
+		:param str clone_filter: see :meth:`process`.
+		:param int max_host_connections: see :meth:`process`.
+		:param bool ssh_multiplexing: see :meth:`process`.
+		:param bool fsmonitor: see :meth:`process`.
+		:param bool trust_mtimes: see :meth:`process`.
+		:param int retries: see :meth:`process`.
+		:param bool immutable_tags: see :meth:`process`.
+		:param str from_bundle: see :meth:`process`.
+		:return: an asynchronous iterator of :class:`Subrepoentry` mappings, in the enhanced form returned by :class:`Gitrepo`.
+		:raises SubreposError: if a subrepos file can't be found or loaded.
+		'''
+		
+		loop = asyncio.get_running_loop()
+		executor = ThreadPoolExecutor(max_workers=jobs)
+		run = None
+		running = {}
+		try:
+			run = await loop.run_in_executor(executor, functools.partial(
+				self.__prepare,
+				base_path, subrepos_filename, cache, from_bundle,
+				fetch=fetch,
+				max_fetch_age=max_fetch_age,
+				probe=probe,
+				mirror=mirror,
+				depth=depth,
+				clone_filter=clone_filter,
+				max_host_connections=max_host_connections,
+				ssh_multiplexing=ssh_multiplexing,
+				fsmonitor=fsmonitor,
+				trust_mtimes=trust_mtimes,
+				retries=retries,
+				immutable_tags=immutable_tags,
+				verbose=False,
+			))
+			graph = run['graph']
+			
+			while True:
+				# Starts every subrepo with no pending dependencies, up to the pool's size
+				for current_subrepo in graph.take_ready(jobs - len(running)):
+					future = loop.run_in_executor(executor, self.__process_subrepo, run['git_subrepo'], current_subrepo, report_only)
+					running[future] = current_subrepo
+				if not running:
+					break
+					
+				done, not_done = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+				for future in done:
+					del running[future]
+					current_subrepo = future.result()
+					graph.finish(current_subrepo['path'])
+					try:
+						nested_subrepos = await loop.run_in_executor(
+							executor, self.__load_nested, run['subrepo'], current_subrepo['path'], subrepos_filename
+						)
+					except SubrepofileError as e:
+						raise SubreposError(str(e), errno = e.errno) from e
+					run['git_subrepo'].expect(graph.extend(nested_subrepos))
+					yield current_subrepo
+		finally:
+			# subrepos still running (if the caller stopped early) are left to finish on their own
+			executor.shutdown(wait=False)
+			if run is not None:
+				# (their ssh masters exit by themselves once idle)
+				self.__release(run, close_connections=all(future.done() for future in running))
+				
+				
+	def dependency_graph(
+		self,
+		base_path,
+		subrepos_filename='subrepos',
+		report=False,
+		cache=False,
+	):
+		'''
+		Computes the dependency graph of the subrepos tree, without running any git operation.
+		
+		The subrepos file is found just like :meth:`process` does.  Nested subrepos files are only found
+		for the repositories already cloned, so the graph covers the tree as currently deployed.
+		
+		:param str base_path: the absolute path to the directory where subrepos file will be searched for.
+		:param str subrepos_filename: 'subrepos'. Name of file holding subrepos' definitions.
+		:param bool report: `True`, also prints the graph and its critical path.
+		:param bool cache: `False`, parses every subrepos file; `True`, reuses the subrepos files parsed by previous runs.
+		:return Subrepograph: the dependency graph.
+		'''
+		
+		try:
+			subrepo, subrepos_file, subrepos = self.__load_entry_point(base_path, subrepos_filename, cache)
+		except SubreposError as e:
+			sys.exit(e.errno)
+		graph = Subrepograph()
+		graph.extend(subrepos)
+		
+		try:
+			# the graph itself keeps every path ever seen, so subrepos defined again deeper in the tree are never queued twice
+			ready_subrepos = deque(graph.take_ready())
+			while ready_subrepos:
+				current_subrepo = ready_subrepos.popleft()
+				graph.finish(current_subrepo['path'])
+				graph.extend(
+					self.__load_nested(subrepo, current_subrepo['path'], subrepos_filename)
+				)
+				ready_subrepos.extend(graph.take_ready())
+		finally:
+			if subrepo.cache is not None:
+				subrepo.cache.save()
+			
+		if report:
+			self.__print_dependency_graph(graph)
+			
+		return graph
+		
+		
+	def export_bundle(
+		self,
+		base_path,
+		archive_file,
+		subrepos_filename='subrepos',
+		cache=False,
+	):
+		'''
+		Writes a :class:`Bundlearchive` of the subrepos tree, to bootstrap other workspaces from (see `from_bundle` at :meth:`process`).
+		
+		The subrepos tree is found just like :meth:`dependency_graph` does, and each remote is bundled from the first of its
+		subrepos already cloned (with its remote-tracking branches and tags).
+		
+		:param str base_path: the absolute path to the directory where subrepos file will be searched for.
+		:param str archive_file: path to the archive to write.
+		:param str subrepos_filename: 'subrepos'. Name of file holding subrepos' definitions.
+		:param bool cache: `False`, parses every subrepos file; `True`, reuses the subrepos files parsed by previous runs.
+		:return dict: the bundled remotes, their normalized URL mapped to the path of the subrepo bundled.
+		'''
+		
+		graph = self.dependency_graph(base_path, subrepos_filename, cache=cache)
+		try:
+			bundled, skipped = Bundlearchive(archive_file).export(graph.subrepos.values())
+		except OSError as e:
+			print(f"{Style.BRIGHT}{Fore.RED}ERROR:{Style.RESET_ALL} ({os.strerror(e.errno)}) writing '{archive_file}'\n\t{e}")
+			sys.exit(e.errno)
+			
+		for path, reason in skipped.items():
+			print(Style.BRIGHT + Fore.YELLOW + "WARNING:", end=' ')
+			print(Style.BRIGHT + "'" + path + "'", end=' ')
+			print("skipped (" + reason.rstrip('.') + ").")
+		print(Style.BRIGHT + Fore.GREEN + "INFO:", end=' ')
+		print(str(len(bundled)) + " remotes bundled at", end=' ')
+		print(Style.BRIGHT + "'" + archive_file + "'", end='.\n')
+		
+		return bundled
+		
+		
+	def __prepare(
+		self,
+		base_path,
+		subrepos_filename,
+		cache,
+		from_bundle,
+		fetch,
+		max_fetch_age,
+		probe,
+		mirror,
+		depth,
+		clone_filter,
+		max_host_connections,
+		ssh_multiplexing,
+		fsmonitor,
+		trust_mtimes,
+		retries,
+		immutable_tags,
+		profiler=None,
+		verbose=True,
+	):
+		'''Loads the entry point subrepos file and sets up everything a run needs to process its tree.
+		
+		See :meth:`process` for every parameter, but `verbose`.
+		
+		:param bool verbose: `True`, reports how the subrepos file is found (and why it, or the bundle archive, couldn't); `False`, prints nothing.
+		:return dict: the run's context: its subrepos file loader ('subrepo'), entry point file ('subrepos_file'), :class:`Subrepograph` ('graph'),
+			:class:`Gitrepo` ('git_subrepo') and the resources to release once done ('state', 'hosts' and 'bundles'); see :meth:`__release`.
+		:raises SubreposError: if the subrepos file or the bundle archive can't be loaded.
+		'''
+		
+		subrepo, subrepos_file, subrepos = self.__load_entry_point(base_path, subrepos_filename, cache, profiler, verbose)
+		bundles = self.__open_bundles(from_bundle, verbose)
+		graph = Subrepograph()
+		added = graph.extend(subrepos)
+		workspace_path = os.path.dirname(subrepos_file)
+		state = Statecache(workspace_path) if cache else None
+		hosts = Hostpool(max_host_connections, ssh_multiplexing)
+		retry = Retrypolicy(retries) if retries else None
+		git_subrepo = Gitrepo(
+			fetch=fetch,
+			max_fetch_age=max_fetch_age,
+			remote_probe=Remoteprobe(hosts, retry) if probe else None,
+			state=state,
+			mirrors=Mirrorcache(workspace_path, hosts, retry, bundles) if mirror or bundles is not None else None,
+			depth=depth,
+			clone_filter=clone_filter,
+			profiler=profiler,
+			hosts=hosts,
+			retry=retry,
+			fsmonitor=fsmonitor,
+			trust_mtimes=trust_mtimes,
+			immutable_tags=immutable_tags,
+		)
+		git_subrepo.expect(added)
+		
+		return {
+			'subrepo': subrepo,
+			'subrepos_file': subrepos_file,
+			'graph': graph,
+			'git_subrepo': git_subrepo,
+			'state': state,
+			'hosts': hosts,
+			'bundles': bundles,
+		}
+		
+		
+	def __release(self, run, close_connections=True):
+		'''Releases what a run set up by :meth:`__prepare` holds, saving its caches.
+		
+		:param dict run: the run's context.
+		:param bool close_connections: `True`, stops the run's ssh masters and closes its bundle archive; `False`, leaves them be (i.e. for subrepos still being processed).
+		'''
+		
+		if close_connections:
+			run['hosts'].close()
+			if run['bundles'] is not None:
+				run['bundles'].close()
+		if run['state'] is not None:
+			run['state'].save()
+		if run['subrepo'].cache is not None:
+			run['subrepo'].cache.save()
+			
+			
+	def __open_bundles(self, archive_file, verbose=True):
+		'''Opens the bundle archive a workspace is bootstrapped from.
+		
+		:param str archive_file: path to the archive, or *None*.
+		:param bool verbose: `True`, reports why it couldn't be opened; `False`, prints nothing.
+		:return Bundlearchive: the archive, or *None* if there's none.
+		:raises SubreposError: if it can't be read.
+		'''
+		
+		if archive_file is None:
+			return None
+			
+		bundles = Bundlearchive(archive_file)
+		try:
+			bundles.remotes()
+		except (OSError, ValueError) as e:
+			if verbose:
+				print(f"{Style.BRIGHT}{Fore.RED}ERROR:{Style.RESET_ALL} {e}")
+			raise SubreposError(str(e), errno = getattr(e, 'errno', None) or errno.EINVAL) from e
+			
+		return bundles
+		
+		
+	def __load_entry_point(self, base_path, subrepos_filename, cache, profiler=None, verbose=True):
+		'''Finds and loads the "entry point" subrepos file.
+		
+		:param str base_path: the absolute path to the directory where subrepos file will be searched for.
+		:param str subrepos_filename: name of file holding subrepos' definitions.
+		:param bool cache: `True`, the subrepos file loader memoizes parsed files at the workspace's root.
+		:param Profiler profiler: *None*; otherwise, where loading the file is timed.
+		:param bool verbose: `True`, reports how the file is found (and why it couldn't); `False`, prints nothing.
+		:return tuple: the subrepos file loader, the absolute path to the entry point file and the subrepos defined in it.
+		:raises SubreposError: if it can't be found or loaded.
 		'''
 		
 		if os.path.isfile(os.path.join(base_path, subrepos_filename)):
@@ -44,160 +499,193 @@ class Subrepos(object):
 				os.path.join(base_path, subrepos_filename)
 			)
 		else:
-			print(Style.BRIGHT + Fore.GREEN + "INFO:", end=' ')
-			print("no valid ", end=' ')
-			print(Style.BRIGHT + "'" + subrepos_filename + "'", end=' found at ')
-			print(Style.BRIGHT + "'" + base_path + "'", end='.\n')
+			if verbose:
+				print(Style.BRIGHT + Fore.GREEN + "INFO:", end=' ')
+				print("no valid ", end=' ')
+				print(Style.BRIGHT + "'" + subrepos_filename + "'", end=' found at ')
+				print(Style.BRIGHT + "'" + base_path + "'", end='.\n')
 			# No subrepos file found at current path. Let's check if we are within a git sandbox
 			try:
 				repo = Repo(base_path, search_parent_directories=True)
 				# we are in a git sandbox: get its "root"
 				root_dir = repo.working_tree_dir
-				print(Style.BRIGHT + Fore.GREEN + "INFO:", end=' ')
-				print("processing git repository rooted at", end=' ')
-				print(Style.BRIGHT + "'" + root_dir + "'", end=':\n')
+				if verbose:
+					print(Style.BRIGHT + Fore.GREEN + "INFO:", end=' ')
+					print("processing git repository rooted at", end=' ')
+					print(Style.BRIGHT + "'" + root_dir + "'", end=':\n')
 				
 				if os.path.isfile(os.path.join(root_dir, subrepos_filename)):
 					subrepos_file = os.path.realpath(
 						os.path.join(root_dir, subrepos_filename)
 					)
-			except git_exception.InvalidGitRepositoryError as e:
+			except (git_exception.InvalidGitRepositoryError, git_exception.NoSuchPathError) as e:
 				# Not a git repo: no more options left
-				print(Style.BRIGHT + Fore.YELLOW + "WARNING:", end=' ')
-				print("Current dir " + Style.BRIGHT + "'" + base_path + "'", end=' ')
-				print("is not within a valid git sandbox.")
+				if verbose:
+					print(Style.BRIGHT + Fore.YELLOW + "WARNING:", end=' ')
+					print("Current dir " + Style.BRIGHT + "'" + base_path + "'", end=' ')
+					print("is not within a valid git sandbox.")
 			
 		# Let's see if we found a valid subrepos 'entry point'
 		try:
 			subrepos_file
 		except NameError:
-			print(Style.BRIGHT + Fore.RED + "ERROR:", end=' ')
-			print("Couldn't find any", end=' ')
-			print(Style.BRIGHT + "'" + subrepos_filename + "'", end=' ')
-			print("file... exiting.")
-			sys.exit(errno.ENOENT)
+			if verbose:
+				print(Style.BRIGHT + Fore.RED + "ERROR:", end=' ')
+				print("Couldn't find any", end=' ')
+				print(Style.BRIGHT + "'" + subrepos_filename + "'", end=' ')
+				print("file... exiting.")
+			raise SubreposError(
+				f"couldn't find any '{subrepos_filename}' file for '{base_path}'",
+				errno = errno.ENOENT,
+			)
 		
-		subrepo = Subrepofile()
+		subrepo = Subrepofile(
+			cache=Statecache(os.path.dirname(subrepos_file), name='subrepofiles') if cache else None
+		)
 		try:
-			subrepos = subrepo.load(subrepos_file)
+			with self.__phase(profiler, os.path.dirname(subrepos_file), 'load'):
+				subrepos = subrepo.load(subrepos_file)
 		except SubrepofileError as e:
-			err_msg = f"{Style.BRIGHT}{Fore.RED}ERROR:{Style.RESET_ALL} ({os.strerror(e.errno)}) "
-			err_msg += f"{e}"
-			print(err_msg)
-			sys.exit(e.errno)
+			if verbose:
+				err_msg = f"{Style.BRIGHT}{Fore.RED}ERROR:{Style.RESET_ALL} ({os.strerror(e.errno)}) "
+				err_msg += f"{e}"
+				print(err_msg)
+			raise SubreposError(str(e), errno = e.errno) from e
 				
 		if not subrepos:
-			print(Style.BRIGHT + Fore.YELLOW + "WARNING:", end=' ')
-			print("Couldn't find any", end=' ')
-			print(Style.BRIGHT + "'" + subrepos_filename + "'", end=' ')
-			print("file... exiting.")
-			sys.exit(errno.ENOENT)
-			
-		# Recursively work on subrepos' contents
-		while len(subrepos):
-			current_subrepo = subrepos[0]
-			
-			# Operates on the current subrepo as requested
-			git_subrepo = Gitrepo()
-			if report_only:
-				current_subrepo = git_subrepo.status(current_subrepo)
-			else:
-				current_subrepo = git_subrepo.update(current_subrepo)
-				
-			# Prints subrepo status
-			self.__print_subrepo_status(current_subrepo)
+			if verbose:
+				print(Style.BRIGHT + Fore.YELLOW + "WARNING:", end=' ')
+				print("Couldn't find any", end=' ')
+				print(Style.BRIGHT + "'" + subrepos_filename + "'", end=' ')
+				print("file... exiting.")
+			raise SubreposError(
+				f"no subrepos defined at '{subrepos_file}'",
+				errno = errno.ENOENT,
+			)
 			
-			# Let's see if new subrepos appeared and (eventually) append them to the queue
-			try:
+		return subrepo, subrepos_file, subrepos
+		
+		
+	def __load_nested(self, subrepo, subrepo_path, subrepos_filename, profiler=None):
+		'''Loads the subrepos file (if any) at the root of a subrepo.
+		
+		:param Subrepofile subrepo: the subrepos file loader.
+		:param str subrepo_path: absolute path to the subrepo.
+		:param str subrepos_filename: name of file holding subrepos' definitions.
+		:param Profiler profiler: *None*; otherwise, where loading the file is timed.
+		:return list: the subrepos found (empty if none).
+		'''
+		
+		try:
+			with self.__phase(profiler, subrepo_path, 'load'):
 				new_subrepos = subrepo.load(
-					os.path.join(current_subrepo['path'], subrepos_filename)
+					os.path.join(subrepo_path, subrepos_filename)
 				)
-			except FileNotFoundError as e:
-				# It's acceptable not to find new subrepos at this location
-				new_subrepos = []
-				
-			if new_subrepos:
-				# add NEW subrepos to the list (already defined subrepos take precedence)
-				subrepo_paths = set(
-					path['path'] for path in subrepos
-				)
-				subrepos.extend(
-					new_subrepo for new_subrepo in new_subrepos
-					if new_subrepo['path'] not in subrepo_paths
-				)
-				del new_subrepos
+		except (FileNotFoundError, NotADirectoryError) as e:
+			# It's acceptable not to find new subrepos at this location
+			new_subrepos = None
 			
-			# done with this subrepo entry
-			subrepos.remove(current_subrepo)
+		return new_subrepos or []
 		
 		
-	def __print_subrepo_status(self, subrepo):
-		'''prints a report on the repo info provided as param.
+	def __phase(self, profiler, path, name):
+		'''Times a phase, if there's a profiler.
 		
-		:param dict subrepo: a dictionary in the enhanced form returned by __process_subrepo()
+		:param Profiler profiler: the profiler (or *None*).
+		:param str path: absolute path of the subrepo the phase works on.
+		:param str name: the phase's name.
+		:return: a context manager.
 		'''
 		
-		# Header
-		print(Style.BRIGHT + "'" + subrepo['path'] + "':")
-		print("\trepository:", end=' ')
-		print(Style.BRIGHT + "'" + subrepo['repo'] + "'")
-		if subrepo['gitref_type']:
-			gitref_type = subrepo['gitref_type']
-			print("\trequested " + gitref_type + ":", end=' ')
-			print(Style.BRIGHT + "'" + subrepo[gitref_type] + "'")
+		if profiler is None:
+			return nullcontext()
+		return profiler.phase(path, name)
+		
+		
+	def __process_subrepo(self, git_subrepo, subrepo, report_only, journal=None):
+		'''Runs status or update on a single subrepo (executed by the worker pool).
+		
+		:param Gitrepo git_subrepo: the (shared) git processor.
+		:param Subrepoentry subrepo: the subrepo configuration as returned by Subrepofile.load().
+		:param bool report_only: `True`, just finds its status; `False`, updates it.
+		:param Runjournal journal: *None*; otherwise, the journal of the run being resumed.
+		:return Subrepoentry: the subrepo, enhanced by Gitrepo.
+		'''
+		
+		if journal is not None:
+			result = journal.completed(subrepo)
+			if result is not None:
+				# already processed by the run being resumed
+				subrepo.update(result)
+				return subrepo
+				
+		if report_only:
+			return git_subrepo.status(subrepo)
 		else:
-			print("\tno gitref requested (working on default repo branch)")
-			
-		# Details depending on refered status
-		if subrepo['status'] == 'ERROR':
-			print("\tstatus:", end=' ')
-			print(Style.BRIGHT + Fore.RED + "ERROR")
-			if 'extra_info' in subrepo:
-				print("\textra info:", end=' ')
-				print(Style.BRIGHT + subrepo['extra_info'].replace('\n','\n\t\t'))
-			
-		elif subrepo['status'] == 'WRONG_REMOTE':
-			print("\tstatus: " + Style.BRIGHT + Fore.YELLOW + "REPO POINTS TO A WRONG REMOTE")
-			if 'extra_info' in subrepo:
-				print("\textra info:", end=' ')
-				print(Style.BRIGHT + subrepo['extra_info'].replace('\n','\n\t\t'))
-			
-		elif subrepo['status'] == 'NOT_CLONED':
-			print("\tstatus: " + Style.BRIGHT + Fore.YELLOW + "NOT YET CLONED")
-			
-		elif subrepo['status'] == 'CLONED':
-			print("\tstatus:", end=' ')
-			print(Style.BRIGHT + Fore.GREEN + "CLONED")
-			
-		elif subrepo['status'] == 'EMPTY':
-			print("\tstatus:", end=' ')
-			print(Style.BRIGHT + Fore.YELLOW + "REMOTE REPO NOT YET INITIALIZED")
-			
-		elif subrepo['status'] == 'UP_TO_DATE':
-			print("\tstatus:", end=' ')
-			print(Style.BRIGHT + Fore.GREEN + "UP TO DATE")
-			
-		elif subrepo['status'] == 'PENDING_UPDATE':
-			print("\tstatus:", end=' ')
-			print(Style.BRIGHT + Fore.YELLOW + "PENDING UPDATES")
-			print("\tpending updates:", end=' ')
-			print(Style.BRIGHT + "'" + subrepo['from'] + "'", end=' -> ')
-			print(Style.BRIGHT + "'" + subrepo['to'] + "'")
-			
-		elif subrepo['status'] == 'UPDATED':
-			print("\tupdated from", end=' ')
-			print(Style.BRIGHT + "'" + subrepo['from'] + "'", end=' -> ')
-			print(Style.BRIGHT + "'" + subrepo['to'] + "'")
-			
-		elif subrepo['status'] == 'DIRTY':
-			print("\tstatus:", end=' ')
-			print(Style.BRIGHT + Fore.YELLOW + "DIRTY", end=' ')
-			print("(won't try to update)")
+			return git_subrepo.update(subrepo)
 			
-		else:
-			print("\tstatus: " + Style.BRIGHT + subrepo['status'])
+			
+	def __print_dependency_graph(self, graph):
+		'''prints a report on a subrepos' dependency graph.
 		
+		:param Subrepograph graph: the graph to report on.
+		'''
 		
+		for path, dependencies in graph.dump().items():
+			print(Style.BRIGHT + "'" + path + "':")
+			if dependencies:
+				print("\tdepends on:", end=' ')
+				print(", ".join(Style.BRIGHT + "'" + dependency + "'" + Style.RESET_ALL for dependency in dependencies))
+			else:
+				print("\tno dependencies")
+				
+		critical_path = graph.critical_path()
+		print(Style.BRIGHT + Fore.GREEN + "INFO:", end=' ')
+		print("critical path length is", end=' ')
+		print(Style.BRIGHT + str(len(critical_path)), end=' ')
+		print("out of " + str(len(graph)) + " subrepos:")
+		for path in critical_path:
+			print("\t" + Style.BRIGHT + "'" + path + "'")
+			
+			
+	def __print_profile(self, profiler):
+		'''prints a summary of a profiled run: its slowest subrepos and phases.
+		
+		:param Profiler profiler: the run's profiler.
+		'''
+		
+		summary = profiler.summary()
+		print(Style.BRIGHT + Fore.GREEN + "INFO:", end=' ')
+		print("slowest subrepos:")
+		for subrepo in summary['subrepos']:
+			print("\t" + Style.BRIGHT + "'" + subrepo['path'] + "'", end=': ')
+			print(f"{subrepo['seconds']:.3f}s", end=' (')
+			print(", ".join(
+				f"{name} {seconds:.3f}s"
+				for name, seconds in sorted(subrepo['phases'].items(), key=lambda phase: phase[1], reverse=True)
+			), end='); ')
+			print(f"{subrepo['subprocesses']} git subprocesses, {subrepo['bytes_fetched']} bytes fetched")
+			
+		print(Style.BRIGHT + Fore.GREEN + "INFO:", end=' ')
+		print("slowest phases:")
+		for phase in summary['phases']:
+			print("\t" + Style.BRIGHT + phase['name'], end=': ')
+			print(f"{phase['seconds']:.3f}s over {phase['count']} runs")
+			
+			
+class SubreposError(Exception):
+	'''
+	Custom Subrepos Error Exception
+	
+	:param str msg: the error's description
+	:param errno errno: suggested sys.exit errno
+	'''
+	
+	def __init__(self, msg='error while processing subrepos', errno=errno.EINVAL, *args, **kwargs):
+		super().__init__(msg, *args, **kwargs)
+		self.errno = errno
+		
+
 if __name__ == '__main__':
 	# execute only if run as a script
 	sys.exit(
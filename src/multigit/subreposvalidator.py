@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+
+# Supported types, as named by the schema
+TYPES = {
+	'boolean': bool,
+	'dict': dict,
+	'integer': int,
+	'list': list,
+	'string': str,
+}
+RULES = ('type', 'required', 'dependencies', 'excludes', 'allowed', 'min', 'schema')
+
+
+class Subreposvalidator(object):
+	'''
+	Validates subrepos files against a schema compiled from `subrepos_schema.yaml`.
+
+	Only the rules the subrepos schema needs are supported (*type*, *required*, *dependencies*, *excludes*, *allowed*, *min* and nested *schema*), but
+	errors are reported just like Cerberus does, i.e. `{'subrepos': [{0: [{'repo': ['required field']}]}]}`.
+
+	:ivar dict errors: the errors found by the last call to :meth:`validate`.
+	'''
+
+	def __init__(self, rules):
+		'''
+		Compiles a schema.
+
+		:param dict rules: the schema, as found in `subrepos_schema.yaml`.
+		:raises ValueError: if the schema is malformed or it uses an unsupported rule.
+		'''
+
+		self.errors = {}
+		self.__mapping = self.__compile_mapping(rules)
+
+
+	def validate(self, document):
+		'''
+		Validates a document.
+
+		:param dict document: the document (a loaded subrepos file).
+		:return bool: `True` if the document is valid; otherwise, the errors found are at :attr:`errors`.
+		:raises ValueError: if the document is not a dictionary.
+		'''
+
+		if not isinstance(document, dict):
+			raise ValueError(f"'{document}' is not a document, must be a dict")
+
+		self.errors = self.__validate_mapping(self.__mapping, document)
+		return not self.errors
+
+
+	def __compile_mapping(self, rules):
+		'''
+		:param dict rules: field names mapped to their rules.
+		:return tuple: the compiled fields (by name) and the names of the required ones.
+		'''
+
+		if not isinstance(rules, dict):
+			raise ValueError(f"schema definition '{rules}' must be a dict")
+
+		fields = {}
+		for name, field_rules in rules.items():
+			fields[name] = self.__compile_field(name, field_rules)
+
+		required = tuple(name for name, field in fields.items() if field['required'])
+		return fields, required
+
+
+	def __compile_field(self, name, rules):
+		'''
+		:param str name: the field's name (*None* for list items).
+		:param dict rules: the field's rules.
+		:return dict: the compiled field.
+		'''
+
+		if not isinstance(rules, dict):
+			raise ValueError(f"rules for field '{name}' must be a dict")
+		for rule in rules:
+			if rule not in RULES:
+				raise ValueError(f"unsupported rule '{rule}' for field '{name}'")
+		if rules.get('type') not in TYPES:
+			raise ValueError(f"unsupported type '{rules.get('type')}' for field '{name}'")
+
+		field = {
+			'type': TYPES[rules['type']],
+			'type_error': f"must be of {rules['type']} type",
+			'required': bool(rules.get('required', False)),
+			'dependencies': (),
+			'excludes': (),
+			'excludes_error': None,
+			'allowed': rules.get('allowed'),
+			'min': rules.get('min'),
+			'items': None,
+			'mapping': None,
+		}
+
+		dependencies = rules.get('dependencies', ())
+		if isinstance(dependencies, str):
+			dependencies = (dependencies,)
+		field['dependencies'] = tuple(dependencies)
+
+		excludes = rules.get('excludes', ())
+		if isinstance(excludes, str):
+			excludes = (excludes,)
+		if excludes:
+			field['excludes'] = tuple(excludes)
+			field['excludes_error'] = ", ".join(f"'{excluded}'" for excluded in excludes)
+			field['excludes_error'] += f" must not be present with '{name}'"
+
+		if 'schema' in rules:
+			if rules['type'] == 'list':
+				field['items'] = self.__compile_field(None, rules['schema'])
+			elif rules['type'] == 'dict':
+				field['mapping'] = self.__compile_mapping(rules['schema'])
+			else:
+				raise ValueError(f"rule 'schema' is not supported for '{rules['type']}' field '{name}'")
+
+		return field
+
+
+	def __validate_mapping(self, mapping, document):
+		'''
+		:param tuple mapping: the compiled fields, as returned by :meth:`__compile_mapping`.
+		:param dict document: the dictionary to validate.
+		:return dict: the errors found, by field name.
+		'''
+
+		fields, required = mapping
+		errors = {}
+		for name, value in document.items():
+			field = fields.get(name)
+			if field is None:
+				errors[name] = ['unknown field']
+				continue
+			field_errors = self.__validate_field(field, value, document)
+			if field_errors:
+				errors[name] = field_errors
+
+		for name in required:
+			if name not in document:
+				errors[name] = ['required field']
+
+		return errors
+
+
+	def __validate_field(self, field, value, document):
+		'''
+		:param dict field: the compiled field.
+		:param value: the field's value.
+		:param dict document: the dictionary holding the field (*None* for list items).
+		:return list: the errors found (empty if none).
+		'''
+
+		errors = []
+		if value is not None and not isinstance(value, field['type']):
+			# Cerberus stops here
+			return [field['type_error']]
+
+		if document is not None:
+			for dependency in field['dependencies']:
+				if dependency not in document:
+					errors.append(f"field '{dependency}' is required")
+
+		if document is not None and field['excludes']:
+			for excluded in field['excludes']:
+				if excluded in document:
+					errors.append(field['excludes_error'])
+					break
+
+		if value is None:
+			errors.append('null value not allowed')
+			return errors
+
+		if field['allowed'] is not None and value not in field['allowed']:
+			errors.append(f"unallowed value {value}")
+		if field['min'] is not None and value < field['min']:
+			errors.append(f"min value is {field['min']}")
+
+		if field['items'] is not None:
+			items_errors = {}
+			for index, item in enumerate(value):
+				item_errors = self.__validate_field(field['items'], item, None)
+				if item_errors:
+					items_errors[index] = item_errors
+			if items_errors:
+				errors.append(items_errors)
+		elif field['mapping'] is not None:
+			mapping_errors = self.__validate_mapping(field['mapping'], value)
+			if mapping_errors:
+				errors.append(mapping_errors)
+
+		return errors
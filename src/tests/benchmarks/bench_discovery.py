@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# Benchmarks the discovery of a subrepos tree
+
+# Import stuff
+import unittest
+import os, tempfile, time
+from contextlib import redirect_stdout
+from io import StringIO
+from . import TESTS_PATH, PROJECT_PATH
+
+from git_scaffold import write_subrepos_file
+from multigit import Subrepos
+
+# subrepos per subrepos file
+FANOUT = 100
+
+class TestDiscoveryBenchmark(unittest.TestCase):
+
+	def setUp(self):
+		self.workspace = tempfile.TemporaryDirectory()
+		self.workspace_path = os.path.realpath(self.workspace.name)
+
+
+	def tearDown(self):
+		self.workspace.cleanup()
+
+
+	def __build_tree(self, name, count):
+		'''
+		Writes a two level tree of subrepos files, holding `count` subrepos.
+
+		Every nested subrepos file also defines again its parent's siblings, which must be ignored.
+
+		:return str: path to the tree's root.
+		'''
+		root_path = os.path.join(self.workspace_path, name)
+		top_entries = [
+			{'path': f"repo-{index}", 'repo': f"https://git.example.com/repo-{index}.git"}
+			for index in range(count // FANOUT)
+		]
+		write_subrepos_file(os.path.join(root_path, 'subrepos'), top_entries)
+		for top_entry in top_entries:
+			nested_entries = [
+				{'path': f"nested-{index}", 'repo': f"https://git.example.com/nested-{index}.git"}
+				for index in range(FANOUT - 1)
+			]
+			nested_entries += [
+				{'path': os.path.join(os.pardir, entry['path']), 'repo': entry['repo']}
+				for entry in top_entries[:5]
+			]
+			write_subrepos_file(os.path.join(root_path, top_entry['path'], 'subrepos'), nested_entries)
+
+		return root_path
+
+
+	def __discover(self, root_path):
+		'''Discovers a tree, returning the graph and the elapsed time in seconds.'''
+		start = time.perf_counter()
+		with redirect_stdout(StringIO()):
+			graph = Subrepos().dependency_graph(root_path)
+		return graph, time.perf_counter() - start
+
+
+	def test_discovery_scales_linearly(self):
+		print("TEST: 'test_discovery_scales_linearly'")
+		small_graph, small_cost = self.__discover(self.__build_tree('small', 2500))
+		large_graph, large_cost = self.__discover(self.__build_tree('large', 10000))
+		print(f"\t{len(small_graph)} subrepos discovered in {small_cost:.2f}s")
+		print(f"\t{len(large_graph)} subrepos discovered in {large_cost:.2f}s")
+
+		self.assertEqual(len(small_graph), 2500)
+		self.assertEqual(len(large_graph), 10000)
+		# Four times as many subrepos: linear discovery takes ~4 times as long, quadratic ~16
+		self.assertLess(large_cost / small_cost, 8)
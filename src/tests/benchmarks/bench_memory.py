@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+# Benchmarks the memory taken by subrepo entries
+
+# Import stuff
+import unittest
+import tracemalloc
+from . import TESTS_PATH, PROJECT_PATH
+
+from multigit import Subrepoentry
+
+ENTRIES = 20000
+
+class TestMemoryBenchmark(unittest.TestCase):
+
+	def setUp(self):
+		# subrepos as processed by a run, with their status
+		self.subrepos = [
+			{
+				'path': f"/workspace/repos/repo-{index}",
+				'repo': f"https://git.example.com/repo-{index}.git",
+				'gitref_type': 'branch',
+				'branch': 'main',
+				'status': 'UPDATED',
+				'from': 'main',
+				'to': 'main',
+			}
+			for index in range(ENTRIES)
+		]
+
+
+	def __per_entry(self, entry_type):
+		'''Copies every subrepo as `entry_type`, returning the memory taken per entry in bytes.'''
+		tracemalloc.start()
+		try:
+			entries = [entry_type(subrepo) for subrepo in self.subrepos]
+			allocated, peak = tracemalloc.get_traced_memory()
+		finally:
+			tracemalloc.stop()
+		self.assertEqual(len(entries), ENTRIES)
+		return allocated / ENTRIES
+
+
+	def test_entry_memory(self):
+		print("TEST: 'test_entry_memory'")
+		dict_cost = self.__per_entry(dict)
+		entry_cost = self.__per_entry(Subrepoentry)
+		print(f"\tdict: {dict_cost:.0f} bytes per subrepo")
+		print(f"\tSubrepoentry: {entry_cost:.0f} bytes per subrepo")
+
+		# (values are shared by both, so these are the containers' costs)
+		self.assertLess(entry_cost, dict_cost * 0.75)
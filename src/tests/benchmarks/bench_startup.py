@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+# Benchmarks the command line's startup
+
+# Import stuff
+import unittest
+import os, subprocess, sys
+from . import TESTS_PATH, PROJECT_PATH
+
+import multigit
+
+# Modules --version and --help must not wait for
+HEAVY_MODULES = ['cerberus', 'colorama', 'git', 'yaml']
+
+class TestStartupBenchmark(unittest.TestCase):
+
+	def __run_cli(self, option):
+		'''
+		Runs the command line with -X importtime.
+
+		:return tuple: the command's output and the modules it imported, mapped to their cumulative import time in microseconds.
+		'''
+		env = dict(os.environ)
+		env['PYTHONPATH'] = os.pathsep.join(
+			[os.path.dirname(os.path.dirname(multigit.__file__))] + sys.path
+		)
+		result = subprocess.run(
+			[
+				sys.executable, '-X', 'importtime', '-c',
+				f"import sys; sys.argv = ['multigit', '{option}']; from multigit.__main__ import main; main()",
+			],
+			capture_output=True,
+			text=True,
+			env=env,
+			check=True,
+		)
+
+		imported = {}
+		for line in result.stderr.splitlines():
+			if line.startswith('import time:') and not line.endswith('| imported package'):
+				self_time, cumulative_time, module = line[len('import time:'):].split('|')
+				imported[module.strip()] = int(cumulative_time)
+
+		return result.stdout, imported
+
+
+	def test_version_startup(self):
+		print("TEST: 'test_version_startup'")
+		output, imported = self.__run_cli('--version')
+		self.assertIn(multigit.__version__, output)
+		print(f"\t'multigit --version' imports multigit in {imported['multigit']}us")
+		for module in HEAVY_MODULES:
+			self.assertNotIn(module, imported)
+
+
+	def test_help_startup(self):
+		print("TEST: 'test_help_startup'")
+		output, imported = self.__run_cli('--help')
+		self.assertIn('--run', output)
+		print(f"\t'multigit --help' imports multigit in {imported['multigit']}us")
+		for module in HEAVY_MODULES:
+			self.assertNotIn(module, imported)
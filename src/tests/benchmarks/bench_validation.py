@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+# Benchmarks subrepos files' validation
+
+# Import stuff
+import unittest
+import os, time
+import yaml
+from . import TESTS_PATH, PROJECT_PATH
+
+import multigit
+from multigit.subreposvalidator import Subreposvalidator
+
+try:
+	from cerberus import Validator
+except ImportError:
+	Validator = None
+
+ENTRIES = 5000
+
+class TestValidationBenchmark(unittest.TestCase):
+
+	def setUp(self):
+		with open(os.path.join(os.path.dirname(multigit.__file__), 'subrepos_schema.yaml'), 'r') as f_yaml_rules:
+			self.rules = yaml.safe_load(f_yaml_rules)
+		self.document = {'subrepos': []}
+		for index in range(ENTRIES):
+			subrepo = {
+				'path': f"repos/repo-{index}",
+				'repo': f"https://git.example.com/repo-{index}.git",
+			}
+			gitref_type = ('branch', 'tag', 'commit', None)[index % 4]
+			if gitref_type:
+				subrepo[gitref_type] = f"{gitref_type}-{index}"
+			self.document['subrepos'].append(subrepo)
+
+
+	def __per_entry(self, validator):
+		'''Validates the document with a validator, returning the cost per entry in microseconds.'''
+		start = time.perf_counter()
+		self.assertTrue(validator.validate(self.document))
+		return (time.perf_counter() - start) * 1e6 / ENTRIES
+
+
+	@unittest.skipIf(Validator is None, "Cerberus is not available")
+	def test_validation_cost(self):
+		print("TEST: 'test_validation_cost'")
+		start = time.perf_counter()
+		validator = Subreposvalidator(self.rules)
+		compile_cost = (time.perf_counter() - start) * 1e6
+		start = time.perf_counter()
+		cerberus_validator = Validator(self.rules)
+		cerberus_compile_cost = (time.perf_counter() - start) * 1e6
+
+		cost = self.__per_entry(validator)
+		cerberus_cost = self.__per_entry(cerberus_validator)
+		print(f"\tSubreposvalidator: {compile_cost:.0f}us to compile, {cost:.2f}us per entry")
+		print(f"\tCerberus: {cerberus_compile_cost:.0f}us to compile, {cerberus_cost:.2f}us per entry")
+		self.assertLess(cost, cerberus_cost)
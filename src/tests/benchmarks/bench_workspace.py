@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+# Benchmarks processing a synthetic workspace, from its first clone to a partial update
+#
+# Workspace size can be tuned with these environment variables:
+#   MULTIGIT_BENCHMARK_REPOS (default: 24), MULTIGIT_BENCHMARK_DEPTH (default: 3), MULTIGIT_BENCHMARK_HISTORY (default: 50).
+# Measurements are written as JSON to MULTIGIT_BENCHMARK_RESULTS, if set; when MULTIGIT_BENCHMARK_BASELINE points to
+# a previous results file (measured with the same workspace size), every scenario must stay within REGRESSION times its cost.
+
+# Import stuff
+import unittest
+import os, json, platform, tempfile, time
+from contextlib import redirect_stdout, redirect_stderr
+from io import StringIO
+from . import TESTS_PATH, PROJECT_PATH
+
+from git_scaffold import build_synthetic_workspace, push_new_commit
+import multigit
+from multigit import Subrepos
+
+REPOS = int(os.environ.get('MULTIGIT_BENCHMARK_REPOS', 24))
+DEPTH = int(os.environ.get('MULTIGIT_BENCHMARK_DEPTH', 3))
+HISTORY = int(os.environ.get('MULTIGIT_BENCHMARK_HISTORY', 50))
+JOBS = 4
+# one subrepo out of UPDATE_EVERY gets a new commit for the partial update
+UPDATE_EVERY = 5
+REGRESSION = 1.5
+
+class TestWorkspaceBenchmark(unittest.TestCase):
+
+	def setUp(self):
+		self.workspace = tempfile.TemporaryDirectory()
+		self.scaffold = build_synthetic_workspace(os.path.realpath(self.workspace.name), REPOS, DEPTH, HISTORY)
+		self.results = {}
+
+
+	def tearDown(self):
+		self.workspace.cleanup()
+
+
+	def __process(self, scenario, report_only):
+		'''
+		Processes the workspace, recording its cost under `scenario`.
+
+		:return dict: every subrepo's status, keyed by its path relative to the workspace.
+		'''
+		records = StringIO()
+		start = time.perf_counter()
+		with redirect_stdout(records), redirect_stderr(StringIO()):
+			Subrepos().process(
+				base_path     = self.scaffold['workspace'],
+				report_only   = report_only,
+				jobs          = JOBS,
+				output_format = 'ndjson',
+			)
+		elapsed = time.perf_counter() - start
+
+		statuses = {}
+		for line in records.getvalue().splitlines():
+			record = json.loads(line)
+			statuses[os.path.relpath(record['path'], self.scaffold['workspace'])] = record['status']
+		self.results[scenario] = {
+			'seconds': round(elapsed, 4),
+			'repos_per_second': round(len(statuses) / elapsed, 2),
+			'ms_per_repo': round(elapsed * 1000 / len(statuses), 2),
+		}
+		print(f"\t{scenario}: {len(statuses)} subrepos in {elapsed:.2f}s ({self.results[scenario]['ms_per_repo']}ms each)")
+
+		return statuses
+
+
+	def __record(self):
+		'''Writes the measurements to MULTIGIT_BENCHMARK_RESULTS and compares them to MULTIGIT_BENCHMARK_BASELINE.'''
+		results = {
+			'version': multigit.__version__,
+			'python': platform.python_version(),
+			'workspace': {'repos': REPOS, 'depth': DEPTH, 'history': HISTORY, 'jobs': JOBS},
+			'scenarios': self.results,
+		}
+		# (read first, as the baseline may be the results file being replaced)
+		baseline = None
+		if os.environ.get('MULTIGIT_BENCHMARK_BASELINE'):
+			with open(os.environ['MULTIGIT_BENCHMARK_BASELINE'], 'r') as f_baseline:
+				baseline = json.load(f_baseline)
+
+		if os.environ.get('MULTIGIT_BENCHMARK_RESULTS'):
+			with open(os.environ['MULTIGIT_BENCHMARK_RESULTS'], 'w') as f_results:
+				json.dump(results, f_results, indent=1, sort_keys=True)
+
+		if baseline is not None:
+			self.assertEqual(baseline['workspace'], results['workspace'], "baseline measured on a different workspace")
+			for scenario, measurement in self.results.items():
+				with self.subTest(scenario=scenario):
+					self.assertLess(
+						measurement['seconds'],
+						baseline['scenarios'][scenario]['seconds'] * REGRESSION,
+						f"'{scenario}' regressed against {baseline['version']}"
+					)
+
+
+	def test_workspace_lifecycle(self):
+		print("TEST: 'test_workspace_lifecycle'")
+		print(f"\tworkspace: {REPOS} subrepos, {DEPTH} levels deep, {HISTORY} commits each")
+		all_paths = {
+			os.path.join(*[f"repo-{parent}" for parent in range(index % DEPTH)], f"repo-{index}")
+			for index in range(REPOS)
+		}
+
+		statuses = self.__process('clone', report_only=False)
+		self.assertEqual(set(statuses), all_paths)
+		self.assertEqual(set(statuses.values()), {'CLONED'})
+
+		statuses = self.__process('noop_rerun', report_only=False)
+		self.assertEqual(set(statuses.values()), {'UP_TO_DATE'})
+
+		statuses = self.__process('status', report_only=True)
+		self.assertEqual(set(statuses.values()), {'UP_TO_DATE'})
+
+		updated = set()
+		for index in range(0, REPOS, UPDATE_EVERY):
+			push_new_commit(self.scaffold['remotes'][index], 'main', 'new-file.txt', 'new\n')
+			updated.add(os.path.join(*[f"repo-{parent}" for parent in range(index % DEPTH)], f"repo-{index}"))
+		statuses = self.__process('partial_update', report_only=False)
+		self.assertEqual({path for path, status in statuses.items() if status == 'UPDATED'}, updated)
+		self.assertEqual({status for path, status in statuses.items() if path not in updated}, {'UP_TO_DATE'})
+
+		# Nothing to clone nor fetch must be cheaper than cloning everything
+		self.assertLess(self.results['noop_rerun']['seconds'], self.results['clone']['seconds'])
+		self.assertLess(self.results['status']['seconds'], self.results['clone']['seconds'])
+		self.__record()
@@ -3,6 +3,7 @@
 
 import os
 import shutil
+import subprocess
 import tempfile
 
 from git import Repo
@@ -105,13 +106,132 @@ def build_test_remotes(remotes_root):
     return remotes
 
 
+def _subrepos_yaml(entries):
+    lines = ['---', 'subrepos:']
+    for entry in entries:
+        lines.append(f"- path: '{entry['path']}'")
+        lines.append(f"  repo: '{entry['repo']}'")
+        for gitref_type in ('branch', 'tag', 'commit'):
+            if gitref_type in entry:
+                lines.append(f"  {gitref_type}: '{entry[gitref_type]}'")
+    return '\n'.join(lines) + '\n'
+
+
 def write_subrepos_file(path, entries):
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, 'w', encoding='utf-8') as handler:
-        handler.write('---\n')
-        handler.write('subrepos:\n')
-        for entry in entries:
-            handler.write(f"- path: '{entry['path']}'\n")
-            handler.write(f"  repo: '{entry['repo']}'\n")
-            if 'branch' in entry:
-                handler.write(f"  branch: '{entry['branch']}'\n")
+    _write_file(path, _subrepos_yaml(entries))
+
+
+def create_history_bare_remote(remote_path, branch, history, files=None):
+    """Create a bare remote whose branch has `history` commits, each one
+    rewriting 'history.txt'; `files` (name -> content) go in the first one.
+
+    History is written with a single `git fast-import`, so even long
+    histories take milliseconds.
+    """
+    _ensure_parent(remote_path)
+    Repo.init(remote_path, bare=True)
+
+    stream = []
+    for index in range(history):
+        message = f'Commit {index}\n'.encode('utf-8')
+        stream.append(f'commit refs/heads/{branch}\n'.encode('utf-8'))
+        stream.append(f'mark :{index + 1}\n'.encode('utf-8'))
+        stream.append(
+            f'committer multigit-tests <multigit-tests@example.com> {1700000000 + index} +0000\n'.encode('utf-8')
+        )
+        stream.append(f'data {len(message)}\n'.encode('utf-8') + message)
+        if index:
+            stream.append(f'from :{index}\n'.encode('utf-8'))
+        commit_files = dict(files or {}) if not index else {}
+        commit_files['history.txt'] = f'commit {index}\n'
+        for filename, content in commit_files.items():
+            data = content.encode('utf-8')
+            stream.append(f'M 644 inline {filename}\n'.encode('utf-8'))
+            stream.append(f'data {len(data)}\n'.encode('utf-8') + data + b'\n')
+    subprocess.run(
+        ['git', 'fast-import', '--quiet'],
+        input=b''.join(stream), cwd=remote_path, check=True,
+    )
+    _set_remote_head(remote_path, branch)
+
+
+def build_synthetic_workspace(root, repos, depth, history):
+    """Create a workspace of `repos` subrepos nested up to `depth` levels,
+    each one cloned from its own local file:// remote holding `history`
+    commits.
+
+    Subrepo 'repo-<n>' sits at level n % depth: top level ones are defined
+    by the workspace's subrepos file, and each deeper level by the subrepos
+    file of the first subrepo of the level above it (which also ignores
+    them), so the chain repo-0/repo-1/... is `depth` levels deep.
+
+    Return a dictionary with the workspace's path ('workspace') and its
+    remotes' paths ('remotes'), in subrepo order.
+    """
+    if not 1 <= depth <= repos:
+        raise ValueError('depth must be between 1 and the number of repos')
+    workspace_path = os.path.join(root, 'workspace')
+    remotes_path = os.path.join(root, 'remotes')
+    remotes = [os.path.join(remotes_path, f'repo-{index}.git') for index in range(repos)]
+
+    levels = [[] for level in range(depth)]
+    for index in range(repos):
+        levels[index % depth].append({
+            'path': f'repo-{index}',
+            'repo': 'file://' + remotes[index],
+        })
+
+    for index, remote_path in enumerate(remotes):
+        files = {}
+        if index + 1 < depth:
+            # the first subrepo of each level defines the next one
+            files['subrepos'] = _subrepos_yaml(levels[index + 1])
+            files['.gitignore'] = ''.join(f"/{entry['path']}/\n" for entry in levels[index + 1])
+        create_history_bare_remote(remote_path, 'main', history, files)
+
+    write_subrepos_file(os.path.join(workspace_path, 'subrepos'), levels[0])
+
+    return {'workspace': workspace_path, 'remotes': remotes}
+
+
+def push_new_commit(remote_path, branch, filename, content):
+    """Push a new commit to a branch of a bare remote."""
+    work_path = tempfile.mkdtemp(prefix='multigit-push-')
+    try:
+        work_repo = Repo.clone_from(remote_path, work_path, branch=branch)
+        _configure_repo_identity(work_repo)
+        _commit_file(work_repo, filename, content, f'Update {filename}')
+        work_repo.git.push('origin', branch)
+    finally:
+        shutil.rmtree(work_path)
+
+
+FAKE_SSH = """#!/bin/sh
+echo "$@" >> '{log}'
+while [ $# -gt 0 ]; do
+    case "$1" in
+        -G|-O) exit 0 ;;
+        -o|-p|-l|-i|-S) shift 2 ;;
+        -*) shift ;;
+        *) break ;;
+    esac
+done
+shift
+if [ "$(grep -c upload-pack '{log}')" -le {failures} ]; then
+    echo "ssh: connect to host example.com port 22: Connection timed out" >&2
+    exit 255
+fi
+exec sh -c "$*"
+"""
+
+
+def write_fake_ssh(path, log, failures=0):
+    """Write a stand-in for ssh that logs its arguments and runs the requested git command locally.
+
+    Its first `failures` connections time out.
+    """
+    _ensure_parent(path)
+    _write_file(path, FAKE_SSH.format(log=log, failures=failures))
+    os.chmod(path, 0o755)
+    return path
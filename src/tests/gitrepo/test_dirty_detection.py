@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+# Tests the Gitrepo class: filesystem monitor and trusted mtimes
+
+# Import stuff
+from .test_gitrepo import TestGitrepo
+
+import os
+from unittest import mock
+from git import Repo
+from git_scaffold import push_new_commit
+
+from multigit import Gitrepo, Gitstatus, Statecache
+
+# Subclasses so it gets parent's setUp and tearDown
+class TestGitrepoDirtyDetection(TestGitrepo):
+
+	def setUp(self):
+		super().setUp()
+		self.workspace_path = os.path.join(self.scenarios_path, 'standard')
+		self.repoconf = {
+			'repo': self.remotes['standard_repo'],
+			'path': os.path.join(self.workspace_path, 'standard-repo'),
+			'gitref_type': 'branch',
+			'branch': 'main',
+		}
+		self.gitrepo.update(self.repoconf)
+
+
+	def test_fsmonitor(self):
+		print("TEST: 'test_fsmonitor'")
+		result = Gitrepo(fsmonitor=True).status(self.repoconf)
+		print(str(result))
+		self.assertEqual(result['status'], 'UP_TO_DATE')
+
+		repo = Repo(self.repoconf['path'])
+		config = repo.config_reader()
+		self.assertTrue(config.get_value('core', 'untrackedCache'))
+		# the builtin daemon is only enabled where git ships it
+		fsmonitor_daemon = 'fsmonitor--daemon' in repo.git.version('--build-options')
+		self.assertEqual(config.get_value('core', 'fsmonitor', False), fsmonitor_daemon)
+
+
+	def test_trust_mtimes(self):
+		print("TEST: 'test_trust_mtimes'")
+		state = Statecache(self.workspace_path)
+		gitrepo = Gitrepo(fetch=False, state=state, trust_mtimes=True)
+		with mock.patch('multigit.gitrepo.Gitstatus.read', wraps=Gitstatus.read) as status_read:
+			gitrepo.status(self.repoconf)
+			self.assertEqual(status_read.call_count, 1)
+			status_read.reset_mock()
+
+			# nothing changed: git isn't asked again
+			result = gitrepo.status(self.repoconf)
+			print(str(result))
+			self.assertEqual(result['status'], 'UP_TO_DATE')
+			self.assertEqual(status_read.call_count, 0)
+
+			# a removed file changes its directory
+			tracked_file = [
+				entry.path for entry in Repo(self.repoconf['path']).tree().traverse() if entry.type == 'blob'
+			][0]
+			os.remove(os.path.join(self.repoconf['path'], tracked_file))
+			result = gitrepo.status(self.repoconf)
+			print(str(result))
+			self.assertEqual(result['status'], 'DIRTY')
+			self.assertEqual(status_read.call_count, 1)
+
+
+	def test_trust_mtimes_update(self):
+		print("TEST: 'test_trust_mtimes_update'")
+		state = Statecache(self.workspace_path)
+		gitrepo = Gitrepo(state=state, trust_mtimes=True)
+		self.assertEqual(gitrepo.status(self.repoconf)['status'], 'UP_TO_DATE')
+		repo = Repo(self.repoconf['path'])
+		head_commit = repo.head.commit.hexsha
+
+		# an edit in place changes no directory, so status can't see it...
+		tracked_file = [entry.path for entry in repo.tree().traverse() if entry.type == 'blob'][0]
+		with open(os.path.join(self.repoconf['path'], tracked_file), 'a') as f_tracked:
+			f_tracked.write('local change\n')
+		push_new_commit(self.remotes['standard_repo'], 'main', 'new-file.txt', 'new\n')
+		self.assertEqual(gitrepo.status(self.repoconf)['status'], 'PENDING_UPDATE')
+
+		# ...but the working tree is never changed without asking git first
+		result = gitrepo.update(self.repoconf)
+		print(str(result))
+		self.assertEqual(result['status'], 'DIRTY')
+		self.assertNotIn('to', result)
+		self.assertEqual(repo.head.commit.hexsha, head_commit)
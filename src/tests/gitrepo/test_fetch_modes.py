@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+# Tests the Gitrepo class: offline and cached fetch modes
+
+# Import stuff
+from .test_gitrepo import TestGitrepo
+
+import os
+from unittest import mock
+from git import Git, Repo
+from git_scaffold import push_new_commit
+
+from multigit import Gitrepo, Remoteprobe
+
+# Subclasses so it gets parent's setUp and tearDown
+class TestGitrepoFetchModes(TestGitrepo):
+	
+	def test_offline_status(self):
+		print("TEST: 'test_offline_status'")
+		# prepares a suitable configuration
+		repoconf = {}
+		repoconf['repo'] = self.remotes['simplest_repo']
+		repoconf['path'] = os.path.join(self.scenarios_path, 'standard/simplest-git-subrepos')
+		
+		# First, let's clone the repo and move its remote ahead
+		result = self.gitrepo.update(repoconf)
+		push_new_commit(self.remotes['simplest_repo'], 'master', 'new-file.txt', 'new\n')
+		
+		# Offline, the new remote commit can't be seen...
+		result = Gitrepo(fetch=False).status(repoconf)
+		print(str(result))
+		self.assertEqual(result['status'], 'UP_TO_DATE')
+		# ...while a regular status finds it
+		result = self.gitrepo.status(repoconf)
+		print(str(result))
+		self.assertEqual(result['status'], 'PENDING_UPDATE')
+		
+		
+	def test_max_fetch_age(self):
+		print("TEST: 'test_max_fetch_age'")
+		# prepares a suitable configuration
+		repoconf = {}
+		repoconf['repo'] = self.remotes['simplest_repo']
+		repoconf['path'] = os.path.join(self.scenarios_path, 'standard/simplest-git-subrepos')
+		
+		# Clone the repo and fetch it once, then move its remote ahead
+		result = self.gitrepo.update(repoconf)
+		result = self.gitrepo.status(repoconf)
+		push_new_commit(self.remotes['simplest_repo'], 'master', 'new-file.txt', 'new\n')
+		
+		# A recent fetch is trusted...
+		result = Gitrepo(max_fetch_age=3600).status(repoconf)
+		print(str(result))
+		self.assertEqual(result['status'], 'UP_TO_DATE')
+		# ...while an older one isn't
+		result = Gitrepo(max_fetch_age=0).status(repoconf)
+		print(str(result))
+		self.assertEqual(result['status'], 'PENDING_UPDATE')
+		
+		
+	def test_probe_skips_fetch(self):
+		print("TEST: 'test_probe_skips_fetch'")
+		# prepares a suitable configuration
+		repoconf = {}
+		repoconf['repo'] = self.remotes['standard_repo']
+		repoconf['path'] = os.path.join(self.scenarios_path, 'standard/standard-repo')
+		repoconf['branch'] = 'a-branch'
+		repoconf['gitref_type'] = 'branch'
+		fetch_head = os.path.join(repoconf['path'], '.git', 'FETCH_HEAD')
+		
+		# A fresh clone has never been fetched, and an unchanged remote doesn't need it
+		result = self.gitrepo.update(repoconf)
+		result = Gitrepo(remote_probe=Remoteprobe()).status(repoconf)
+		print(str(result))
+		self.assertEqual(result['status'], 'UP_TO_DATE')
+		self.assertFalse(os.path.exists(fetch_head))
+		
+		# Once the requested branch moves, it gets fetched
+		push_new_commit(self.remotes['standard_repo'], 'a-branch', 'new-file.txt', 'new\n')
+		result = Gitrepo(remote_probe=Remoteprobe()).status(repoconf)
+		print(str(result))
+		self.assertEqual(result['status'], 'PENDING_UPDATE')
+		self.assertTrue(os.path.exists(fetch_head))
+		
+		
+	def test_probe_requests_only_gitref(self):
+		print("TEST: 'test_probe_requests_only_gitref'")
+		remote = Repo(self.remotes['standard_repo'])
+		with remote.config_writer() as config:
+			config.set_value('user', 'name', 'multigit-tests')
+			config.set_value('user', 'email', 'multigit-tests@example.com')
+		remote.create_tag('v1.0', ref='main', message='annotated')
+		gitrefs = {
+			'default': {'gitref_type': None},
+			'tag': {'gitref_type': 'tag', 'tag': 'v1.0'},
+		}
+		for path, repoconf in gitrefs.items():
+			repoconf['repo'] = self.remotes['standard_repo']
+			repoconf['path'] = os.path.join(self.scenarios_path, 'standard', path)
+			self.assertEqual(self.gitrepo.update(repoconf)['status'], 'CLONED')
+			
+		# Unchanged gitrefs (an annotated tag is compared by its peeled commit) are found with no fetch...
+		with mock.patch.object(Git, 'execute', autospec=True, side_effect=Git.execute) as git_execute:
+			statuses = {path: Gitrepo(remote_probe=Remoteprobe()).status(repoconf)['status'] for path, repoconf in gitrefs.items()}
+		print(str(statuses))
+		self.assertEqual(statuses, {'default': 'UP_TO_DATE', 'tag': 'UP_TO_DATE'})
+		commands = [call.args[1][1:] for call in git_execute.call_args_list]
+		self.assertNotIn('fetch', [command[0] for command in commands])
+		# ...and only asking the remote for them
+		self.assertEqual(
+			[command for command in commands if command[0] == 'ls-remote'],
+			[
+				['ls-remote', '--symref', 'origin', 'HEAD'],
+				['ls-remote', '--symref', 'origin', 'refs/tags/v1.0', 'refs/tags/v1.0^{}'],
+			]
+		)
+		
+		# Gitrefs expected from the same remote are all asked for at once, and the answer shared
+		with mock.patch.object(Git, 'execute', autospec=True, side_effect=Git.execute) as git_execute:
+			gitrepo = Gitrepo(remote_probe=Remoteprobe())
+			gitrepo.expect(gitrefs.values())
+			statuses = {path: gitrepo.status(repoconf)['status'] for path, repoconf in gitrefs.items()}
+		print(str(statuses))
+		self.assertEqual(statuses, {'default': 'UP_TO_DATE', 'tag': 'UP_TO_DATE'})
+		commands = [call.args[1][1:] for call in git_execute.call_args_list]
+		self.assertEqual(
+			[command for command in commands if command[0] == 'ls-remote'],
+			[['ls-remote', '--symref', 'origin', 'HEAD', 'refs/tags/v1.0', 'refs/tags/v1.0^{}']]
+		)
+		
+		
+	def test_immutable_pins(self):
+		print("TEST: 'test_immutable_pins'")
+		remote = Repo(self.remotes['standard_repo'])
+		remote.create_tag('v1.0', ref='main')
+		pins = {
+			'commit': {'gitref_type': 'commit', 'commit': remote.commit('main').hexsha},
+			'abbreviated-commit': {'gitref_type': 'commit', 'commit': remote.commit('main').hexsha[:10]},
+			'tag': {'gitref_type': 'tag', 'tag': 'v1.0'},
+			'immutable-tag': {'gitref_type': 'tag', 'tag': 'v1.0', 'immutable': True},
+		}
+		for path, repoconf in pins.items():
+			repoconf['repo'] = self.remotes['standard_repo']
+			repoconf['path'] = os.path.join(self.scenarios_path, 'standard', path)
+			result = self.gitrepo.update(repoconf)
+			self.assertEqual(result['status'], 'CLONED')
+			
+		# With its remote gone, only immutable gitrefs can still be resolved
+		os.rename(self.remotes['standard_repo'], self.remotes['standard_repo'] + '.away')
+		try:
+			statuses = {path: self.gitrepo.status(repoconf)['status'] for path, repoconf in pins.items()}
+			print(str(statuses))
+			self.assertEqual(statuses, {
+				'commit': 'UP_TO_DATE',
+				'abbreviated-commit': 'ERROR',
+				'tag': 'ERROR',
+				'immutable-tag': 'UP_TO_DATE',
+			})
+			# ...and every tag is, if told so
+			result = Gitrepo(immutable_tags=True).status(pins['tag'])
+			self.assertEqual(result['status'], 'UP_TO_DATE')
+		finally:
+			os.rename(self.remotes['standard_repo'] + '.away', self.remotes['standard_repo'])
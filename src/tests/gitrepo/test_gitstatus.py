@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# Tests the Gitstatus class
+
+# Import stuff
+import unittest
+from . import TESTS_PATH, PROJECT_PATH
+
+from multigit import Gitstatus
+
+class TestGitstatus(unittest.TestCase):
+	
+	def test_clean(self):
+		print("TEST: 'test_clean'")
+		local_status = Gitstatus("")
+		self.assertFalse(local_status.dirty)
+		
+		
+	def test_dirty(self):
+		print("TEST: 'test_dirty'")
+		local_status = Gitstatus(
+			"1 .M N... 100644 100644 100644 3f2a 3f2a README.md\n"
+		)
+		self.assertTrue(local_status.dirty)
+		
+		
+	def test_unmerged(self):
+		print("TEST: 'test_unmerged'")
+		local_status = Gitstatus(
+			"u UU N... 100644 100644 100644 100644 3f2a 4b1c 5d0e README.md\n"
+		)
+		self.assertTrue(local_status.dirty)
+		
+		
+if __name__ == '__main__':
+	unittest.main()
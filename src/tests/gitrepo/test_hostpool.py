@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+# Tests the Gitrepo class along the Hostpool class
+
+# Import stuff
+from .test_gitrepo import TestGitrepo
+
+import os, threading, time
+from unittest import mock
+from git import Repo
+from git_scaffold import write_fake_ssh
+
+from multigit import Gitrepo, Hostpool
+from multigit.hostpool import remote_host, is_ssh_url
+
+# Subclasses so it gets parent's setUp and tearDown
+class TestGitrepoHostpool(TestGitrepo):
+
+	def setUp(self):
+		super().setUp()
+		self.ssh_log = os.path.join(self.scenarios_path, 'ssh.log')
+		self.fake_ssh = write_fake_ssh(os.path.join(self.scenarios_path, 'fake-ssh'), self.ssh_log)
+
+
+	def test_remote_host(self):
+		print("TEST: 'test_remote_host'")
+		self.assertEqual(remote_host('https://user@GitHub.com:443/jmnavarrol/python-multigit.git'), 'github.com')
+		self.assertEqual(remote_host('ssh://git@[::1]:22/repo.git'), '::1')
+		self.assertEqual(remote_host('git@GitHub.com:jmnavarrol/python-multigit.git'), 'github.com')
+		self.assertIsNone(remote_host('file://' + self.remotes['standard_repo']))
+		self.assertIsNone(remote_host(self.remotes['standard_repo']))
+		self.assertTrue(is_ssh_url('git@github.com:jmnavarrol/python-multigit.git'))
+		self.assertTrue(is_ssh_url('ssh://git@github.com/jmnavarrol/python-multigit.git'))
+		self.assertFalse(is_ssh_url('https://github.com/jmnavarrol/python-multigit.git'))
+
+
+	def test_max_connections(self):
+		print("TEST: 'test_max_connections'")
+		hosts = Hostpool(max_connections=2)
+		lock = threading.Lock()
+		connections = {}
+		max_connections = {}
+
+		def connect(host, url):
+			with hosts.connection(url):
+				with lock:
+					connections[host] = connections.get(host, 0) + 1
+					max_connections[host] = max(max_connections.get(host, 0), connections[host])
+				time.sleep(0.05)
+				with lock:
+					connections[host] -= 1
+
+		threads = [
+			threading.Thread(target=connect, args=('example.com', f"https://example.com/repo-{i}.git"))
+			for i in range(6)
+		]
+		# local remotes are never capped
+		threads += [
+			threading.Thread(target=connect, args=(None, self.remotes['standard_repo']))
+			for i in range(4)
+		]
+		for thread in threads:
+			thread.start()
+		for thread in threads:
+			thread.join()
+		self.assertEqual(max_connections['example.com'], 2)
+		self.assertGreater(max_connections[None], 2)
+
+
+	def test_ssh_multiplexing(self):
+		print("TEST: 'test_ssh_multiplexing'")
+		repoconf = {
+			'repo': 'ssh://example.com' + self.remotes['standard_repo'],
+			'path': os.path.join(self.scenarios_path, 'standard', 'standard-repo'),
+			'gitref_type': 'branch',
+			'branch': 'main',
+		}
+		with mock.patch.dict(os.environ, {'GIT_SSH_COMMAND': self.fake_ssh}):
+			with Hostpool(max_connections=1) as hosts:
+				gitrepo = Gitrepo(hosts=hosts)
+				result = gitrepo.update(repoconf)
+				print(str(result))
+				self.assertEqual(result['status'], 'CLONED')
+				self.assertEqual(gitrepo.status(repoconf)['status'], 'UP_TO_DATE')
+
+		with open(self.ssh_log, 'r') as f_ssh_log:
+			ssh_calls = [line for line in f_ssh_log.read().splitlines() if 'upload-pack' in line]
+		print(str(ssh_calls))
+		# both the clone and the fetch went through the host's master
+		self.assertEqual(len(ssh_calls), 2)
+		for ssh_call in ssh_calls:
+			self.assertIn('-o ControlMaster=auto', ssh_call)
+			self.assertIn('ControlPath=', ssh_call)
+
+
+	def test_ssh_multiplexing_disabled(self):
+		print("TEST: 'test_ssh_multiplexing_disabled'")
+		with mock.patch.dict(os.environ, {'GIT_SSH': self.fake_ssh}):
+			with Hostpool() as hosts:
+				with hosts.connection('git@example.com:repo.git') as env:
+					self.assertEqual(env, {})
+		with Hostpool(ssh_multiplexing=False) as hosts:
+			with hosts.connection('git@example.com:repo.git') as env:
+				self.assertEqual(env, {})
+
+
+	def test_ssh_command_configured(self):
+		print("TEST: 'test_ssh_command_configured'")
+		# (isolated from the user's own ssh settings)
+		environ = {key: value for key, value in os.environ.items() if key not in ('GIT_SSH', 'GIT_SSH_COMMAND')}
+		environ['GIT_CONFIG_GLOBAL'] = os.devnull
+		# core.sshCommand set globally...
+		with mock.patch.dict(os.environ, dict(
+			environ,
+			GIT_CONFIG_COUNT='1',
+			GIT_CONFIG_KEY_0='core.sshCommand',
+			GIT_CONFIG_VALUE_0='ssh -i some-key',
+		), clear=True):
+			with Hostpool() as hosts:
+				with hosts.connection('git@example.com:repo.git') as env:
+					self.assertEqual(env, {})
+
+		# ...or by the repo itself, is honored
+		with mock.patch.dict(os.environ, environ, clear=True):
+			repoconf = {
+				'repo': self.remotes['standard_repo'],
+				'path': os.path.join(self.scenarios_path, 'standard', 'standard-repo'),
+				'gitref_type': 'branch',
+				'branch': 'main',
+			}
+			self.gitrepo.update(repoconf)
+			repo = Repo(repoconf['path'])
+			with Hostpool() as hosts:
+				with hosts.connection('git@example.com:repo.git', repo) as env:
+					self.assertIn('GIT_SSH_COMMAND', env)
+				with repo.config_writer() as config:
+					config.set_value('core', 'sshCommand', 'ssh -o ProxyJump=bastion')
+				with hosts.connection('git@example.com:repo.git', repo) as env:
+					self.assertEqual(env, {})
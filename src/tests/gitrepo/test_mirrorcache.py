@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# Tests the Gitrepo class along the Mirrorcache class
+
+# Import stuff
+from .test_gitrepo import TestGitrepo
+
+import os
+from unittest import mock
+from git import Git, Repo
+
+from multigit import Bundlearchive, Gitrepo, Mirrorcache
+from multigit.mirrorcache import normalize_url
+
+# Subclasses so it gets parent's setUp and tearDown
+class TestGitrepoMirrorcache(TestGitrepo):
+
+	def setUp(self):
+		super().setUp()
+		self.workspace_path = os.path.join(self.scenarios_path, 'standard')
+		self.mirrors = Mirrorcache(self.workspace_path)
+
+
+	def test_normalize_url(self):
+		print("TEST: 'test_normalize_url'")
+		self.assertEqual(
+			normalize_url('HTTPS://GitHub.com/jmnavarrol/python-multigit.git/'),
+			'https://github.com/jmnavarrol/python-multigit'
+		)
+		self.assertEqual(
+			normalize_url('git@GitHub.com:jmnavarrol/python-multigit.git'),
+			'git@github.com:jmnavarrol/python-multigit'
+		)
+		self.assertEqual(normalize_url(self.remotes['standard_repo'] + '/'), normalize_url(self.remotes['standard_repo']))
+
+
+	def test_shared_mirror(self):
+		print("TEST: 'test_shared_mirror'")
+		gitrepo = Gitrepo(mirrors=self.mirrors)
+		alternates = []
+		for path, branch in (('main-repo', 'main'), ('branch-repo', 'a-branch')):
+			repoconf = {
+				'repo': self.remotes['standard_repo'],
+				'path': os.path.join(self.workspace_path, path),
+				'gitref_type': 'branch',
+				'branch': branch,
+			}
+			result = gitrepo.update(repoconf)
+			self.assertEqual(result['status'], 'CLONED')
+			with open(os.path.join(repoconf['path'], '.git', 'objects', 'info', 'alternates'), 'r') as f_alternates:
+				alternates.append(f_alternates.read().strip())
+
+		# both clones borrow their objects from the same and only mirror
+		mirrors_dir = os.path.join(self.workspace_path, '.multigit', 'mirrors')
+		self.assertEqual(len(os.listdir(mirrors_dir)), 1)
+		self.assertEqual(alternates[0], alternates[1])
+		self.assertTrue(alternates[0].startswith(mirrors_dir))
+		self.assertEqual(
+			Repo(os.path.join(self.workspace_path, 'branch-repo')).active_branch.name,
+			'a-branch'
+		)
+
+		# and they still work as usual
+		self.assertEqual(gitrepo.status(repoconf)['status'], 'UP_TO_DATE')
+
+
+	def test_mirror_refs(self):
+		print("TEST: 'test_mirror_refs'")
+		remote = Repo(self.remotes['standard_repo'])
+		# i.e. GitHub's pull request heads
+		remote.git.update_ref('refs/pull/1/head', 'main')
+		mirror = Repo(self.mirrors.mirror(self.remotes['standard_repo']))
+		self.assertEqual(
+			mirror.git.config('--get-all', 'remote.origin.fetch').splitlines(),
+			['+refs/heads/*:refs/heads/*', '+refs/tags/*:refs/tags/*']
+		)
+		# only branches and tags are mirrored, and refreshed by later runs
+		remote.create_head('new-branch', 'main')
+		mirror = Repo(Mirrorcache(self.workspace_path).mirror(self.remotes['standard_repo']))
+		refnames = mirror.git.for_each_ref('--format=%(refname)').splitlines()
+		print(str(refnames))
+		self.assertIn('refs/heads/new-branch', refnames)
+		self.assertEqual([refname for refname in refnames if not refname.startswith(('refs/heads/', 'refs/tags/'))], [])
+
+
+	def test_mirror_from_bundle(self):
+		print("TEST: 'test_mirror_from_bundle'")
+		repoconf = {
+			'repo': self.remotes['standard_repo'],
+			'path': os.path.join(self.workspace_path, 'standard-repo'),
+			'gitref_type': None,
+		}
+		self.assertEqual(self.gitrepo.update(repoconf)['status'], 'CLONED')
+		archive_file = os.path.join(self.scenarios_path, 'mirror.bundles')
+		Bundlearchive(archive_file).export([repoconf])
+		
+		# by the time the remote is fetched, the mirror already has the bundle's branches and tags
+		seeded_refs = []
+		execute = Git.execute
+		
+		def recorded_execute(git, command, **kwargs):
+			if command[1:] == ['fetch', '--prune', 'origin']:
+				seeded_refs.extend(execute(git, ['git', 'for-each-ref', '--format=%(refname)']).splitlines())
+			return execute(git, command, **kwargs)
+			
+		mirrors = Mirrorcache(os.path.join(self.scenarios_path, 'bootstrap'), bundles=Bundlearchive(archive_file))
+		with mock.patch.object(Git, 'execute', autospec=True, side_effect=recorded_execute):
+			mirrors.mirror(self.remotes['standard_repo'])
+		print(str(seeded_refs))
+		self.assertIn('refs/heads/main', seeded_refs)
+		self.assertIn('refs/heads/a-branch', seeded_refs)
+		
+		
+	def test_mirror_failure(self):
+		print("TEST: 'test_mirror_failure'")
+		repoconf = {
+			'repo': os.path.join(self.remotes_path, 'nonexistent-repo'),
+			'path': os.path.join(self.workspace_path, 'nonexistent-repo'),
+			'gitref_type': None,
+		}
+		# the clone itself reports the error
+		result = Gitrepo(mirrors=self.mirrors).update(repoconf)
+		self.assertEqual(result['status'], 'ERROR')
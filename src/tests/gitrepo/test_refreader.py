@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# Tests the Refreader class
+
+# Import stuff
+from .test_gitrepo import TestGitrepo
+
+import os
+from git import Repo
+
+from multigit import Refreader
+
+# Subclasses so it gets parent's setUp and tearDown
+class TestRefreader(TestGitrepo):
+	
+	def setUp(self):
+		super().setUp()
+		# prepares a clone with both lightweight and annotated tags
+		self.repo = Repo.clone_from(
+			self.remotes['standard_repo'],
+			os.path.join(self.scenarios_path, 'standard/standard-repo'),
+		)
+		with self.repo.config_writer() as config:
+			config.set_value('user', 'name', 'multigit-tests')
+			config.set_value('user', 'email', 'multigit-tests@example.com')
+		self.repo.git.tag('lightweight')
+		self.repo.git.tag('-a', 'annotated', '-m', 'annotated tag')
+		
+		
+	def __check_refs(self, refs):
+		head_commit = self.repo.git.rev_parse('HEAD')
+		self.assertEqual(refs.symref('HEAD'), 'refs/heads/main')
+		self.assertEqual(refs.resolve('HEAD'), head_commit)
+		self.assertEqual(refs.symref('refs/remotes/origin/HEAD'), 'refs/remotes/origin/main')
+		self.assertEqual(
+			refs.commit('refs/remotes/origin/a-branch'),
+			self.repo.git.rev_parse('origin/a-branch')
+		)
+		self.assertEqual(refs.commit('refs/tags/lightweight'), head_commit)
+		self.assertEqual(refs.commit('refs/tags/annotated'), head_commit)
+		self.assertNotEqual(refs.resolve('refs/tags/annotated'), head_commit)
+		self.assertIsNone(refs.resolve('refs/remotes/origin/non-existent'))
+		# abbreviated commits are resolved by git
+		self.assertEqual(refs.commit(head_commit[:10]), head_commit)
+		self.assertIsNone(refs.commit('0' * 40))
+		
+		
+	def test_loose_refs(self):
+		print("TEST: 'test_loose_refs'")
+		self.__check_refs(Refreader(self.repo))
+		
+		
+	def test_packed_refs(self):
+		print("TEST: 'test_packed_refs'")
+		refs = Refreader(self.repo)
+		self.__check_refs(refs)
+		# the packed-refs index is rebuilt once the file changes
+		self.repo.git.pack_refs('--all', '--prune')
+		self.assertFalse(
+			os.path.exists(os.path.join(self.repo.git_dir, 'refs/tags/annotated'))
+		)
+		self.__check_refs(refs)
+		self.__check_refs(Refreader(self.repo))
@@ -5,7 +5,11 @@
 from .test_gitrepo import TestGitrepo
 
 import os
-from git import Repo
+from unittest import mock
+from git import Git, Repo
+from git_scaffold import push_new_commit
+
+from multigit import Gitrepo, Remoteprobe
 
 # Subclasses so it gets parent's setUp and tearDown
 class TestGitrepoRemote(TestGitrepo):
@@ -43,3 +47,51 @@ class TestGitrepoRemote(TestGitrepo):
 		
 		# Cleansing: delete remote branch
 		repo.git.push('origin', ':test_commit')
+		
+		
+	def test_fast_forward_behind_branch(self):
+		print("TEST: 'test_fast_forward_behind_branch'")
+		# prepares a suitable configuration
+		repoconf = {}
+		repoconf['repo'] = self.remotes['simplest_repo']
+		repoconf['path'] = os.path.join(self.scenarios_path, 'standard/simplest-git-subrepos')
+		repoconf['branch'] = 'python-example'
+		repoconf['gitref_type'] = 'branch'
+		
+		# First, let's clone the repo and move its branch one commit behind its remote
+		result = self.gitrepo.update(repoconf)
+		repo = Repo(repoconf['path'])
+		repo.git.reset('--hard', 'HEAD~1')
+		
+		# The update fast-forwards it to the remote's tip
+		result = self.gitrepo.update(repoconf)
+		print(str(result))
+		self.assertEqual(result['status'], 'UPDATED')
+		self.assertEqual(
+			repo.head.commit.hexsha,
+			repo.commit('origin/python-example').hexsha
+		)
+		
+		
+	def test_single_fetch_per_update(self):
+		print("TEST: 'test_single_fetch_per_update'")
+		# prepares a suitable configuration
+		repoconf = {}
+		repoconf['repo'] = self.remotes['standard_repo']
+		repoconf['path'] = os.path.join(self.scenarios_path, 'standard/standard-repo')
+		repoconf['branch'] = 'main'
+		repoconf['gitref_type'] = 'branch'
+		self.assertEqual(self.gitrepo.update(repoconf)['status'], 'CLONED')
+		
+		# Both with and without a remote probe, an update needing the remote's new commit
+		# finds it while checking the status, and reaches the network just once for it
+		for probe in (None, Remoteprobe()):
+			push_new_commit(self.remotes['standard_repo'], 'main', f"new-file-{probe is None}.txt", 'new\n')
+			with mock.patch.object(Git, 'execute', autospec=True, side_effect=Git.execute) as git_execute:
+				result = Gitrepo(remote_probe=probe).update(repoconf)
+			print(str(result))
+			self.assertEqual(result['status'], 'UPDATED')
+			subcommands = [call.args[1][1] for call in git_execute.call_args_list]
+			self.assertEqual(subcommands.count('fetch'), 1)
+			self.assertEqual(subcommands.count('ls-remote'), 0 if probe is None else 1)
+			self.assertNotIn('pull', subcommands)
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+# Tests the Gitrepo class along the Retrypolicy class
+
+# Import stuff
+from .test_gitrepo import TestGitrepo
+
+import os
+from unittest import mock
+from git import exc as git_exception
+from git_scaffold import write_fake_ssh
+
+from multigit import Gitrepo, Retrypolicy
+
+TIMEOUT = git_exception.GitCommandError(
+	['git', 'fetch'], 128,
+	stderr="ssh: connect to host example.com port 22: Connection timed out\nfatal: Could not read from remote repository."
+)
+NOT_FOUND = git_exception.GitCommandError(
+	['git', 'clone'], 128,
+	stderr="fatal: Remote branch non-existant not found in upstream origin"
+)
+
+# Subclasses so it gets parent's setUp and tearDown
+class TestGitrepoRetrypolicy(TestGitrepo):
+
+	def setUp(self):
+		super().setUp()
+		self.retry = Retrypolicy(retries=2, delay=0.01, max_delay=0.02)
+
+
+	def test_transient_errors(self):
+		print("TEST: 'test_transient_errors'")
+		operation = mock.Mock(side_effect=[TIMEOUT, TIMEOUT, 'done'])
+		self.assertEqual(self.retry.run(operation), 'done')
+		self.assertEqual(operation.call_count, 3)
+
+		# retries are bounded...
+		operation = mock.Mock(side_effect=TIMEOUT)
+		with self.assertRaises(git_exception.GitCommandError):
+			self.retry.run(operation)
+		self.assertEqual(operation.call_count, 3)
+
+		# ...and other errors aren't retried at all
+		operation = mock.Mock(side_effect=NOT_FOUND)
+		with self.assertRaises(git_exception.GitCommandError):
+			self.retry.run(operation)
+		self.assertEqual(operation.call_count, 1)
+
+
+	def test_backoff(self):
+		print("TEST: 'test_backoff'")
+		retry = Retrypolicy(delay=1.0, max_delay=5.0)
+		for attempt, max_delay in enumerate((1.0, 2.0, 4.0, 5.0, 5.0)):
+			backoff = retry.backoff(attempt)
+			self.assertGreaterEqual(backoff, max_delay / 2)
+			self.assertLessEqual(backoff, max_delay)
+
+
+	def test_retried_clone(self):
+		print("TEST: 'test_retried_clone'")
+		ssh_log = os.path.join(self.scenarios_path, 'ssh.log')
+		fake_ssh = write_fake_ssh(os.path.join(self.scenarios_path, 'fake-ssh'), ssh_log, failures=1)
+		repoconf = {
+			'repo': 'ssh://example.com' + self.remotes['standard_repo'],
+			'path': os.path.join(self.scenarios_path, 'standard', 'standard-repo'),
+			'gitref_type': 'branch',
+			'branch': 'main',
+		}
+		with mock.patch.dict(os.environ, {'GIT_SSH_COMMAND': fake_ssh}):
+			# with no retries, the first connection's timeout is an error...
+			result = Gitrepo().update(dict(repoconf))
+			print(str(result))
+			self.assertEqual(result['status'], 'ERROR')
+			self.assertIn('Connection timed out', result['extra_info'])
+
+			# ...which a retry overcomes
+			os.remove(ssh_log)
+			result = Gitrepo(retry=self.retry).update(dict(repoconf))
+			print(str(result))
+			self.assertEqual(result['status'], 'CLONED')
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# Tests the Gitrepo class: shallow and partial clones
+
+# Import stuff
+from .test_gitrepo import TestGitrepo
+
+import os
+from unittest import mock
+from git import Git, Repo
+from git_scaffold import push_new_commit
+
+from multigit import Gitrepo
+
+# Subclasses so it gets parent's setUp and tearDown
+class TestGitrepoShallowClones(TestGitrepo):
+
+	def setUp(self):
+		super().setUp()
+		# local clones ignore --depth unless they go through a transport
+		self.remote_path = self.remotes['standard_repo']
+		self.remote_url = 'file://' + self.remote_path
+		push_new_commit(self.remote_path, 'main', 'first-file.txt', 'first\n')
+		push_new_commit(self.remote_path, 'main', 'second-file.txt', 'second\n')
+
+
+	def __history_length(self, path):
+		return int(Repo(path).git.rev_list('--count', 'HEAD'))
+
+
+	def test_shallow_branch(self):
+		print("TEST: 'test_shallow_branch'")
+		repoconf = {
+			'repo': self.remote_url,
+			'path': os.path.join(self.scenarios_path, 'standard', 'standard-repo'),
+			'gitref_type': 'branch',
+			'branch': 'main',
+			'depth': 1,
+		}
+		result = self.gitrepo.update(repoconf)
+		print(str(result))
+		self.assertEqual(result['status'], 'CLONED')
+		self.assertEqual(self.__history_length(repoconf['path']), 1)
+
+		# updates stay shallow
+		push_new_commit(self.remote_path, 'main', 'third-file.txt', 'third\n')
+		result = self.gitrepo.update(repoconf)
+		print(str(result))
+		self.assertEqual(result['status'], 'UPDATED')
+		self.assertEqual(
+			Repo(repoconf['path']).head.commit.hexsha,
+			Repo(self.remote_path).commit('main').hexsha
+		)
+		self.assertTrue(os.path.isfile(os.path.join(repoconf['path'], '.git', 'shallow')))
+
+
+	def test_shallow_commit(self):
+		print("TEST: 'test_shallow_commit'")
+		commit = Repo(self.remote_path).commit('main~1').hexsha
+		repoconf = {
+			'repo': self.remote_url,
+			'path': os.path.join(self.scenarios_path, 'standard', 'standard-repo'),
+			'gitref_type': 'commit',
+			'commit': commit,
+		}
+		# the global default applies
+		gitrepo = Gitrepo(depth=1)
+		result = gitrepo.update(repoconf)
+		print(str(result))
+		self.assertEqual(result['status'], 'CLONED')
+		self.assertEqual(Repo(repoconf['path']).head.commit.hexsha, commit)
+		self.assertEqual(self.__history_length(repoconf['path']), 1)
+		self.assertEqual(gitrepo.status(repoconf)['status'], 'UP_TO_DATE')
+
+
+	def test_partial_clone(self):
+		print("TEST: 'test_partial_clone'")
+		Repo(self.remote_path).git.config('uploadpack.allowFilter', 'true')
+		repoconf = {
+			'repo': self.remote_url,
+			'path': os.path.join(self.scenarios_path, 'standard', 'standard-repo'),
+			'gitref_type': None,
+			'filter': 'blob:none',
+		}
+		result = self.gitrepo.update(repoconf)
+		print(str(result))
+		self.assertEqual(result['status'], 'CLONED')
+		self.assertEqual(
+			Repo(repoconf['path']).git.config('--get', 'remote.origin.partialclonefilter'),
+			'blob:none'
+		)
+		self.assertEqual(self.gitrepo.status(repoconf)['status'], 'UP_TO_DATE')
+
+
+	def test_shallow_commit_fallback(self):
+		print("TEST: 'test_shallow_commit_fallback'")
+		remote = Repo(self.remote_path)
+		repoconf = {
+			'repo': self.remote_url,
+			'path': os.path.join(self.scenarios_path, 'standard', 'standard-repo'),
+			'gitref_type': 'commit',
+			'commit': remote.commit('main~1').hexsha,
+			'depth': 1,
+		}
+		self.assertEqual(self.gitrepo.update(repoconf)['status'], 'CLONED')
+		
+		# other errors than an unadvertised commit are reported, not turned into a full history download...
+		execute = Git.execute
+		push_new_commit(self.remote_path, 'main', 'third-file.txt', 'third\n')
+		repoconf['commit'] = remote.commit('main').hexsha
+		os.rename(self.remote_path, self.remote_path + '.away')
+		try:
+			with mock.patch.object(Git, 'execute', autospec=True, side_effect=execute) as git_execute:
+				result = self.gitrepo.update(repoconf)
+		finally:
+			os.rename(self.remote_path + '.away', self.remote_path)
+		print(str(result))
+		self.assertEqual(result['status'], 'ERROR')
+		self.assertFalse([call for call in git_execute.call_args_list if '--unshallow' in call.args[1]])
+		self.assertEqual(self.__history_length(repoconf['path']), 1)
+		
+		# ...while abbreviated commits, which can't be fetched by themselves, still get one
+		repoconf['commit'] = remote.commit('main').hexsha[:12]
+		result = self.gitrepo.update(repoconf)
+		print(str(result))
+		self.assertEqual(result['status'], 'UPDATED')
+		self.assertEqual(self.__history_length(repoconf['path']), int(remote.git.rev_list('--count', 'main')))
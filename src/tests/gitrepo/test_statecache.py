@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+# Tests the Gitrepo class along the Statecache class
+
+# Import stuff
+from .test_gitrepo import TestGitrepo
+
+import os
+from git import Repo
+
+from multigit import Gitrepo, Remoteprobe, Statecache
+
+# Subclasses so it gets parent's setUp and tearDown
+class TestGitrepoStatecache(TestGitrepo):
+	
+	def setUp(self):
+		super().setUp()
+		self.workspace_path = os.path.join(self.scenarios_path, 'standard')
+		# prepares a suitable configuration
+		self.repoconf = {}
+		self.repoconf['repo'] = self.remotes['simplest_repo']
+		self.repoconf['path'] = os.path.join(self.workspace_path, 'simplest-git-subrepos')
+		self.gitrepo.update(self.repoconf)
+		
+		
+	def test_state_persisted(self):
+		print("TEST: 'test_state_persisted'")
+		state = Statecache(self.workspace_path)
+		result = Gitrepo(state=state).status(self.repoconf)
+		self.assertEqual(result['status'], 'UP_TO_DATE')
+		state.save()
+		
+		# A new run gets the recorded state back
+		state = Statecache(self.workspace_path)
+		known_state = state.get(self.repoconf['path'])
+		print(str(known_state))
+		self.assertIn('fetch_time', known_state)
+		self.assertTrue(
+			os.path.isfile(os.path.join(self.workspace_path, '.multigit', '.gitignore'))
+		)
+		
+		
+	def test_probe_time_honored(self):
+		print("TEST: 'test_probe_time_honored'")
+		state = Statecache(self.workspace_path)
+		gitrepo = Gitrepo(max_fetch_age=3600, remote_probe=Remoteprobe(), state=state)
+		fetch_head = os.path.join(self.repoconf['path'], '.git', 'FETCH_HEAD')
+		
+		# A probe finding nothing new doesn't fetch (so FETCH_HEAD isn't written)...
+		result = gitrepo.status(self.repoconf)
+		self.assertEqual(result['status'], 'UP_TO_DATE')
+		self.assertFalse(os.path.exists(fetch_head))
+		
+		# ...but the state remembers the remote was checked, so it isn't reached again
+		os.rename(self.remotes['simplest_repo'], self.remotes['simplest_repo'] + '.away')
+		try:
+			result = Gitrepo(max_fetch_age=3600, remote_probe=Remoteprobe(), state=state).status(self.repoconf)
+			print(str(result))
+			self.assertEqual(result['status'], 'UP_TO_DATE')
+			# (with no state, it would be)
+			result = Gitrepo(max_fetch_age=3600, remote_probe=Remoteprobe()).status(self.repoconf)
+			self.assertEqual(result['status'], 'ERROR')
+		finally:
+			os.rename(self.remotes['simplest_repo'] + '.away', self.remotes['simplest_repo'])
+			
+			
+	def test_corrupted_state(self):
+		print("TEST: 'test_corrupted_state'")
+		os.makedirs(os.path.join(self.workspace_path, '.multigit'))
+		with open(os.path.join(self.workspace_path, '.multigit', 'state'), 'w') as f:
+			f.write('{not json')
+		state = Statecache(self.workspace_path)
+		self.assertEqual(state.get(self.repoconf['path']), {})
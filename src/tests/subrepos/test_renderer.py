@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+# Tests the Renderer class
+
+# Import stuff
+import unittest
+import json, threading, time
+from io import StringIO
+from . import TESTS_PATH, PROJECT_PATH
+
+from multigit import Outputformat, Renderer, Subrepoentry
+from multigit.outputformats import FORMATS
+
+class SlowStream(StringIO):
+	'''A stream taking its time to write, like a slow terminal.'''
+	
+	def __init__(self):
+		super().__init__()
+		self.writes = 0
+		
+	def write(self, output):
+		time.sleep(0.05)
+		self.writes += 1
+		return super().write(output)
+		
+		
+class BrokenStream(StringIO):
+	'''A stream whose reader went away, like a closed pipe.'''
+	
+	def write(self, output):
+		raise BrokenPipeError(32, 'Broken pipe')
+		
+		
+class PathsFormat(Outputformat):
+	'''A format of our own, listing paths between brackets.'''
+	
+	def header(self):
+		return '<'
+		
+	def format(self, subrepo):
+		return subrepo['path'] + ';'
+		
+	def footer(self):
+		return '>'
+		
+		
+class TestRenderer(unittest.TestCase):
+	
+	def setUp(self):
+		self.subrepos = [
+			Subrepoentry({'path': '/workspace/a', 'repo': 'a.git', 'gitref_type': None, 'status': 'CLONED'}),
+			Subrepoentry({
+				'path': '/workspace/b', 'repo': 'b.git', 'gitref_type': 'branch', 'branch': 'main',
+				'status': 'PENDING_UPDATE', 'from': 'old', 'to': 'main',
+			}),
+			Subrepoentry({
+				'path': '/workspace/c', 'repo': 'c.git', 'gitref_type': None,
+				'status': 'ERROR', 'extra_info': "fatal: repository 'c.git' does not exist\nplease check",
+			}),
+		]
+		
+		
+	def __render(self, output_format):
+		'''Renders the subrepos, returning the output.'''
+		output = StringIO()
+		with Renderer(output_format, output) as renderer:
+			for subrepo in self.subrepos:
+				renderer.render(subrepo)
+		return output.getvalue()
+		
+		
+	def test_formats(self):
+		print("TEST: 'test_formats'")
+		text = self.__render('text')
+		self.assertIn("'/workspace/b':", text)
+		self.assertIn("pending updates:", text)
+		self.assertIn("\t\tplease check", text)
+		
+		compact = self.__render('compact').splitlines()
+		self.assertEqual(len(compact), 3)
+		self.assertIn("/workspace/b: 'old' -> 'main'", compact[1])
+		self.assertIn("/workspace/c: fatal: repository 'c.git' does not exist please check", compact[2])
+		
+		quiet = self.__render('quiet').splitlines()
+		self.assertEqual(len(quiet), 1)
+		self.assertIn('/workspace/c', quiet[0])
+		
+		records = json.loads(self.__render('json'))
+		self.assertEqual([record['status'] for record in records], ['CLONED', 'PENDING_UPDATE', 'ERROR'])
+		self.assertEqual(json.loads(self.__render('ndjson').splitlines()[1])['to'], 'main')
+		self.subrepos = []
+		self.assertEqual(json.loads(self.__render('json')), [])
+		
+		with self.assertRaises(ValueError):
+			Renderer('yaml')
+			
+			
+	def test_format_registry(self):
+		print("TEST: 'test_format_registry'")
+		self.assertEqual(list(FORMATS), ['text', 'compact', 'json', 'ndjson', 'quiet'])
+		
+		# registered formats are available by name
+		FORMATS['paths'] = PathsFormat
+		try:
+			self.assertEqual(self.__render('paths'), '</workspace/a;/workspace/b;/workspace/c;>')
+		finally:
+			del FORMATS['paths']
+		with self.assertRaises(ValueError):
+			Renderer('paths')
+			
+			
+	def test_parallel_rendering(self):
+		print("TEST: 'test_parallel_rendering'")
+		output = SlowStream()
+		renderer = Renderer('ndjson', output)
+		
+		def render_all(worker):
+			for index in range(50):
+				renderer.render({'path': f"/workspace/{worker}-{index}", 'status': 'UP_TO_DATE'})
+				
+		# rendering never waits for the stream...
+		start = time.perf_counter()
+		workers = [threading.Thread(target=render_all, args=(worker,)) for worker in range(4)]
+		for worker in workers:
+			worker.start()
+		for worker in workers:
+			worker.join()
+		self.assertLess(time.perf_counter() - start, 0.05)
+		renderer.close()
+		
+		# ...which gets whole records, in batches
+		records = [json.loads(line) for line in output.getvalue().splitlines()]
+		self.assertEqual(len(records), 200)
+		self.assertEqual(len({record['path'] for record in records}), 200)
+		self.assertLess(output.writes, 20)
+		
+		
+	def test_write_errors(self):
+		print("TEST: 'test_write_errors'")
+		# the JSON array is opened right away, so the writer thread fails at once...
+		renderer = Renderer('json', BrokenStream())
+		deadline = time.monotonic() + 5
+		while renderer.error is None and time.monotonic() < deadline:
+			time.sleep(0.01)
+		self.assertIsInstance(renderer.error, BrokenPipeError)
+		# ...which stops rendering
+		with self.assertRaises(BrokenPipeError):
+			renderer.render(self.subrepos[0])
+		with self.assertRaises(BrokenPipeError):
+			renderer.close()
+			
+		# it never replaces an error already being raised, though
+		with self.assertRaises(KeyboardInterrupt):
+			with Renderer('ndjson', BrokenStream()) as renderer:
+				renderer.render(self.subrepos[0])
+				raise KeyboardInterrupt()
+		self.assertIsInstance(renderer.error, BrokenPipeError)
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# Tests the Subrepoentry class
+
+# Import stuff
+import unittest
+import json
+from . import TESTS_PATH, PROJECT_PATH
+
+from multigit import Repostatus, Subrepoentry
+
+class TestSubrepoentry(unittest.TestCase):
+	
+	def setUp(self):
+		self.entry = Subrepoentry({
+			'path': '/workspace/a',
+			'repo': 'https://git.example.com/a.git',
+			'gitref_type': 'branch',
+			'branch': 'main',
+		})
+		
+		
+	def test_dict_compatibility(self):
+		print("TEST: 'test_dict_compatibility'")
+		self.assertEqual(self.entry['path'], self.entry.path)
+		self.assertEqual(list(self.entry), ['path', 'repo', 'gitref_type', 'branch'])
+		self.assertNotIn('tag', self.entry)
+		self.assertEqual(self.entry.get('tag'), None)
+		with self.assertRaises(KeyError):
+			self.entry['tag']
+			
+		self.entry.update({'status': 'UPDATED', 'from': 'abc', 'to': 'def'})
+		self.assertEqual(self.entry.from_, 'abc')
+		self.assertEqual(
+			self.entry,
+			{
+				'path': '/workspace/a',
+				'repo': 'https://git.example.com/a.git',
+				'gitref_type': 'branch',
+				'branch': 'main',
+				'status': 'UPDATED',
+				'from': 'abc',
+				'to': 'def',
+			}
+		)
+		del self.entry['from']
+		self.assertNotIn('from', self.entry)
+		self.assertEqual(len(self.entry), 6)
+		
+		# copies are independent
+		entry_copy = self.entry.copy()
+		entry_copy['branch'] = 'another'
+		self.assertEqual(self.entry['branch'], 'main')
+		
+		
+	def test_unknown_keys(self):
+		print("TEST: 'test_unknown_keys'")
+		self.entry['owner'] = 'team-a'
+		self.assertEqual(self.entry['owner'], 'team-a')
+		self.assertEqual(list(self.entry)[-1], 'owner')
+		self.assertEqual(dict(self.entry.copy())['owner'], 'team-a')
+		del self.entry['owner']
+		self.assertNotIn('owner', self.entry)
+		with self.assertRaises(KeyError):
+			self.entry['owner']
+		with self.assertRaises(KeyError):
+			del self.entry['owner']
+			
+			
+	def test_status(self):
+		print("TEST: 'test_status'")
+		self.entry['status'] = 'CLONED'
+		self.assertIs(self.entry.status, Repostatus.CLONED)
+		self.assertEqual(self.entry['status'], 'CLONED')
+		self.assertEqual(str(self.entry.status), 'CLONED')
+		self.assertEqual(json.loads(json.dumps(dict(self.entry)))['status'], 'CLONED')
+		with self.assertRaises(ValueError):
+			self.entry.status = 'CLONNED'
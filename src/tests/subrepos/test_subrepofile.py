@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# Tests the Subrepofile class
+
+# Import stuff
+import unittest
+import os, tempfile
+from . import TESTS_PATH, PROJECT_PATH
+
+from git_scaffold import write_subrepos_file
+from multigit import Statecache, Subrepofile
+
+class TestSubrepofile(unittest.TestCase):
+
+	def setUp(self):
+		self.workspace = tempfile.TemporaryDirectory()
+		self.workspace_path = os.path.realpath(self.workspace.name)
+		self.subrepos_file = os.path.join(self.workspace_path, 'subrepos')
+		write_subrepos_file(
+			self.subrepos_file,
+			[
+				{
+					'path': 'a-repo',
+					'repo': 'https://example.com/a-repo.git',
+					'branch': 'main',
+				},
+			],
+		)
+
+
+	def tearDown(self):
+		self.workspace.cleanup()
+
+
+	def test_load_memoized(self):
+		print("TEST: 'test_load_memoized'")
+		subrepo = Subrepofile()
+		subrepos = subrepo.load(self.subrepos_file)
+		self.assertEqual(subrepos[0]['path'], os.path.join(self.workspace_path, 'a-repo'))
+		self.assertEqual(subrepos[0]['gitref_type'], 'branch')
+
+		# Callers get their own copy
+		subrepos[0]['status'] = 'UP_TO_DATE'
+		self.assertEqual(subrepo.load(self.subrepos_file), [{
+			'path': os.path.join(self.workspace_path, 'a-repo'),
+			'repo': 'https://example.com/a-repo.git',
+			'branch': 'main',
+			'gitref_type': 'branch',
+		}])
+
+		# Changed files are parsed again
+		write_subrepos_file(
+			self.subrepos_file,
+			[
+				{
+					'path': 'a-repo',
+					'repo': 'https://example.com/a-repo.git',
+					'tag': 'v1.0',
+				},
+			],
+		)
+		self.assertEqual(subrepo.load(self.subrepos_file)[0]['gitref_type'], 'tag')
+
+
+	def test_load_cached(self):
+		print("TEST: 'test_load_cached'")
+		cache = Statecache(self.workspace_path, name='subrepofiles')
+		subrepos = Subrepofile(cache=cache).load(self.subrepos_file)
+		cache.save()
+
+		# A new run reuses what was parsed, without even loading the schema validator
+		subrepo = Subrepofile(cache=Statecache(self.workspace_path, name='subrepofiles'))
+		self.assertEqual(subrepo.load(self.subrepos_file), subrepos)
+		self.assertIsNone(subrepo.yaml_validator)
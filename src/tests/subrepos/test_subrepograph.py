@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+# Tests the Subrepograph class
+
+# Import stuff
+import unittest
+from . import TESTS_PATH, PROJECT_PATH
+
+from multigit import Subrepograph
+
+class TestSubrepograph(unittest.TestCase):
+	
+	def setUp(self):
+		self.graph = Subrepograph()
+		self.graph.extend([
+			{'path': '/workspace/a/b/c'},
+			{'path': '/workspace/a'},
+			{'path': '/workspace/d'},
+			{'path': '/workspace/a/b'},
+			{'path': '/workspace/ab'},
+		])
+		
+		
+	def test_dependencies(self):
+		print("TEST: 'test_dependencies'")
+		self.assertEqual(
+			self.graph.dependencies('/workspace/a/b/c'),
+			['/workspace/a/b', '/workspace/a']
+		)
+		# a common name prefix is not a path prefix
+		self.assertEqual(self.graph.dependencies('/workspace/ab'), [])
+		
+		
+	def test_duplicates_ignored(self):
+		print("TEST: 'test_duplicates_ignored'")
+		added = self.graph.extend([
+			{'path': '/workspace/d', 'repo': 'another'},
+			{'path': '/workspace/e'},
+		])
+		self.assertEqual(added, [{'path': '/workspace/e'}])
+		self.assertNotIn('repo', self.graph.subrepos['/workspace/d'])
+		
+		# already processed subrepos are not queued again either
+		for subrepo in self.graph.take_ready():
+			self.graph.finish(subrepo['path'])
+		self.assertEqual(self.graph.extend([{'path': '/workspace/a'}]), [])
+		self.assertNotIn('/workspace/a', [subrepo['path'] for subrepo in self.graph.take_ready()])
+		
+		
+	def test_ready_order(self):
+		print("TEST: 'test_ready_order'")
+		# every subtree root is ready at once
+		ready = [subrepo['path'] for subrepo in self.graph.take_ready()]
+		self.assertEqual(ready, ['/workspace/a', '/workspace/d', '/workspace/ab'])
+		self.assertEqual(self.graph.take_ready(), [])
+		# children follow their parents
+		self.graph.finish('/workspace/a')
+		self.assertEqual(self.graph.take_ready(), [{'path': '/workspace/a/b'}])
+		self.graph.finish('/workspace/a/b')
+		self.assertEqual(self.graph.take_ready(1), [{'path': '/workspace/a/b/c'}])
+		
+		
+	def test_critical_path(self):
+		print("TEST: 'test_critical_path'")
+		self.assertEqual(
+			self.graph.critical_path(),
+			['/workspace/a', '/workspace/a/b', '/workspace/a/b/c']
+		)
+		self.assertEqual(self.graph.dump()['/workspace/d'], [])
+		
+		
+if __name__ == '__main__':
+	unittest.main()
@@ -1,11 +1,15 @@
 # Tests the main entryproints
 
 import unittest
-import os, shutil, errno
+import asyncio, os, shutil, errno, json
+from contextlib import redirect_stdout
+from io import StringIO
+from unittest import mock
 
 from . import TESTS_PATH, PROJECT_PATH
-from git_scaffold import build_test_remotes, write_subrepos_file
+from git_scaffold import build_test_remotes, push_new_commit, write_subrepos_file
 import multigit
+from git import Repo
 
 class TestSubrepos(unittest.TestCase):
 	
@@ -113,8 +117,254 @@ class TestSubrepos(unittest.TestCase):
 		)
 		print(str(result))
 		self.assertEqual(result, None)
+
+
+	def test_process_resume(self):
+		print("TEST: 'test_process_resume'")
+		base_path = os.path.join(self.scenarios_path, 'standard')
+		journal_file = os.path.join(base_path, '.multigit', 'journal')
+		update = multigit.Gitrepo.update
+		
+		def interrupted_update(gitrepo, repoconf):
+			if repoconf['path'] == os.path.join(base_path, 'standard-repo'):
+				raise KeyboardInterrupt()
+			return update(gitrepo, repoconf)
+			
+		# A run stopped halfway keeps its journal...
+		with mock.patch.object(multigit.Gitrepo, 'update', autospec=True, side_effect=interrupted_update):
+			with self.assertRaises(KeyboardInterrupt):
+				self.my_subrepos.process(
+					base_path   = base_path,
+					report_only = False,
+				)
+		self.assertTrue(os.path.isfile(journal_file))
+		
+		# ...so the next one only processes what's left
+		with mock.patch.object(multigit.Gitrepo, 'update', autospec=True, side_effect=update) as resumed_update:
+			self.my_subrepos.process(
+				base_path   = base_path,
+				report_only = False,
+				resume      = True,
+			)
+		self.assertEqual(
+			[call.args[1]['path'] for call in resumed_update.call_args_list],
+			[os.path.join(base_path, 'standard-repo')]
+		)
+		# (a finished run leaves no state behind)
+		self.assertFalse(os.path.isdir(os.path.dirname(journal_file)))
+		
+		
+	def test_process_from_bundle(self):
+		print("TEST: 'test_process_from_bundle'")
+		base_path = os.path.join(self.scenarios_path, 'standard')
+		archive_file = os.path.join(self.scenarios_path, 'workspace.bundles')
+		self.my_subrepos.process(
+			base_path   = base_path,
+			report_only = False,
+		)
+		bundled = self.my_subrepos.export_bundle(
+			base_path    = base_path,
+			archive_file = archive_file,
+		)
+		# an empty remote has nothing to bundle
+		self.assertEqual(list(bundled.values()), [os.path.join(base_path, 'standard-repo')])
+		
+		# A new workspace gets the bundled objects from the archive, and only what's newer from the remotes
+		push_new_commit(self.remotes['standard_repo'], 'a-branch', 'new-file.txt', 'new\n')
+		bootstrap_path = os.path.join(self.scenarios_path, 'bootstrap')
+		os.makedirs(bootstrap_path)
+		shutil.copy(os.path.join(base_path, 'subrepos'), bootstrap_path)
+		extract = multigit.Bundlearchive.extract
+		extracted = []
+		
+		def recorded_extract(bundles, url, directory):
+			bundle_file = extract(bundles, url, directory)
+			extracted.append((url, bundle_file is not None))
+			return bundle_file
+			
+		with mock.patch.object(multigit.Bundlearchive, 'extract', autospec=True, side_effect=recorded_extract):
+			self.my_subrepos.process(
+				base_path   = bootstrap_path,
+				report_only = False,
+				from_bundle = archive_file,
+			)
+		self.assertEqual(
+			sorted(extracted),
+			sorted([(self.remotes['empty_repo'], False), (self.remotes['standard_repo'], True)])
+		)
+		self.assertEqual(
+			Repo(os.path.join(bootstrap_path, 'standard-repo')).head.commit.hexsha,
+			Repo(self.remotes['standard_repo']).commit('a-branch').hexsha
+		)
+		self.assertEqual(len(os.listdir(os.path.join(bootstrap_path, '.multigit', 'mirrors'))), 2)
+		
+		# Partial clones lack objects, so they aren't bundled
+		partial_path = os.path.join(self.scenarios_path, 'partial-repo')
+		Repo.clone_from('file://' + self.remotes['standard_repo'], partial_path, filter='blob:none')
+		bundled, skipped = multigit.Bundlearchive(archive_file + '.partial').export(
+			[{'repo': self.remotes['standard_repo'], 'path': partial_path}]
+		)
+		self.assertEqual((bundled, skipped), ({}, {partial_path: 'partial clone'}))
+		
+		# Not a bundle archive
+		with self.assertRaises(SystemExit) as e:
+			self.my_subrepos.process(
+				base_path   = bootstrap_path,
+				report_only = False,
+				from_bundle = os.path.join(bootstrap_path, 'subrepos'),
+			)
+		self.assertEqual(e.exception.code, errno.EINVAL)
+		
+		
+	def test_process_async(self):
+		print("TEST: 'test_process_async'")
+		async def collect(base_path, report_only):
+			return [
+				subrepo async for subrepo in self.my_subrepos.process_async(
+					base_path   = base_path,
+					report_only = report_only,
+					jobs        = 2,
+				)
+			]
+			
+		async def run_workspaces():
+			# both workspaces at once, on the same event loop
+			return await asyncio.gather(
+				collect(os.path.join(self.scenarios_path, 'standard'), False),
+				collect(os.path.join(self.scenarios_path, 'nonexistent-branch'), False),
+			)
+			
+		standard, nonexistent_branch = asyncio.run(run_workspaces())
+		print(str(standard))
+		print(str(nonexistent_branch))
+		self.assertEqual(
+			sorted((subrepo['path'], subrepo['status']) for subrepo in standard),
+			[
+				(os.path.join(self.scenarios_path, 'standard', 'empty-repo'), 'CLONED'),
+				(os.path.join(self.scenarios_path, 'standard', 'standard-repo'), 'CLONED'),
+			]
+		)
+		self.assertEqual([subrepo['status'] for subrepo in nonexistent_branch], ['ERROR'])
+		
+		# errors are raised, instead of exiting
+		with self.assertRaises(multigit.SubreposError) as cm:
+			asyncio.run(collect(os.path.join(self.scenarios_path, 'nosubrepos'), True))
+		self.assertEqual(cm.exception.errno, errno.ENOENT)
+		
+		
+	def test_process_json_output(self):
+		print("TEST: 'test_process_json_output'")
+		base_path = os.path.join(self.scenarios_path, 'standard')
+		output = StringIO()
+		with redirect_stdout(output):
+			self.my_subrepos.process(
+				base_path     = base_path,
+				report_only   = False,
+				output_format = 'ndjson',
+			)
+		print(output.getvalue())
+		records = [json.loads(line) for line in output.getvalue().splitlines()]
+		self.assertEqual(
+			[(record['path'], record['status']) for record in records],
+			[
+				(os.path.join(base_path, 'empty-repo'), 'CLONED'),
+				(os.path.join(base_path, 'standard-repo'), 'CLONED'),
+			]
+		)
+		self.assertEqual(records[1]['branch'], 'a-branch')
+		
+		# a JSON array, with the same records
+		output = StringIO()
+		with redirect_stdout(output):
+			self.my_subrepos.process(
+				base_path     = base_path,
+				report_only   = True,
+				output_format = 'json',
+			)
+		print(output.getvalue())
+		records = json.loads(output.getvalue())
+		self.assertEqual([record['status'] for record in records], ['EMPTY', 'UP_TO_DATE'])
 		
 		
+	def test_process_profiled(self):
+		print("TEST: 'test_process_profiled'")
+		base_path = os.path.join(self.scenarios_path, 'standard')
+		profiler = multigit.Profiler()
+		self.my_subrepos.process(
+			base_path   = base_path,
+			report_only = False,
+			jobs        = 2,
+			profiler    = profiler,
+		)
+		
+		summary = profiler.summary()
+		print(str(summary))
+		subrepos = {subrepo['path']: subrepo for subrepo in summary['subrepos']}
+		standard_repo = subrepos[os.path.join(base_path, 'standard-repo')]
+		self.assertIn('clone', standard_repo['phases'])
+		self.assertGreater(standard_repo['subprocesses'], 0)
+		self.assertGreater(standard_repo['bytes_fetched'], 0)
+		self.assertIn('load', [phase['name'] for phase in summary['phases']])
+		
+		# the trace holds both phases and git subprocesses
+		trace_file = os.path.join(base_path, 'trace.json')
+		profiler.write_trace(trace_file)
+		with open(trace_file, 'r') as f_trace:
+			trace = json.load(f_trace)
+		self.assertEqual(
+			set(event['cat'] for event in trace['traceEvents']),
+			set(['phase', 'git'])
+		)
+		
+		
+	def test_process_run_parallel(self):
+		print("TEST: 'test_process_run_parallel'")
+		# A child subrepo nested within its parent, declared first on purpose
+		base_path = os.path.join(self.scenarios_path, 'parallel')
+		write_subrepos_file(
+			os.path.join(base_path, 'subrepos'),
+			[
+				{
+					'path': 'standard-repo/nested-repo',
+					'repo': self.remotes['simplest_repo'],
+				},
+				{
+					'path': 'standard-repo',
+					'repo': self.remotes['standard_repo'],
+				},
+				{
+					'path': 'different-remote',
+					'repo': self.remotes['different_remote'],
+				},
+			],
+		)
+		result = self.my_subrepos.process(
+			base_path   = base_path,
+			report_only = False,
+			jobs        = 4,
+		)
+		self.assertEqual(result, None)
+		# Both the parent and its nested subrepo must be proper clones
+		for path, remote in (
+			('standard-repo', 'standard_repo'),
+			('standard-repo/nested-repo', 'simplest_repo'),
+			('different-remote', 'different_remote'),
+		):
+			repo = Repo(os.path.join(base_path, path))
+			self.assertEqual(repo.remotes.origin.url, self.remotes[remote])
+			
+		# ...and the graph shows the nesting
+		graph = self.my_subrepos.dependency_graph(base_path=base_path)
+		self.assertEqual(len(graph), 3)
+		self.assertEqual(
+			graph.critical_path(),
+			[
+				os.path.join(base_path, 'standard-repo'),
+				os.path.join(base_path, 'standard-repo/nested-repo'),
+			]
+		)
+
+
 	@classmethod
 	def tearDown(self):
 		# clean up after the test
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+# Tests the Subreposvalidator class
+
+# Import stuff
+import unittest
+import os
+import yaml
+from . import TESTS_PATH, PROJECT_PATH
+
+import multigit
+from multigit.subreposvalidator import Subreposvalidator
+
+try:
+	from cerberus import Validator
+except ImportError:
+	Validator = None
+
+# documents mapped to the errors Cerberus reports about them
+DOCUMENTS = [
+	({'subrepos': []}, {}),
+	({'subrepos': [{'path': 'a', 'repo': 'b', 'commit': 'c'}]}, {}),
+	({'subrepos': [{'path': 'a', 'repo': 'b', 'tag': 't', 'depth': 1, 'filter': 'blob:none'}]}, {}),
+	(
+		{'subrepos': [{'path': 'a', 'repo': 'b', 'depth': 0, 'filter': 'blob:limit=1k'}]},
+		{'subrepos': [{0: [{'depth': ['min value is 1'], 'filter': ['unallowed value blob:limit=1k']}]}]},
+	),
+	(
+		{'subrepos': [{'path': 'a', 'repo': 'b', 'depth': '1'}]},
+		{'subrepos': [{0: [{'depth': ['must be of integer type']}]}]},
+	),
+	({'subrepos': [{'path': 'a', 'repo': 'b', 'tag': 't', 'immutable': True}]}, {}),
+	(
+		{'subrepos': [{'path': 'a', 'repo': 'b', 'branch': 'main', 'immutable': 'yes'}]},
+		{'subrepos': [{0: [{'immutable': ['must be of boolean type']}]}]},
+	),
+	(
+		{'subrepos': [{'path': 'a', 'repo': 'b', 'branch': 'main', 'immutable': False}]},
+		{'subrepos': [{0: [{'immutable': ["field 'tag' is required"]}]}]},
+	),
+	(
+		{'subrepos': [{'path': 'a', 'repo': 'b', 'commit': 'c', 'immutable': True}]},
+		{'subrepos': [{0: [{'immutable': ["field 'tag' is required"]}]}]},
+	),
+	(
+		{'subrepos': [{'path': 'a', 'repo': 'b', 'immutable': True}]},
+		{'subrepos': [{0: [{'immutable': ["field 'tag' is required"]}]}]},
+	),
+	(
+		{'subrepos': [{'path': 'a', 'repo': 'b', 'immutable': None}]},
+		{'subrepos': [{0: [{'immutable': ["field 'tag' is required", 'null value not allowed']}]}]},
+	),
+	({}, {'subrepos': ['required field']}),
+	({'subrepos': None}, {'subrepos': ['null value not allowed']}),
+	({'subrepos': 'x'}, {'subrepos': ['must be of list type']}),
+	({'subrepos': [None]}, {'subrepos': [{0: ['null value not allowed']}]}),
+	(
+		{'subrepos': ['a', {'path': 1}]},
+		{'subrepos': [{
+			0: ['must be of dict type'],
+			1: [{'path': ['must be of string type'], 'repo': ['required field']}],
+		}]},
+	),
+	(
+		{'subrepos': [{'path': 'a', 'repo': 'b', 'branch': 1, 'tag': 't'}]},
+		{'subrepos': [{0: [{
+			'branch': ['must be of string type'],
+			'tag': ["'branch', 'commit' must not be present with 'tag'"],
+		}]}]},
+	),
+	(
+		{'subrepos': [{'path': 'a', 'repo': 'b', 'branch': None, 'tag': 't'}]},
+		{'subrepos': [{0: [{
+			'branch': ["'tag', 'commit' must not be present with 'branch'", 'null value not allowed'],
+			'tag': ["'branch', 'commit' must not be present with 'tag'"],
+		}]}]},
+	),
+	(
+		{'subrepos': [{'path': 'a', 'repo': None, 'foo': 1}], 'bar': 2},
+		{
+			'bar': ['unknown field'],
+			'subrepos': [{0: [{'foo': ['unknown field'], 'repo': ['null value not allowed']}]}],
+		},
+	),
+]
+
+class TestSubreposvalidator(unittest.TestCase):
+
+	def setUp(self):
+		with open(os.path.join(os.path.dirname(multigit.__file__), 'subrepos_schema.yaml'), 'r') as f_yaml_rules:
+			self.rules = yaml.safe_load(f_yaml_rules)
+		self.validator = Subreposvalidator(self.rules)
+
+
+	def test_errors(self):
+		print("TEST: 'test_errors'")
+		for document, errors in DOCUMENTS:
+			self.assertEqual(self.validator.validate(document), not errors)
+			self.assertEqual(self.validator.errors, errors)
+
+
+	@unittest.skipIf(Validator is None, "Cerberus is not available")
+	def test_same_as_cerberus(self):
+		print("TEST: 'test_same_as_cerberus'")
+		cerberus_validator = Validator(self.rules)
+		for document, errors in DOCUMENTS:
+			self.assertEqual(
+				self.validator.validate(document),
+				cerberus_validator.validate(document)
+			)
+			self.assertEqual(self.validator.errors, cerberus_validator.errors)
+
+
+	def test_wrong_document(self):
+		print("TEST: 'test_wrong_document'")
+		with self.assertRaises(ValueError):
+			self.validator.validate(['not', 'a', 'dict'])
+
+
+	def test_unsupported_rule(self):
+		print("TEST: 'test_unsupported_rule'")
+		with self.assertRaises(ValueError):
+			Subreposvalidator({'subrepos': {'type': 'list', 'regex': '.*'}})